@@ -115,6 +115,30 @@ def get_recipe_info(recipe_name):
     response = requests.get(f'http://localhost:50051/recipe_info/{recipe_name}')
     return json.loads(response.content)
 
+def autocomplete(prefix, kind):
+    print("Trying to get name completions from 'localhost:50051'")
+    response = requests.get('http://localhost:50051/autocomplete', 
+                            params={'prefix': prefix, 'type': kind, 'limit': 5})
+    if response.status_code != 200:
+        return []
+    return [completion['name'] for completion in json.loads(response.content)['completions']]
+
+def resolve_recipe(recipe_name):
+    print("Trying to get the closest recipe names from 'localhost:50051'")
+    response = requests.get(f'http://localhost:50051/resolve_recipe/{recipe_name}', params={'limit': 5})
+    if response.status_code != 200:
+        return []
+    return [match['recipe_name'] for match in json.loads(response.content)['matches']]
+
+def suggest(prefix, kind):
+    """Print the names of the given kind that start with what was typed, 
+    or for a recipe with no such name, the recipes closest to a typo."""
+    completions = autocomplete(prefix, kind)
+    if not completions and kind == 'recipe':
+        completions = resolve_recipe(prefix)
+    if completions:
+        print(f"Did you mean: {', '.join(completions)}?")
+
 def execute_user_action(weekly_meal_plan):
     """Interact with the backend to get database information to view or 
     properly update the client side weekly meal plan."""
@@ -168,6 +192,7 @@ def execute_user_action(weekly_meal_plan):
                     break
                 else:
                     print("Please enter a valid recipe name or 'q' to quit.")
+                    suggest(recipe, 'recipe')
     
         elif action == "w":
             print(f"\nYour current weekly plan is: "
@@ -200,6 +225,7 @@ def execute_user_action(weekly_meal_plan):
                     break
                 else:
                     print("\nPlease enter a valid cookbook name or 'q' to quit.")
+                    suggest(cookbook, 'cookbook')
         
         elif action == 'r':
             given_cookbook_name = input("\nPress enter if you'd like to see all "
@@ -227,7 +253,8 @@ def execute_user_action(weekly_meal_plan):
                     for ingredient in recipe_info['ingredients']:
                         print(ingredient)
                 else:
-                    print("Please enter a valid recipe name or 'q' to quit.")     
+                    print("Please enter a valid recipe name or 'q' to quit.")
+                    suggest(recipe, 'recipe')
             
         else:
             print("\nThat command is unrecognizable.  Enter 'q' to quit.")
@@ -0,0 +1,114 @@
+"""
+This file contains the connection wrapper the meal planning back-end runs
+the operations of a /batch request on.
+
+It includes:
+- Batch Connection Class
+
+While a batch is open on a thread, the DAL methods called on that thread
+use the batch's one pooled connection instead of each borrowing their own.
+The DAL methods log or return the database errors they hit rather than raise
+them, so the errors are also noted on the batch, which is how it tells which
+operation failed.  In a transactional batch the commits of the DAL methods
+are held back and the batch is committed or rolled back as a whole.
+"""
+
+import mysql.connector
+
+class BatchConnection:
+    """
+    Wraps a pooled connection shared by the operations of one batch.
+
+    Instantiation parameters:
+    - connector: The pooled connection the operations run on
+    - transactional: Whether the operations share one transaction that is
+      only committed if every one of them succeeds
+
+    Methods:
+    - cursor: Opens a cursor on the connection
+    - commit: Commits the current operation, unless the batch is transactional
+    - rollback: Rolls back the open transaction
+    - record_error: Notes a database error raised by the current operation
+    - run: Runs one operation and returns its result and error
+    - finish: Commits or rolls back a transactional batch
+    """
+    def __init__(self, connector, transactional=False):
+        self.connector = connector
+        self.transactional = transactional
+        self.failed = False
+        self._errors = []
+
+    def cursor(self, *args, **kwargs):
+        """
+        Opens a cursor on the shared connection.
+
+        Returns:
+        - MySQLCursor: The new cursor.
+        """
+        return self.connector.cursor(*args, **kwargs)
+
+    def commit(self):
+        """
+        Commits the writes of the current operation.  In a transactional
+        batch nothing is committed until finish.
+        """
+        if self.transactional:
+            return
+        try:
+            self.connector.commit()
+        except mysql.connector.Error as err:
+            self.record_error(err)
+            raise
+
+    def rollback(self):
+        """
+        Rolls back the open transaction.
+        """
+        self.connector.rollback()
+
+    def record_error(self, error):
+        """
+        Notes a database error raised by the current operation.
+
+        Parameters:
+        - error (mysql.connector.Error): The error raised.
+        """
+        self._errors.append(error)
+
+    def run(self, operation):
+        """
+        Runs one operation.  Outside a transaction, the partial writes of an
+        operation that fails are rolled back so the next commit leaves them
+        out.
+
+        Parameters:
+        - operation (callable): Calls the DAL method of the operation.
+
+        Returns:
+        - tuple: The value the operation returned and the first database
+          error it raised, or None if it succeeded.
+        """
+        self._errors = []
+        result = operation()
+        error = self._errors[0] if self._errors else None
+        if error is not None:
+            self.failed = True
+            if not self.transactional:
+                self.rollback()
+        return result, error
+
+    def finish(self):
+        """
+        Ends a transactional batch, committing it if every operation
+        succeeded and rolling it back otherwise.
+
+        Returns:
+        - bool: Whether the batch's writes were kept.
+        """
+        if not self.transactional:
+            return True
+        if self.failed:
+            self.rollback()
+            return False
+        self.connector.commit()
+        return True
@@ -0,0 +1,189 @@
+"""
+This file contains the metric tree the meal planning back-end uses to
+resolve mistyped names.
+
+It includes:
+- BK Tree Class
+- levenshtein function
+
+A BK-tree hangs every name below the first name at its edit distance from
+that name, and so on down.  Since edit distance obeys the triangle
+inequality, a search for the names within a distance r of a query only has
+to descend into the children whose edge distance is within r of the query's
+distance to their parent, which skips most of the tree for small r.
+"""
+
+import heapq
+
+def levenshtein(first, second, bound=None):
+    """
+    Computes the number of single character insertions, deletions and
+    substitutions that turn one string into another.
+
+    Parameters:
+    - first (str): The first string.
+    - second (str): The second string.
+    - bound (int, optional): Skip the computation when the difference in
+      length alone makes the distance larger than this. Defaults to None.
+
+    Returns:
+    - int: The edit distance, or bound + 1 if it is known to be larger than
+      the bound.
+    """
+    if bound is not None and abs(len(first) - len(second)) > bound:
+        return bound + 1
+    return _distance(_pattern(first), second)
+
+def _pattern(word):
+    # The positions of each character of the word, as a bit mask
+    positions = {}
+    for position, char in enumerate(word):
+        positions[char] = positions.get(char, 0) | 1 << position
+    return positions, len(word)
+
+def _distance(pattern, text):
+    # Myers' bit-parallel edit distance, as adapted by Hyyro, which keeps 
+    # a whole column of the distance matrix in the bits of two integers 
+    # and so runs one step per character of the text
+    positions, length = pattern
+    if length == 0:
+        return len(text)
+    mask = (1 << length) - 1
+    last = 1 << (length - 1)
+    vertical_plus, vertical_minus, score = mask, 0, length
+    for char in text:
+        equal = positions.get(char, 0)
+        vertical_x = equal | vertical_minus
+        horizontal_x = (((equal & vertical_plus) + vertical_plus) ^ vertical_plus) | equal
+        horizontal_plus = vertical_minus | ~(horizontal_x | vertical_plus)
+        horizontal_minus = vertical_plus & horizontal_x
+        if horizontal_plus & last:
+            score += 1
+        elif horizontal_minus & last:
+            score -= 1
+        horizontal_plus = (horizontal_plus << 1) | 1
+        horizontal_minus = horizontal_minus << 1
+        vertical_plus = (horizontal_minus | ~(vertical_x | horizontal_plus)) & mask
+        vertical_minus = horizontal_plus & vertical_x & mask
+    return score
+
+class BKTree:
+    """
+    A BK-tree over strings under the edit distance.
+
+    Instantiation parameters:
+    - words: The strings the tree starts with
+
+    Methods:
+    - add: Inserts a string
+    - remove: Deletes a string
+    - search: Returns the strings closest to a query within a distance
+
+    Attributes:
+    - comparisons: The number of distances the last search computed
+    """
+    def __init__(self, words=()):
+        # Each node is [word, {edge distance: child node}]
+        self._root = None
+        self._size = 0
+        self._deleted = set()
+        self.comparisons = 0
+        for word in words:
+            self.add(word)
+
+    def __len__(self):
+        return self._size
+
+    def add(self, word):
+        """
+        Inserts a string, unless the tree already holds it.
+
+        Parameters:
+        - word (str): The string to insert.
+        """
+        if word in self._deleted:
+            self._deleted.discard(word)
+            self._size += 1
+            return
+        if self._root is None:
+            self._root = [word, {}]
+            self._size += 1
+            return
+        pattern = _pattern(word)
+        node = self._root
+        while True:
+            distance = _distance(pattern, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = [word, {}]
+                self._size += 1
+                return
+            node = child
+
+    def remove(self, word):
+        """
+        Deletes a string.  The node stays in the tree to keep the paths to
+        the strings below it, and the tree is rebuilt once most of its nodes
+        are deleted.
+
+        Parameters:
+        - word (str): The string to delete.
+        """
+        if word in self._deleted or not self.search(word, 0, 1):
+            return
+        self._deleted.add(word)
+        self._size -= 1
+        if len(self._deleted) > self._size:
+            words = [word for word in self._walk() if word not in self._deleted]
+            self.__init__(words)
+
+    def search(self, word, max_distance, limit):
+        """
+        Returns the strings closest to a query.  Once limit strings are
+        found, the search radius shrinks to the distance of the farthest of
+        them.
+
+        Parameters:
+        - word (str): The query.
+        - max_distance (int): The largest edit distance returned.
+        - limit (int): The most strings returned.
+
+        Returns:
+        - list: A (distance, string) tuple per match, closest first, ties in
+          alphabetical order.
+        """
+        self.comparisons = 0
+        if self._root is None or limit < 1:
+            return []
+        pattern = _pattern(word)
+        matches = []
+        # The distances of the closest limit matches so far, negated so 
+        # that the farthest of them is on top of the heap
+        closest = []
+        radius = max_distance
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            self.comparisons += 1
+            distance = _distance(pattern, node[0])
+            if distance <= radius and node[0] not in self._deleted:
+                matches.append((distance, node[0]))
+                if len(closest) < limit:
+                    heapq.heappush(closest, -distance)
+                else:
+                    heapq.heappushpop(closest, -distance)
+                if len(closest) == limit:
+                    radius = min(radius, -closest[0])
+            for edge, child in node[1].items():
+                if distance - radius <= edge <= distance + radius:
+                    stack.append(child)
+        return sorted(match for match in matches if match[0] <= radius)[:limit]
+
+    def _walk(self):
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            yield node[0]
+            stack.extend(node[1].values())
@@ -0,0 +1,328 @@
+"""
+This file contains the tracer of the stored procedure calls made by the
+meal planning back-end.
+
+It includes:
+- Call Tracer Class
+- Helpers that redact parameters, size result sets and pull the statements
+  EXPLAIN can plan out of a procedure body
+
+Every call is traced at DEBUG on the 'meal_planning.dal.trace' logger with
+its procedure, redacted parameters, row count, approximate bytes fetched and
+wall time.  Calls slower than the threshold are also logged at WARNING on
+'meal_planning.dal.slow_calls', which writes to a size-rotated file when one
+is configured.  Optionally a slow call is followed by an EXPLAIN of each
+SELECT in the procedure's body, run with the call's own parameters, and the
+plans are stored in the slow call's entry.  The EXPLAINs need a connection
+of their own, so they run on a background thread that logs the entry once
+the plans are in, instead of holding up the request whose call was slow
+while it waits for a second connection from a possibly exhausted pool.
+"""
+
+import contextvars
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import threading
+
+import mysql.connector
+
+from logging_setup import JsonFormatter
+
+trace_logger = logging.getLogger('meal_planning.dal.trace')
+slow_call_logger = logging.getLogger('meal_planning.dal.slow_calls')
+
+PROCEDURE_BODY_QUERY = (
+    "SELECT ROUTINE_DEFINITION FROM information_schema.ROUTINES "
+    "WHERE ROUTINE_SCHEMA = DATABASE() AND ROUTINE_TYPE = 'PROCEDURE' "
+    "AND ROUTINE_NAME = %s")
+PROCEDURE_PARAMETERS_QUERY = (
+    "SELECT PARAMETER_NAME FROM information_schema.PARAMETERS "
+    "WHERE SPECIFIC_SCHEMA = DATABASE() AND ROUTINE_TYPE = 'PROCEDURE' "
+    "AND SPECIFIC_NAME = %s AND PARAMETER_NAME IS NOT NULL "
+    "ORDER BY ORDINAL_POSITION")
+
+class CallTracer:
+    """
+    Records the stored procedure calls of the DAL and logs the slow ones.
+
+    Instantiation parameters:
+    - threshold: Seconds a call may take before it is logged as slow
+    - log_path: File slow calls are also written to, None to only log them
+    - max_bytes: Size at which the slow call file is rotated
+    - backup_count: Rotated slow call files kept
+    - explain: Whether slow calls are followed by an EXPLAIN of their
+      procedure's SELECT statements
+    - connection: Returns a context manager holding a database connection,
+      used to run the EXPLAINs
+    - max_pending: The most slow calls waiting to be explained; past it,
+      slow calls are logged without their plans
+
+    Methods:
+    - record: Traces one call, logging it if it was slow
+    - explain_procedure: Returns the plans of a procedure's statements
+    - flush: Waits until the slow calls waiting to be explained are logged
+    - open_log: Starts writing slow calls to a rotating file
+    - get_stats: Returns call and slow call counters
+    """
+    def __init__(self, threshold=0.2, log_path=None, max_bytes=10485760,
+                 backup_count=5, explain=False, connection=None, max_pending=100):
+        self.threshold = threshold
+        self.explain = explain
+        self.connection = connection
+        self.max_pending = max_pending
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._lock = threading.Lock()
+        self._statements = {}
+        self._calls = 0
+        self._slow_calls = 0
+        self._handler = None
+        self._pending = None
+        self._worker = None
+        self._worker_pid = None
+        self._dropped_explains = 0
+        if log_path:
+            self.open_log(log_path)
+
+    def record(self, procedure, args, result_sets, seconds, error=None):
+        """
+        Traces one stored procedure call, logging it if it was slow.
+
+        Parameters:
+        - procedure (str): The name of the stored procedure.
+        - args (list): The parameters it was called with.
+        - result_sets (list): The rows of each result set, None if the call
+          failed.
+        - seconds (float): Wall time of the call, including fetching.
+        - error (mysql.connector.Error, optional): The error the call raised.
+        """
+        slow = seconds >= self.threshold
+        with self._lock:
+            self._calls += 1
+            if slow:
+                self._slow_calls += 1
+        if not slow and not trace_logger.isEnabledFor(logging.DEBUG):
+            return
+
+        entry = {
+            'procedure': procedure,
+            'params': redact(args),
+            'rows': sum(len(rows) for rows in result_sets or ()),
+            'bytes': result_size(result_sets or ()),
+            'duration_ms': round(seconds * 1000, 3),
+        }
+        if error is not None:
+            entry['error'] = str(error)
+        trace_logger.debug("Called %s", procedure, extra=entry)
+        if slow:
+            if self.explain and self.connection is not None and self._queue_explain(procedure, args, entry):
+                return
+            slow_call_logger.warning("Slow call to %s", procedure, extra=entry)
+
+    def explain_procedure(self, procedure, args):
+        """
+        Runs EXPLAIN for each SELECT in a procedure's body, substituting the
+        procedure's parameters with the values of a call.
+
+        Only SELECT statements are explained, so nothing is ever written.
+        Statements that cannot be explained on their own, such as ones
+        reading the procedure's local variables, get the error instead.
+
+        Parameters:
+        - procedure (str): The name of the stored procedure.
+        - args (list): The parameters of the call being explained.
+
+        Returns:
+        - list: One dict per statement with the statement and its plan rows,
+          or an error message.
+        """
+        plans = []
+        try:
+            with self.connection() as connector:
+                cursor = connector.cursor(dictionary=True)
+                statements = self._get_statements(cursor, procedure)
+                for statement, positions in statements:
+                    try:
+                        cursor.execute("EXPLAIN " + statement,
+                                       [args[position] for position in positions])
+                        plans.append({'statement': statement, 'plan': cursor.fetchall()})
+                    except mysql.connector.Error as err:
+                        plans.append({'statement': statement, 'error': str(err)})
+                cursor.close()
+        except mysql.connector.Error as err:
+            plans.append({'error': str(err)})
+        return plans
+
+    def flush(self):
+        """Waits until every slow call waiting to be explained is logged."""
+        with self._lock:
+            pending = self._pending
+        if pending is not None:
+            pending.join()
+
+    def _queue_explain(self, procedure, args, entry):
+        # Returns whether the worker took the call, starting the worker on
+        # first use and again in a forked process, which does not inherit it
+        with self._lock:
+            if self._worker is None or self._worker_pid != os.getpid() or not self._worker.is_alive():
+                self._pending = queue.Queue(self.max_pending)
+                self._worker = threading.Thread(target=self._explain_pending, args=(self._pending,),
+                                                name='slow-call-explain', daemon=True)
+                self._worker_pid = os.getpid()
+                self._worker.start()
+            try:
+                # The context carries the request id into the worker's log entry
+                self._pending.put_nowait((contextvars.copy_context(), procedure, args, entry))
+                return True
+            except queue.Full:
+                self._dropped_explains += 1
+                return False
+
+    def _explain_pending(self, pending):
+        while True:
+            context, procedure, args, entry = pending.get()
+            try:
+                try:
+                    entry['plan'] = self.explain_procedure(procedure, args)
+                except Exception as err:
+                    entry['plan'] = [{'error': str(err)}]
+                context.run(slow_call_logger.warning, "Slow call to %s", procedure, extra=entry)
+            finally:
+                pending.task_done()
+
+    def open_log(self, path):
+        """
+        Starts writing slow calls to a size-rotated file, replacing any file
+        opened before.
+
+        Parameters:
+        - path (str): The file to write to.
+        """
+        handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=self.max_bytes, backupCount=self.backup_count, delay=True)
+        handler.setFormatter(JsonFormatter())
+        with self._lock:
+            previous, self._handler = self._handler, handler
+        if previous is not None:
+            slow_call_logger.removeHandler(previous)
+            previous.close()
+        slow_call_logger.addHandler(handler)
+
+    def get_stats(self):
+        """
+        Returns counters describing the traced calls.
+
+        Returns:
+        - dict: The threshold, the number of calls and slow calls, and the 
+          slow calls waiting to be explained or logged without a plan 
+          because too many were waiting.
+        """
+        with self._lock:
+            return {
+                'threshold_ms': self.threshold * 1000,
+                'calls': self._calls,
+                'slow_calls': self._slow_calls,
+                'explain': self.explain,
+                'pending_explains': self._pending.qsize() if self._pending is not None else 0,
+                'dropped_explains': self._dropped_explains,
+            }
+
+    def _get_statements(self, cursor, procedure):
+        # Procedure bodies only change with a schema migration, so they are
+        # parsed once per process
+        statements = self._statements.get(procedure)
+        if statements is None:
+            cursor.execute(PROCEDURE_BODY_QUERY, [procedure])
+            row = cursor.fetchone()
+            body = row['ROUTINE_DEFINITION'] if row else None
+            cursor.execute(PROCEDURE_PARAMETERS_QUERY, [procedure])
+            parameters = [row['PARAMETER_NAME'] for row in cursor.fetchall()]
+            statements = self._statements[procedure] = explainable_statements(body or '', parameters)
+        return statements
+
+def redact(args):
+    """
+    Redacts call parameters for logging.
+
+    Numbers, booleans and None are kept since they are ids, counts and flags.
+    Text can be names, e-mail addresses or password hashes, so only its
+    length is kept.
+
+    Parameters:
+    - args (list): The parameters of a call.
+
+    Returns:
+    - list: The parameters safe to log.
+    """
+    redacted = []
+    for value in args or ():
+        if value is None or isinstance(value, (bool, int, float)):
+            redacted.append(value)
+        else:
+            redacted.append(f'<{type(value).__name__}:{len(str(value))}>')
+    return redacted
+
+def result_size(result_sets):
+    """
+    Approximates the bytes fetched for a call's result sets, counting each
+    value as it is sent in MySQL's text protocol.
+
+    Parameters:
+    - result_sets (list): The rows of each result set.
+
+    Returns:
+    - int: The approximate size in bytes.
+    """
+    size = 0
+    for rows in result_sets:
+        for row in rows:
+            for value in row:
+                if isinstance(value, (bytes, bytearray)):
+                    size += len(value)
+                elif value is not None:
+                    size += len(str(value))
+    return size
+
+_COMMENT = re.compile(r'--[^\n]*|#[^\n]*|/\*.*?\*/', re.S)
+_SELECT_INTO = re.compile(r'\bINTO\s+\w+(\s*,\s*\w+)*\s+(?=FROM\b)', re.I)
+
+def explainable_statements(body, parameters, kinds=('SELECT',)):
+    """
+    Pulls the statements of the given kinds out of a procedure body so they
+    can be explained on their own.
+
+    Parameters:
+    - body (str): The procedure body, as stored in information_schema.
+    - parameters (list): The procedure's parameter names, in order.
+    - kinds (tuple, optional): The statement keywords to pull out, such as
+      'SELECT', 'UPDATE' and 'DELETE'.
+
+    Returns:
+    - list: Tuples of a statement with %s placeholders for the parameters
+      and the positions of the parameters filling them.
+    """
+    parameter_pattern = None
+    if parameters:
+        parameter_pattern = re.compile(r'\b(' + '|'.join(map(re.escape, parameters)) + r')\b')
+    keyword = re.compile(r'\b(' + '|'.join(kinds) + r')\b', re.I)
+    statements = []
+    for piece in _COMMENT.sub(' ', body).split(';'):
+        match = keyword.search(piece)
+        # Skips keywords inside other statements, such as INSERT ... SELECT 
+        # or ON DUPLICATE KEY UPDATE
+        if match is None or piece[:match.start()].strip().upper().split()[-1:] not in (
+                [], ['BEGIN'], ['THEN'], ['ELSE'], ['DO'], ['LOOP']):
+            continue
+        statement = _SELECT_INTO.sub('', piece[match.start():]).replace('%', '%%')
+        statement = ' '.join(statement.split())
+        positions = []
+        if parameter_pattern is not None:
+            def placeholder(found):
+                positions.append(parameters.index(found.group(1)))
+                return '%s'
+            statement = parameter_pattern.sub(placeholder, statement)
+        statements.append((statement, positions))
+    return statements
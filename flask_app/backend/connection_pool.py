@@ -0,0 +1,260 @@
+"""
+This file contains the database connection pool used by the meal planning
+back-end.
+
+It includes:
+- Connection Pool Class
+
+The DAL borrows a connection from the pool for every stored procedure call
+and hands it back afterwards, so requests no longer pay a TCP and
+authentication handshake each time they touch the database.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from mysql.connector.errors import PoolError
+
+class ConnectionPool:
+    """
+    A thread safe pool of reusable database connections.
+
+    Instantiation parameters:
+    - connect: A callable returning a new database connection
+    - pool_size: The number of connections kept open while idle
+    - max_overflow: The number of extra connections allowed during spikes,
+      closed again as soon as they are returned
+    - idle_timeout: Seconds an idle connection may sit in the pool before it
+      is closed instead of reused
+    - pre_ping: Whether to check a connection is alive before lending it
+    - timeout: Seconds to wait for a free connection before giving up
+
+    Methods:
+    - acquire: Borrows a connection from the pool
+    - release: Returns a borrowed connection to the pool
+    - connection: Context manager wrapping acquire and release
+    - dispose: Empties the pool, optionally closing the idle connections
+    - get_stats: Returns counters describing the state of the pool
+    """
+    def __init__(self, connect, pool_size=5, max_overflow=10, idle_timeout=300,
+                 pre_ping=True, timeout=30):
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1")
+        if max_overflow < 0:
+            raise ValueError("max_overflow cannot be negative")
+        self._connect = connect
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.idle_timeout = idle_timeout
+        self.pre_ping = pre_ping
+        self.timeout = timeout
+
+        self._lock = threading.Condition()
+        self._idle = deque()
+        self._checked_out = 0
+        self._created = 0
+        self._closed = 0
+        self._borrowed = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._failed_pings = 0
+        self._expired = 0
+        self._waiting = 0
+
+    def acquire(self):
+        """
+        Borrows a connection from the pool.
+
+        Idle connections are reused most recently returned first.  Connections
+        that have been idle past the idle timeout or that fail the health check
+        are closed and replaced.  When every connection is checked out and the
+        overflow is used up the call blocks until one is returned.
+
+        Returns:
+        - connection: An open database connection.
+
+        Raises:
+        - PoolError: If no connection became available within the timeout.
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            connector = None
+            expired = []
+            timed_out = False
+            with self._lock:
+                while True:
+                    while self._idle:
+                        candidate, returned_at = self._idle.pop()
+                        if self.idle_timeout is not None and time.monotonic() - returned_at > self.idle_timeout:
+                            self._expired += 1
+                            self._closed += 1
+                            expired.append(candidate)
+                            continue
+                        # Counted as checked out while it is pinged outside
+                        # the lock, so its slot cannot be handed out twice
+                        connector = candidate
+                        self._checked_out += 1
+                        break
+                    if connector is not None:
+                        break
+
+                    if self._total() < self.pool_size + self.max_overflow:
+                        # Reserve the slot before connecting so other threads
+                        # cannot overshoot the limit while the handshake runs
+                        self._checked_out += 1
+                        break
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        timed_out = True
+                        break
+                    self._waits += 1
+                    self._waiting += 1
+                    try:
+                        self._lock.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+
+            # Closing and pinging talk to the server, so neither holds the
+            # lock that every other borrower and release needs
+            self._close_all(expired)
+            if connector is None:
+                if timed_out:
+                    raise PoolError("Timed out waiting for a database connection")
+                break
+            if self.pre_ping and not self._is_alive(connector):
+                with self._lock:
+                    self._failed_pings += 1
+                    self._closed += 1
+                    self._checked_out -= 1
+                    self._lock.notify()
+                self._close_all([connector])
+                continue
+            with self._lock:
+                self._borrowed += 1
+            return connector
+
+        try:
+            connector = self._connect()
+        except Exception:
+            with self._lock:
+                self._checked_out -= 1
+                self._lock.notify()
+            raise
+
+        with self._lock:
+            self._created += 1
+            self._borrowed += 1
+        return connector
+
+    def release(self, connector):
+        """
+        Returns a borrowed connection to the pool.
+
+        Any open transaction is rolled back so the next borrower starts clean.
+        Overflow connections nobody is waiting for and connections that cannot
+        be reset are closed rather than kept.
+
+        Parameters:
+        - connector (connection): The connection to return, None is ignored.
+        """
+        if connector is None:
+            return
+        reusable = True
+        try:
+            if connector.in_transaction:
+                connector.rollback()
+        except Exception:
+            reusable = False
+
+        with self._lock:
+            self._checked_out -= 1
+            # Hand overflow connections straight to a waiting borrower
+            # instead of closing them and making it reconnect
+            if reusable and (self._total() < self.pool_size or self._waiting):
+                self._idle.append((connector, time.monotonic()))
+                connector = None
+            else:
+                self._closed += 1
+            self._lock.notify()
+        if connector is not None:
+            self._close_all([connector])
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrows a connection for the duration of a with block.
+
+        Yields:
+        - connection: An open database connection, returned to the pool when
+          the block exits whether or not it raised.
+        """
+        connector = self.acquire()
+        try:
+            yield connector
+        finally:
+            self.release(connector)
+
+    def dispose(self, close_connections=True):
+        """
+        Empties the pool and resets the checked out count.
+
+        Parameters:
+        - close_connections (bool): Whether to close the idle connections.
+          Pass False in a freshly forked worker, where the sockets are still
+          shared with the parent process and closing them would end the
+          parent's sessions.
+        """
+        with self._lock:
+            idle = [connector for connector, _ in self._idle]
+            self._idle.clear()
+            if close_connections:
+                self._closed += len(idle)
+            self._checked_out = 0
+            self._lock.notify_all()
+        if close_connections:
+            self._close_all(idle)
+
+    def get_stats(self):
+        """
+        Returns counters describing the state of the pool.
+
+        Returns:
+        - dict: Configuration, current occupancy and lifetime counters.
+        """
+        with self._lock:
+            return {
+                'pool_size': self.pool_size,
+                'max_overflow': self.max_overflow,
+                'idle': len(self._idle),
+                'checked_out': self._checked_out,
+                'total': self._total(),
+                'created': self._created,
+                'closed': self._closed,
+                'borrowed': self._borrowed,
+                'waits': self._waits,
+                'timeouts': self._timeouts,
+                'failed_pings': self._failed_pings,
+                'expired': self._expired,
+            }
+
+    def _total(self):
+        return len(self._idle) + self._checked_out
+
+    @staticmethod
+    def _close_all(connectors):
+        for connector in connectors:
+            try:
+                connector.close()
+            except Exception:
+                pass
+
+    @staticmethod
+    def _is_alive(connector):
+        try:
+            return connector.is_connected()
+        except Exception:
+            return False
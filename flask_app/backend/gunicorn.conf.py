@@ -0,0 +1,41 @@
+"""
+This file contains the Gunicorn settings for serving wsgi:app in production.
+
+Settings are read from the environment:
+- PORT: The port to listen on (default 5000)
+- WEB_WORKERS: The number of worker processes (default two per CPU plus one)
+- WEB_THREADS: The number of request threads per worker (default 4)
+- WEB_TIMEOUT: Seconds a request may take before its worker is restarted
+  (default 30)
+- WEB_GRACEFUL_TIMEOUT: Seconds workers get to finish their requests when
+  stopping or reloading (default 30)
+- WEB_MAX_REQUESTS: Requests a worker serves before it is replaced, 0 never
+  (default 0)
+
+The application is loaded once in the master process before the workers are
+forked, so the shared library version counters are created a single time and
+seen by every worker.  Each worker then builds its own database connection
+pool and restarts the background log writer, since threads do not survive
+the fork.  Sending the master SIGHUP replaces the workers gracefully; code changes
+need a full restart because the application is preloaded.
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('WEB_THREADS', 4))
+timeout = int(os.environ.get('WEB_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30))
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+preload_app = True
+
+def post_fork(server, worker):
+    """Give each worker its own database connection pool and log writer."""
+    import logging_setup
+    import wsgi
+    logging_setup.configure_logging()
+    wsgi.my_dal.reset_after_fork()
@@ -0,0 +1,77 @@
+"""
+This file contains the per-user library version counters used by the
+meal planning back-end to answer conditional GET requests.
+
+It includes:
+- Library Versions Class
+
+Every write a user makes bumps their version, and every read route tags its
+response with an ETag derived from the version, so a client repeating a read
+after nothing changed gets an empty 304 without the database being touched.
+
+The counters sit in shared memory created before any worker is forked, so a
+write handled by one worker process changes the tags served by all of them.
+Users are hashed onto a fixed number of slots; two users sharing a slot only
+cost each other an occasional full response, never a stale one.
+"""
+
+import hashlib
+import multiprocessing
+import os
+
+class LibraryVersions:
+    """
+    A process and thread safe map of user ids to library version numbers.
+
+    Instantiation parameters:
+    - slots: The number of shared counters users are hashed onto
+
+    Methods:
+    - get_version: Returns the current version of a user's library
+    - bump: Marks a user's library as changed
+    - etag: Returns the strong ETag for the current version of a library
+    """
+    def __init__(self, slots=4096):
+        self._counters = multiprocessing.RawArray('Q', slots)
+        self._lock = multiprocessing.Lock()
+        # Keeps tags from before a restart from matching new ones
+        self._epoch = os.urandom(8).hex()
+
+    def get_version(self, user_id):
+        """
+        Returns the current version of a user's library.
+
+        Parameters:
+        - user_id (int): The user to look up.
+
+        Returns:
+        - int: The number of writes seen for the user's slot.
+        """
+        return self._counters[self._slot(user_id)]
+
+    def bump(self, user_id):
+        """
+        Marks a user's library as changed.
+
+        Parameters:
+        - user_id (int): The user who wrote to their library.
+        """
+        slot = self._slot(user_id)
+        with self._lock:
+            self._counters[slot] += 1
+
+    def etag(self, user_id):
+        """
+        Returns the strong ETag for the current version of a user's library.
+
+        Parameters:
+        - user_id (int): The user the response belongs to.
+
+        Returns:
+        - str: An opaque tag, unquoted, as expected by Werkzeug.
+        """
+        token = f"{self._epoch}:{user_id}:{self.get_version(user_id)}"
+        return hashlib.sha1(token.encode()).hexdigest()[:20]
+
+    def _slot(self, user_id):
+        return (user_id or 0) % len(self._counters)
@@ -0,0 +1,137 @@
+"""
+This file contains the logging configuration of the meal planning back-end.
+
+It includes:
+- A request id context shared by every log record of a request
+- A JSON formatter producing one structured line per record
+- configure_logging, which routes the application's loggers through a queue
+
+Application code logs through loggers under the 'meal_planning' namespace
+('meal_planning.dal', 'meal_planning.http', ...).  Records below the
+configured level are dropped before any message formatting happens.  Records
+that pass are put on an in-memory queue and written to stdout by a background
+thread, so request threads never wait on the stdout lock.
+
+Levels are read from the environment:
+- LOG_LEVEL: The level of the whole namespace (default INFO)
+- LOG_LEVELS: Comma separated overrides per logger, such as
+  'meal_planning.dal=DEBUG,meal_planning.http=WARNING'
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+
+ROOT_LOGGER_NAME = 'meal_planning'
+
+request_id_var = contextvars.ContextVar('request_id', default=None)
+
+_listener = None
+
+class RequestIdFilter(logging.Filter):
+    """Stamps each record with the id of the request that produced it."""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as a single line JSON object."""
+
+    # Attributes every LogRecord has; anything else was passed as extra
+    _standard_attributes = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'request_id'}
+
+    def format(self, record):
+        entry = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if getattr(record, 'request_id', None):
+            entry['request_id'] = record.request_id
+        for key, value in vars(record).items():
+            if key not in self._standard_attributes:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+def parse_levels(default_level, overrides):
+    """
+    Parses the logging levels from their environment variable form.
+
+    Parameters:
+    - default_level (str): The level of the whole namespace, such as 'INFO'.
+    - overrides (str): Comma separated logger=LEVEL pairs, may be empty.
+
+    Returns:
+    - dict: Logger names mapped to numeric levels.
+
+    Raises:
+    - ValueError: If a level name or pair is not recognised.
+    """
+    levels = {ROOT_LOGGER_NAME: _level_number(default_level)}
+    for pair in filter(None, (part.strip() for part in overrides.split(','))):
+        name, separator, level = pair.partition('=')
+        if not separator or not name.strip():
+            raise ValueError(f"Invalid logger level '{pair}'")
+        levels[name.strip()] = _level_number(level)
+    return levels
+
+def _level_number(level):
+    number = logging.getLevelName(level.strip().upper())
+    if not isinstance(number, int):
+        raise ValueError(f"Unknown logging level '{level}'")
+    return number
+
+def configure_logging(stream=None):
+    """
+    Routes the 'meal_planning' loggers through a queue to a background writer.
+
+    Safe to call more than once: each call replaces the previous queue and
+    writer thread.  A worker process forked from a configured parent must call
+    it again, since threads do not survive a fork.
+
+    Parameters:
+    - stream (file, optional): Where records are written. Defaults to stdout.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    levels = parse_levels(os.environ.get('LOG_LEVEL', 'INFO'),
+                          os.environ.get('LOG_LEVELS', ''))
+    for name, level in levels.items():
+        logging.getLogger(name).setLevel(level)
+
+    record_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(record_queue)
+    queue_handler.addFilter(RequestIdFilter())
+    stream_handler = logging.StreamHandler(stream or sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+
+    root = logging.getLogger(ROOT_LOGGER_NAME)
+    for handler in list(root.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.propagate = False
+
+    _listener = logging.handlers.QueueListener(record_queue, stream_handler)
+    _listener.start()
+
+def stop_logging():
+    """Writes out every queued record and stops the background writer."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+atexit.register(stop_logging)
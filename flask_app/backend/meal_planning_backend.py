@@ -14,11 +14,35 @@ The file is designed to by run through the frontend that imports it.
 import mysql.connector
 import sys
 import os
+import json
+import base64
+import binascii
+import datetime
+import inspect
+import itertools
+import time
+import uuid
+import logging
+import re
+import threading
+from contextlib import contextmanager
 from mysql.connector import errorcode
-from flask import Flask, request, jsonify, make_response, session
+from connection_pool import ConnectionPool
+from read_cache import ReadCache, cached_read, invalidates
+from search_index import KINDS, SearchIndex, indexes, tokenize
+from pantry_index import PantryIndex
+from library_versions import LibraryVersions
+from call_tracer import CallTracer
+from batch import BatchConnection
+import metrics
+from logging_setup import configure_logging, request_id_var
+from flask import Flask, Response, request, jsonify, make_response, session, g, stream_with_context
 from flask_cors import CORS, cross_origin
 from werkzeug.security import generate_password_hash, check_password_hash
 
+dal_logger = logging.getLogger('meal_planning.dal')
+http_logger = logging.getLogger('meal_planning.http')
+
 class DAL:
     """
     An object to interact with the MealPlanning SQL database providing 
@@ -27,23 +51,62 @@ class DAL:
     Instantiation parameters:
     - database user name
     - database password
+    - connection pool settings (DB_POOL_SIZE, DB_POOL_MAX_OVERFLOW, 
+      DB_POOL_IDLE_TIMEOUT, DB_POOL_PRE_PING, DB_POOL_TIMEOUT)
+    - read cache settings (DB_CACHE_SIZE, DB_CACHE_TTL)
+    - search index settings (SEARCH_INDEX_USERS)
+    - slow call settings (DB_SLOW_CALL_MS, DB_SLOW_CALL_LOG, 
+      DB_SLOW_CALL_LOG_BYTES, DB_SLOW_CALL_LOG_BACKUPS, DB_EXPLAIN_SLOW_CALLS)
+
+    Reads of a user's library are cached per user and dropped whenever 
+    that user writes.  Searches use a per-user index of the library's names 
+    that the writes keep up to date.
 
     Methods:
+    - create pool
+    - reset after fork
+    - connection
+    - batch
+    - call procedure
+    - get pool stats
+    - get cache stats
+    - get trace stats
+    - get search stats
+    - get search documents
+    - search
+    - autocomplete
+    - resolve recipe
     - get cookbook names
+    - get cookbook names page
+    - iter cookbook names
     - get cookbook info
+    - get cookbook detail
+    - cookbook exists
     - add cookbook
     - delete cookbook
     - update cookbook
     - get recipe names
+    - get recipe names page
+    - iter recipe names
     - get recipe info
+    - get recipes info
+    - recipe exists
     - get recipe ingredients
     - add recipe
+    - add recipe with ingredients
     - delete recipe
     - update recipe
     - add ingredient
+    - add ingredients bulk
     - delete ingredient
     - update ingredient
     - add ingredient recipe pairing
+    - get meal plan
+    - get shopping list
+    - get pantry index
+    - match pantry
+    - get recipes by ingredient
+    - set meal plan
     - add user
     - get user password
     - get user info
@@ -53,7 +116,279 @@ class DAL:
         self.dbpassword = os.environ.get('DB_PASSWORD')
         self.host = "127.0.0.1"
         self.database = "MealPlanning"
+        self.pool = self.create_pool()
+        self.cache = ReadCache(
+            max_entries=int(os.environ.get('DB_CACHE_SIZE', 10000)),
+            ttl=float(os.environ.get('DB_CACHE_TTL', 300)))
+        self.search_index = SearchIndex(
+            max_users=int(os.environ.get('SEARCH_INDEX_USERS', 1000)),
+            versions=self.cache.versions)
+        self.slow_call_log = os.environ.get('DB_SLOW_CALL_LOG')
+        self.tracer = CallTracer(
+            threshold=float(os.environ.get('DB_SLOW_CALL_MS', 200)) / 1000,
+            log_path=self.slow_call_log,
+            max_bytes=int(os.environ.get('DB_SLOW_CALL_LOG_BYTES', 10485760)),
+            backup_count=int(os.environ.get('DB_SLOW_CALL_LOG_BACKUPS', 5)),
+            explain=os.environ.get('DB_EXPLAIN_SLOW_CALLS', '0') == '1',
+            connection=lambda: self.pool.connection())
+        self._local = threading.local()
+
+    def create_pool(self):
+        """
+        Creates a connection pool configured from the environment.
+
+        Returns:
+        - ConnectionPool: An empty pool that opens connections on demand.
+        """
+        return ConnectionPool(
+            self.connect,
+            pool_size=int(os.environ.get('DB_POOL_SIZE', 5)),
+            max_overflow=int(os.environ.get('DB_POOL_MAX_OVERFLOW', 10)),
+            idle_timeout=float(os.environ.get('DB_POOL_IDLE_TIMEOUT', 300)),
+            pre_ping=os.environ.get('DB_POOL_PRE_PING', '1') != '0',
+            timeout=float(os.environ.get('DB_POOL_TIMEOUT', 30)))
+
+    def reset_after_fork(self):
+        """
+        Gives a freshly forked worker process its own connection pool, an 
+        empty read cache and search index and its own slow call file, named 
+        after the process id, since rotating one file from several processes 
+        loses entries.
+
+        Connections inherited from the parent are dropped without being 
+        closed, since closing them would also end the parent's sessions.  The 
+        library versions the cache checks against stay shared with the other 
+        workers.
+        """
+        self.pool = self.create_pool()
+        self.cache.clear()
+        self.search_index.clear()
+        if self.slow_call_log:
+            self.tracer.open_log(f"{self.slow_call_log}.{os.getpid()}")
+
+    def connect(self):
+        """
+        Opens a new connection to the database.  Only the connection pool 
+        should call this; DAL methods borrow from the pool instead.
+
+        Returns:
+        - MySQLConnection: A new open connection.
+        """
+        return mysql.connector.connect(user=self.dbuser_name, 
+                                       password=self.dbpassword,
+                                       host=self.host,
+                                       database=self.database)
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrows a connection from the pool for the duration of a with block, 
+        or inside a batch, hands out the batch's connection.
+
+        Yields:
+        - connection: An open database connection.
+        """
+        batch = getattr(self._local, 'batch', None)
+        if batch is not None:
+            yield batch
+        else:
+            with self.pool.connection() as connector:
+                yield connector
+
+    @contextmanager
+    def batch(self, user_id, transactional=False):
+        """
+        Runs the DAL methods called on this thread inside a with block on one 
+        pooled connection, optionally in one transaction.
+
+        The writes of a batch bump the user's library version as they run, 
+        before a transactional batch commits, so another request may cache 
+        the rows from before the commit under the new version.  Once the 
+        batch is committed or rolled back the version is bumped again, 
+        dropping the user's cached reads and search index.  Reads made 
+        inside the batch are not cached at all.
+
+        Parameters:
+        - user_id (int): The user the batch's operations belong to.
+        - transactional (bool, optional): Whether the operations are 
+          committed together, and only if all of them succeed. Defaults to 
+          False, committing each operation as it succeeds.
+
+        Yields:
+        - BatchConnection: The batch, whose run method runs each operation.
+        """
+        with self.pool.connection() as connector:
+            batch = BatchConnection(connector, transactional)
+            self._local.batch = batch
+            try:
+                yield batch
+                batch.finish()
+            finally:
+                self._local.batch = None
+                self.cache.invalidate_user(user_id)
+
+    def call_procedure(self, cursor, procedure, args):
+        """
+        Calls a stored procedure and fetches its result sets, recording how 
+        long it took and whether it failed under the procedure's name and 
+        passing the call to the tracer.
+
+        Parameters:
+        - cursor (MySQLCursor): The cursor to call the procedure on.
+        - procedure (str): The name of the stored procedure.
+        - args (list): Its parameters.
+
+        Returns:
+        - list: The rows of each result set, in order.
+
+        Raises:
+        - mysql.connector.Error: If the call fails.
+        """
+        start = time.perf_counter()
+        result_sets = None
+        error = None
+        try:
+            cursor.callproc(procedure, args)
+            result_sets = [result.fetchall() for result in cursor.stored_results()]
+            return result_sets
+        except mysql.connector.Error as err:
+            error = err
+            metrics.DB_PROCEDURE_ERRORS.labels(procedure).inc()
+            # Read by the indexes decorator, since some writes swallow errors
+            self._local.error = err
+            batch = getattr(self._local, 'batch', None)
+            if batch is not None:
+                batch.record_error(err)
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            metrics.DB_PROCEDURE_SECONDS.labels(procedure).observe(seconds)
+            self.tracer.record(procedure, args, result_sets, seconds, error)
+
+    def get_pool_stats(self):
+        """
+        Retrieves the state of the connection pool for monitoring.
+
+        Returns:
+        - dict: Pool configuration, occupancy and lifetime counters.
+        """
+        return self.pool.get_stats()
+
+    def get_cache_stats(self):
+        """
+        Retrieves the hit, miss and eviction counters of the read cache.
+
+        Returns:
+        - dict: Cache configuration, size and lifetime counters.
+        """
+        return self.cache.get_stats()
+
+    def get_trace_stats(self):
+        """
+        Retrieves the number of stored procedure calls traced and how many 
+        of them were slow.
+
+        Returns:
+        - dict: The slow call threshold and the call counters.
+        """
+        return self.tracer.get_stats()
+
+    def get_search_stats(self):
+        """
+        Retrieves the number of search indexes held and how often they were 
+        searched, built and updated.
+
+        Returns:
+        - dict: Index configuration, size and lifetime counters.
+        """
+        return self.search_index.get_stats()
+
+    def get_search_documents(self, user_id):
+        """
+        Retrieves the names of all the cookbooks, recipes and ingredients of 
+        a user in one call, to build their search index from.
+
+        Returns:
+        - dict: The list of names of each kind, keyed 'cookbook', 'recipe' 
+          and 'ingredient'.
+        - str: An error message if an error occurs.
+        """
+        try:
+            with self.connection() as connector:
+                cursor = connector.cursor()
+                cookbook_rows, recipe_rows, ingredient_rows = self.call_procedure(cursor, "GetSearchDocuments", [user_id])
+                cursor.close()
+        except mysql.connector.Error as err:
+            if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
+                return "Something is wrong with your user name or password"
+            elif err.errno == errorcode.ER_BAD_DB_ERROR:
+                return "Database does not exist"
+            else:
+                return err
+        
+        else:
+            return { 'cookbook': [item[0] for item in cookbook_rows], 
+                     'recipe': [item[0] for item in recipe_rows], 
+                     'ingredient': [item[0] for item in ingredient_rows] }
+
+    def search(self, query, user_id, limit=20, kinds=None):
+        """
+        Searches the names of a user's cookbooks, recipes and ingredients for 
+        the words of a query, in the user's in-memory search index.
+    
+        Parameters:
+        - query (str): The words to look for; the last word of a name may be 
+          given partly.
+        - limit (int, optional): The most results returned. Defaults to 20.
+        - kinds (tuple, optional): The kinds of names searched, of 
+          'recipe', 'cookbook' and 'ingredient'. Defaults to all of them.
+    
+        Returns:
+        - list: A (kind, name) tuple per match, best first.
+        - str: An error message if the index could not be built.
+        """
+        return self.search_index.search(user_id, query, lambda: self.get_search_documents(user_id), 
+                                        limit, kinds or KINDS)
+
+    def autocomplete(self, prefix, user_id, limit=10, kinds=None):
+        """
+        Completes the start of a cookbook, recipe or ingredient name from the 
+        user's in-memory search index, without querying the database once 
+        the index is built.
+    
+        Parameters:
+        - prefix (str): The start of the name, as typed so far.
+        - limit (int, optional): The most completions returned. Defaults to 10.
+        - kinds (tuple, optional): The kinds of names completed, of 'recipe', 
+          'cookbook' and 'ingredient'. Defaults to all of them.
+    
+        Returns:
+        - list: A (kind, name) tuple per completion, in alphabetical order.
+        - str: An error message if the index could not be built.
+        """
+        return self.search_index.complete(user_id, prefix, lambda: self.get_search_documents(user_id), 
+                                          limit, kinds or KINDS)
 
+    def resolve_recipe(self, recipe_name, user_id, max_distance=2, limit=5):
+        """
+        Finds the user's recipes whose names are closest to a possibly 
+        mistyped name, by edit distance and ignoring case, from the user's 
+        in-memory search index.
+    
+        Parameters:
+        - recipe_name (str): The recipe name as typed.
+        - max_distance (int, optional): The most characters inserted, deleted 
+          or substituted to reach a recipe name. Defaults to 2.
+        - limit (int, optional): The most recipes returned. Defaults to 5.
+    
+        Returns:
+        - list: A (recipe name, distance) tuple per match, closest first.
+        - str: An error message if the index could not be built.
+        """
+        return self.search_index.resolve(user_id, recipe_name, lambda: self.get_search_documents(user_id), 
+                                         max_distance, limit, 'recipe')
+
+    @cached_read
     def get_cookbook_names(self, user_id):
         """
         Retrieves the names of all cookbooks from the database.
@@ -64,17 +399,12 @@ class DAL:
         """
         cookbook_names = []
         try:
-            connector = mysql.connector.connect(user=self.dbuser_name, 
-                                                password=self.dbpassword,
-                                                host=self.host,
-                                                database=self.database)
-            
-            cursor = connector.cursor()
-            cursor.callproc("GetAllCookbookNames", [user_id])
-            for x in cursor.stored_results():
-                for item in x.fetchall():
-                    cookbook_names.append(item[0])
-    
+            with self.connection() as connector:
+                cursor = connector.cursor()
+                for rows in self.call_procedure(cursor, "GetAllCookbookNames", [user_id]):
+                    for item in rows:
+                        cookbook_names.append(item[0])
+                cursor.close()
         except mysql.connector.Error as err:
             if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
                 return "Something is wrong with your user name or password"
@@ -84,9 +414,62 @@ class DAL:
                 return err
         
         else:
-            connector.close()
             return cookbook_names
     
+    @cached_read
+    def get_cookbook_names_page(self, user_id, after=None, limit=50):
+        """
+        Retrieves one page of cookbook names in name order using a keyset 
+        seek, so the cost of a page does not grow with its position.
+
+        Parameters:
+        - after (str, optional): The last cookbook name of the previous page.
+          Defaults to None for the first page.
+        - limit (int, optional): The most names to return. Defaults to 50.
+
+        Returns:
+        - tuple: A list of cookbook names and the name to pass as after to 
+          get the next page, or None if this is the last page.
+        - str: An error message if an error occurs.
+        """
+        try:
+            cookbook_page = self._fetch_names_page("GetCookbookNamesPage", [user_id, after], limit)
+        except mysql.connector.Error as err:
+            if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
+                return "Something is wrong with your user name or password"
+            elif err.errno == errorcode.ER_BAD_DB_ERROR:
+                return "Database does not exist"
+            else:
+                return err
+        
+        else:
+            return cookbook_page
+
+    def iter_cookbook_names(self, user_id, chunk_size=500):
+        """
+        Streams the names of all cookbooks in name order, one keyset page at 
+        a time, so memory use does not grow with the size of the library.  
+        The results are not cached and no connection is held between chunks.
+
+        Parameters:
+        - chunk_size (int, optional): The number of names read per database 
+          call. Defaults to 500.
+
+        Yields:
+        - list: The cookbook names of the next chunk.
+
+        Raises:
+        - mysql.connector.Error: If a chunk cannot be read.
+        """
+        after = None
+        while True:
+            cookbook_names, after = self._fetch_names_page("GetCookbookNamesPage", [user_id, after], chunk_size)
+            if cookbook_names:
+                yield cookbook_names
+            if after is None:
+                return
+
+    @cached_read
     def get_cookbook_info(self, cookbook_name, user_id):
         """
         Retrieves information about a cookbook from the database.
@@ -102,16 +485,11 @@ class DAL:
         """
         try:
             cookbook_info = ()
-            connector = mysql.connector.connect(user=self.dbuser_name, 
-                                                password=self.dbpassword,
-                                                host=self.host,
-                                                database=self.database)
-            
-            cursor = connector.cursor()
-            cursor.callproc("GetCookbookInfo", [cookbook_name, user_id])
-            for x in cursor.stored_results():
-                cookbook_info = x.fetchone()
-    
+            with self.connection() as connector:
+                cursor = connector.cursor()
+                for rows in self.call_procedure(cursor, "GetCookbookInfo", [cookbook_name, user_id]):
+                    cookbook_info = rows[0] if rows else None
+                cursor.close()
         except mysql.connector.Error as err:
             if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
                 return "Something is wrong with your user name or password"
@@ -121,9 +499,76 @@ class DAL:
                 return err
         
         else:
-            connector.close()
             return cookbook_info
         
+    @cached_read
+    def get_cookbook_detail(self, cookbook_name, user_id):
+        """
+        Retrieves a cookbook and the names of its recipes in a single 
+        database round trip.
+
+        Parameters:
+        - cookbook_name (str): The name of the cookbook to retrieve.
+
+        Returns:
+        - tuple: The cookbook information, or None if the cookbook does not 
+          exist, and a list of the names of its recipes.
+        - str: An error message if an error occurs.
+        """
+        try:
+            cookbook_info = None
+            recipe_names = []
+            with self.connection() as connector:
+                cursor = connector.cursor()
+                result_sets = self.call_procedure(cursor, "GetCookbookDetail", [cookbook_name, user_id])
+                cookbook_info = result_sets[0][0] if result_sets[0] else None
+                for item in result_sets[1]:
+                    recipe_names.append(item[0])
+                cursor.close()
+        except mysql.connector.Error as err:
+            if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
+                return "Something is wrong with your user name or password"
+            elif err.errno == errorcode.ER_BAD_DB_ERROR:
+                return "Database does not exist"
+            else:
+                return err
+        
+        else:
+            return cookbook_info, recipe_names
+
+    @cached_read
+    def cookbook_exists(self, cookbook_name, user_id):
+        """
+        Checks whether a cookbook exists with a single lookup of the 
+        CookbookUserName unique key.
+
+        Parameters:
+        - cookbook_name (str): The name of the cookbook to look for.
+
+        Returns:
+        - bool: True if the cookbook exists, False otherwise.
+        - str: An error message if an error occurs.
+        """
+        try:
+            exists = False
+            with self.connection() as connector:
+                cursor = connector.cursor()
+                for rows in self.call_procedure(cursor, "CookbookExists", [cookbook_name, user_id]):
+                    exists = rows[0][0] == 1
+                cursor.close()
+        except mysql.connector.Error as err:
+            if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
+                return "Something is wrong with your user name or password"
+            elif err.errno == errorcode.ER_BAD_DB_ERROR:
+                return "Database does not exist"
+            else:
+                return err
+        
+        else:
+            return exists
+
+    @indexes(added={'cookbook': 'cookbook_name'})
+    @invalidates
     def add_cookbook(self, cookbook_name, is_book, user_id, website=None):
         """
         Adds a new cookbook to the database.
@@ -136,31 +581,25 @@ class DAL:
         - str: An error message if an error occurs.
         """
         try:
-            connector = mysql.connector.connect(user=self.dbuser_name, 
-                                                password=self.dbpassword,
-                                                host=self.host,
-                                                database=self.database)
-            cursor = connector.cursor()
-            cursor.callproc("AddCookbook", [cookbook_name, is_book, website, user_id])
+            with self.connection() as connector:
+                cursor = connector.cursor()
+                self.call_procedure(cursor, "AddCookbook", [cookbook_name, is_book, website, user_id])
+                cursor.close()
+                connector.commit()
         except mysql.connector.Error as err:
             if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
-                print("Something is wrong with your user name or password")
+                dal_logger.error("Something is wrong with your user name or password")
             elif err.errno == errorcode.ER_BAD_DB_ERROR:
-                print("Database does not exist")
+                dal_logger.error("Database does not exist")
             elif err.sqlstate == '45000':  # Custom SQLSTATE for cookbook already existing
-                print(f"Error: {err.msg}")
+                dal_logger.warning("Error: %s", err.msg)
             else:
-                print(err)
+                dal_logger.error("%s", err)
         else:
-            connector.commit()
-            print(f"Cookbook '{cookbook_name}' added successfully.")
-        finally:
-            if cursor:
-                cursor.close()
-            if connector and connector.is_connected():
-                connector.close()
-                print("MySQL connection is closed.")
+            dal_logger.debug("Cookbook '%s' added successfully.", cookbook_name)
         
+    @indexes(removed={'cookbook': 'cookbook_name'})
+    @invalidates
     def delete_cookbook(self, cookbook_name, user_id):
         """
         Deletes a cookbook from the database.
@@ -173,31 +612,25 @@ class DAL:
         - str: An error message if an error occurs.
         """
         try:
-            connector = mysql.connector.connect(user=self.dbuser_name, 
-                                                password=self.dbpassword,
-                                                host=self.host,
-                                                database=self.database)
-            cursor = connector.cursor()
-            cursor.callproc("DeleteCookbook", [cookbook_name, user_id])
+            with self.connection() as connector:
+                cursor = connector.cursor()
+                self.call_procedure(cursor, "DeleteCookbook", [cookbook_name, user_id])
+                cursor.close()
+                connector.commit()
         except mysql.connector.Error as err:
             if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
-                print("Something is wrong with your user name or password")
+                dal_logger.error("Something is wrong with your user name or password")
             elif err.errno == errorcode.ER_BAD_DB_ERROR:
-                print("Database does not exist")
+                dal_logger.error("Database does not exist")
             elif err.sqlstate == '45000':  # Custom SQLSTATE for cookbook not existing
-                print(f"Error: {err.msg}")
+                dal_logger.warning("Error: %s", err.msg)
             else:
-                print(err)
+                dal_logger.error("%s", err)
         else:
-            connector.commit()
-            print(f"Cookbook '{cookbook_name}' deleted successfully.")
-        finally:
-            if cursor:
-                cursor.close()
-            if connector and connector.is_connected():
-                connector.close()
-                print("MySQL connection is closed.")
+            dal_logger.debug("Cookbook '%s' deleted successfully.", cookbook_name)
         
+    @indexes(added={'cookbook': 'new_cookbook_name'}, removed={'cookbook': 'current_cookbook_name'})
+    @invalidates
     def update_cookbook(self, current_cookbook_name, new_cookbook_name, new_is_book, user_id, new_website=None):
         """
         Updates the name of a cookbook in the database.
@@ -213,33 +646,26 @@ class DAL:
         - str: An error message if an error occurs.
         """
         try:
-            connector = mysql.connector.connect(user=self.dbuser_name, 
-                                                password=self.dbpassword,
-                                                host=self.host,
-                                                database=self.database)
-            cursor = connector.cursor()
-            cursor.callproc("UpdateCookbook", [current_cookbook_name, 
-                                            new_cookbook_name, new_is_book, 
-                                            new_website, user_id])
+            with self.connection() as connector:
+                cursor = connector.cursor()
+                self.call_procedure(cursor, "UpdateCookbook", [current_cookbook_name, 
+                                                            new_cookbook_name, new_is_book, 
+                                                            new_website, user_id])
+                cursor.close()
+                connector.commit()
         except mysql.connector.Error as err:
             if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
-                print("Something is wrong with your user name or password")
+                dal_logger.error("Something is wrong with your user name or password")
             elif err.errno == errorcode.ER_BAD_DB_ERROR:
-                print("Database does not exist")
+                dal_logger.error("Database does not exist")
             elif err.sqlstate == '45000':  # Custom SQLSTATE for cookbook not existing
-                print(f"Error: {err.msg}")
+                dal_logger.warning("Error: %s", err.msg)
             else:
-                print(err)
+                dal_logger.error("%s", err)
         else:
-            connector.commit()
-            print(f"Cookbook '{new_cookbook_name}' updated successfully.")
-        finally:
-            if cursor:
-                cursor.close()
-            if connector and connector.is_connected():
-                connector.close()
-                print("MySQL connection is closed.")
+            dal_logger.debug("Cookbook '%s' updated successfully.", new_cookbook_name)
         
+    @cached_read
     def get_recipe_names(self, user_id, cookbook_name=""):
         """
         Retrieves the names of all recipes from a specified cookbook.
@@ -253,23 +679,17 @@ class DAL:
         """
         recipe_names = []
         try:
-            connector = mysql.connector.connect(user=self.dbuser_name, 
-                                                password=self.dbpassword,
-                                                host=self.host,
-                                                database=self.database)
-            
-            cursor = connector.cursor()
-            if cookbook_name == "":
-                cursor.callproc("GetAllRecipeNames", [user_id])
-                for x in cursor.stored_results():
-                    for item in x.fetchall():
-                        recipe_names.append(item[0])
-            else:
-                cursor.callproc("GetRecipesFromOneCookbook", [cookbook_name, user_id])
-                for x in cursor.stored_results():
-                    for item in x.fetchall():
-                        recipe_names.append(item[0])
-    
+            with self.connection() as connector:
+                cursor = connector.cursor()
+                if cookbook_name == "":
+                    for rows in self.call_procedure(cursor, "GetAllRecipeNames", [user_id]):
+                        for item in rows:
+                            recipe_names.append(item[0])
+                else:
+                    for rows in self.call_procedure(cursor, "GetRecipesFromOneCookbook", [cookbook_name, user_id]):
+                        for item in rows:
+                            recipe_names.append(item[0])
+                cursor.close()
         except mysql.connector.Error as err:
             if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
                 return "Something is wrong with your user name or password"
@@ -279,32 +699,189 @@ class DAL:
                 return err
         
         else:
-            connector.close()
             return recipe_names
     
+    @cached_read
+    def get_recipe_names_page(self, user_id, cookbook_name="", after=None, limit=50):
+        """
+        Retrieves one page of recipe names in name order using a keyset 
+        seek, so the cost of a page does not grow with its position.
+
+        Parameters:
+        - cookbook_name (str, optional): The cookbook to list recipes from.
+          Defaults to "" for all recipes.
+        - after (str, optional): The last recipe name of the previous page.
+          Defaults to None for the first page.
+        - limit (int, optional): The most names to return. Defaults to 50.
+
+        Returns:
+        - tuple: A list of recipe names and the name to pass as after to get 
+          the next page, or None if this is the last page.
+        - str: An error message if an error occurs.
+        """
+        try:
+            if cookbook_name == "":
+                recipe_page = self._fetch_names_page("GetRecipeNamesPage", [user_id, after], limit)
+            else:
+                recipe_page = self._fetch_names_page("GetRecipesFromOneCookbookPage", [cookbook_name, user_id, after], limit)
+        except mysql.connector.Error as err:
+            if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
+                return "Something is wrong with your user name or password"
+            elif err.errno == errorcode.ER_BAD_DB_ERROR:
+                return "Database does not exist"
+            else:
+                return err
+        
+        else:
+            return recipe_page
+
+    def iter_recipe_names(self, user_id, cookbook_name="", chunk_size=500):
+        """
+        Streams the names of all recipes, or of the recipes of one cookbook, 
+        in name order one keyset page at a time, so memory use does not grow 
+        with the size of the library.  The results are not cached and no 
+        connection is held between chunks.
+
+        Parameters:
+        - cookbook_name (str, optional): The cookbook to list recipes from.
+          Defaults to "" for all recipes.
+        - chunk_size (int, optional): The number of names read per database 
+          call. Defaults to 500.
+
+        Yields:
+        - list: The recipe names of the next chunk.
+
+        Raises:
+        - mysql.connector.Error: If a chunk cannot be read.
+        """
+        after = None
+        while True:
+            if cookbook_name == "":
+                recipe_names, after = self._fetch_names_page("GetRecipeNamesPage", [user_id, after], chunk_size)
+            else:
+                recipe_names, after = self._fetch_names_page("GetRecipesFromOneCookbookPage", [cookbook_name, user_id, after], chunk_size)
+            if recipe_names:
+                yield recipe_names
+            if after is None:
+                return
+
+    def _fetch_names_page(self, procedure, args, limit):
+        """
+        Calls a keyset page procedure whose last parameter is the row limit.
+
+        Parameters:
+        - procedure (str): The name of the stored procedure.
+        - args (list): Its parameters, ending with the last name of the 
+          previous page.
+        - limit (int): The most names to return.
+
+        Returns:
+        - tuple: The names of the page and the last of them if another page 
+          follows, otherwise None.
+
+        Raises:
+        - mysql.connector.Error: If there is an error accessing the database.
+        """
+        names = []
+        with self.connection() as connector:
+            cursor = connector.cursor()
+            # One extra row tells us whether another page follows
+            for rows in self.call_procedure(cursor, procedure, args + [limit + 1]):
+                for item in rows:
+                    names.append(item[0])
+            cursor.close()
+        if len(names) > limit:
+            return names[:limit], names[limit - 1]
+        return names, None
+
+    @cached_read
     def get_recipe_info(self, recipe_name, user_id):
         """
         Retrieves information about a specific recipe.
     
         Parameters:
-        - recipe_name (str): The name of the recipe for which to retrieve information.
-    
+        - recipe_name (str): The name of the recipe for which to retrieve information.
+    
+        Returns:
+        - tuple: A tuple containing recipe information if successful.
+        - str: An error message if an error occurs.
+        """
+        try:
+            recipe_info = ()
+            with self.connection() as connector:
+                cursor = connector.cursor()
+                for rows in self.call_procedure(cursor, "GetRecipeInfo", [recipe_name, user_id]):
+                    recipe_info = rows[0] if rows else None
+                cursor.close()
+        except mysql.connector.Error as err:
+            if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
+                return "Something is wrong with your user name or password"
+            elif err.errno == errorcode.ER_BAD_DB_ERROR:
+                return "Database does not exist"
+            else:
+                return err
+        
+        else:
+            return recipe_info
+        
+    @cached_read
+    def get_recipes_info(self, recipe_names, user_id):
+        """
+        Retrieves the information and ingredients of several recipes in a 
+        single database round trip.
+    
+        Parameters:
+        - recipe_names (tuple): The names of the recipes to retrieve, without 
+          repeats.  A tuple, since the read cache is keyed by it.
+    
+        Returns:
+        - list: A tuple per recipe found, in the order asked for, of the 
+          recipe information and a list of its ingredients.
+        - str: An error message if an error occurs.
+        """
+        try:
+            recipes = []
+            with self.connection() as connector:
+                cursor = connector.cursor()
+                info_rows, ingredient_rows = self.call_procedure(
+                    cursor, "GetRecipesInfo", [json.dumps(list(recipe_names)), user_id])
+                cursor.close()
+            ingredients = {}
+            for recipe_name, ingredient_name in ingredient_rows:
+                ingredients.setdefault(recipe_name, []).append(ingredient_name)
+            for recipe_info in info_rows:
+                recipes.append((recipe_info, ingredients.get(recipe_info[0], [])))
+        except mysql.connector.Error as err:
+            if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
+                return "Something is wrong with your user name or password"
+            elif err.errno == errorcode.ER_BAD_DB_ERROR:
+                return "Database does not exist"
+            else:
+                return err
+        
+        else:
+            return recipes
+
+    @cached_read
+    def recipe_exists(self, recipe_name, user_id):
+        """
+        Checks whether a recipe exists with a single lookup of the 
+        RecipeUserName unique key.
+
+        Parameters:
+        - recipe_name (str): The name of the recipe to look for.
+
         Returns:
-        - tuple: A tuple containing recipe information if successful.
+        - bool: True if the recipe exists, False otherwise.
         - str: An error message if an error occurs.
         """
         try:
-            recipe_info = ()
-            connector = mysql.connector.connect(user=self.dbuser_name, 
-                                                password=self.dbpassword,
-                                                host=self.host,
-                                                database=self.database)
-            
-            cursor = connector.cursor()
-            cursor.callproc("GetRecipeInfo", [recipe_name, user_id])
-            for x in cursor.stored_results():
-                recipe_info = x.fetchone()
-    
+            exists = False
+            with self.connection() as connector:
+                cursor = connector.cursor()
+                for rows in self.call_procedure(cursor, "RecipeExists", [recipe_name, user_id]):
+                    exists = rows[0][0] == 1
+                cursor.close()
         except mysql.connector.Error as err:
             if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
                 return "Something is wrong with your user name or password"
@@ -314,9 +891,9 @@ class DAL:
                 return err
         
         else:
-            connector.close()
-            return recipe_info
-        
+            return exists
+
+    @cached_read
     def get_recipe_ingredients(self, recipe_name, user_id):
         """
         Retrieves the ingredients of a specific recipe.
@@ -330,17 +907,12 @@ class DAL:
         """
         try:
             recipe_ingredients = []
-            connector = mysql.connector.connect(user=self.dbuser_name, 
-                                                password=self.dbpassword,
-                                                host=self.host,
-                                                database=self.database)
-            
-            cursor = connector.cursor()
-            cursor.callproc("GetMealIngredients", [recipe_name, user_id])
-            for x in cursor.stored_results():
-                for item in x.fetchall():
-                    recipe_ingredients.append(item[0])
-    
+            with self.connection() as connector:
+                cursor = connector.cursor()
+                for rows in self.call_procedure(cursor, "GetMealIngredients", [recipe_name, user_id]):
+                    for item in rows:
+                        recipe_ingredients.append(item[0])
+                cursor.close()
         except mysql.connector.Error as err:
             if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
                 return "Something is wrong with your user name or password"
@@ -350,9 +922,10 @@ class DAL:
                 return err
         
         else:
-            connector.close()
             return recipe_ingredients
         
+    @indexes(added={'recipe': 'recipe_name'})
+    @invalidates
     def add_recipe(self, recipe_name, cookbook_name, servings, is_online, user_id, webpage=None):
         """
         Adds a new recipe to the database.
@@ -365,31 +938,75 @@ class DAL:
         - str: An error message if an error occurs.
         """
         try:
-            connector = mysql.connector.connect(user=self.dbuser_name, 
-                                                password=self.dbpassword,
-                                                host=self.host,
-                                                database=self.database)
-            cursor = connector.cursor()
-            cursor.callproc("AddRecipe", [recipe_name, cookbook_name, servings, is_online, webpage, user_id])
+            with self.connection() as connector:
+                cursor = connector.cursor()
+                self.call_procedure(cursor, "AddRecipe", [recipe_name, cookbook_name, servings, is_online, webpage, user_id])
+                cursor.close()
+                connector.commit()
         except mysql.connector.Error as err:
             if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
-                print("Something is wrong with your user name or password")
+                dal_logger.error("Something is wrong with your user name or password")
             elif err.errno == errorcode.ER_BAD_DB_ERROR:
-                print("Database does not exist")
+                dal_logger.error("Database does not exist")
             elif err.sqlstate == '45000':  # Custom SQLSTATE for recipe already existing
-                print(f"Error: {err.msg}")
+                dal_logger.warning("Error: %s", err.msg)
             else:
-                print(err)
+                dal_logger.error("%s", err)
         else:
-            connector.commit()
-            print(f"Recipe '{recipe_name}' added successfully.")
-        finally:
-            if cursor:
-                cursor.close()
-            if connector and connector.is_connected():
-                connector.close()
-                print("MySQL connection is closed.")
+            dal_logger.debug("Recipe '%s' added successfully.", recipe_name)
+    
+    @indexes(added={'recipe': 'recipe_name', 'ingredient': 'ingredient_names'})
+    @invalidates
+    def add_recipe_with_ingredients(self, recipe_name, cookbook_name, servings, is_online, 
+                                    ingredient_names, user_id, webpage=None):
+        """
+        Adds a new recipe together with its ingredients in one transaction, 
+        creating the ingredients the user does not have yet and pairing 
+        every one of them with the recipe.  Nothing is written if any step 
+        fails.
+    
+        Parameters:
+        - recipe_name (str): The name of the recipe to be added.
+        - cookbook_name (str): The name of the cookbook the recipe is in.
+        - servings (int): The number of servings the recipe makes.
+        - is_online (bool): Whether the recipe is online.
+        - ingredient_names (list): The names of the recipe's ingredients; 
+          repeats are dropped, ignoring case.
+        - webpage (str, optional): The URL of the recipe. Defaults to None.
     
+        Returns:
+        - None: If the recipe and its ingredients are added.
+        - str: An error message starting with 'Error: ' if the database 
+          refuses the recipe, otherwise an error message if an error occurs.
+        """
+        unique_names = {}
+        for ingredient_name in ingredient_names:
+            unique_names.setdefault(ingredient_name.strip().casefold(), ingredient_name.strip())
+
+        try:
+            with self.connection() as connector:
+                cursor = connector.cursor()
+                self.call_procedure(cursor, "AddRecipeWithIngredients", 
+                                    [recipe_name, cookbook_name, servings, is_online, webpage, 
+                                     json.dumps(list(unique_names.values())), user_id])
+                cursor.close()
+                connector.commit()
+        except mysql.connector.Error as err:
+            if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
+                return "Something is wrong with your user name or password"
+            elif err.errno == errorcode.ER_BAD_DB_ERROR:
+                return "Database does not exist"
+            elif err.sqlstate == '45000':
+                return f"Error: {err.msg}"
+            else:
+                return str(err)
+        else:
+            dal_logger.debug("Recipe '%s' added with %d ingredients successfully.", 
+                             recipe_name, len(unique_names))
+            return None
+
+    @indexes(removed={'recipe': 'recipe_name'})
+    @invalidates
     def delete_recipe(self, recipe_name, user_id):
         """
         Deletes a recipe from the database.
@@ -402,31 +1019,25 @@ class DAL:
         - str: An error message if an error occurs.
         """
         try:
-            connector = mysql.connector.connect(user=self.dbuser_name, 
-                                                password=self.dbpassword,
-                                                host=self.host,
-                                                database=self.database)
-            cursor = connector.cursor()
-            cursor.callproc("DeleteRecipe", [recipe_name, user_id])
+            with self.connection() as connector:
+                cursor = connector.cursor()
+                self.call_procedure(cursor, "DeleteRecipe", [recipe_name, user_id])
+                cursor.close()
+                connector.commit()
         except mysql.connector.Error as err:
             if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
-                print("Something is wrong with your user name or password")
+                dal_logger.error("Something is wrong with your user name or password")
             elif err.errno == errorcode.ER_BAD_DB_ERROR:
-                print("Database does not exist")
+                dal_logger.error("Database does not exist")
             elif err.sqlstate == '45000':  # Custom SQLSTATE for recipe not existing
-                print(f"Error: {err.msg}")
+                dal_logger.warning("Error: %s", err.msg)
             else:
-                print(err)
+                dal_logger.error("%s", err)
         else:
-            connector.commit()
-            print(f"Recipe '{recipe_name}' deleted successfully.")
-        finally:
-            if cursor:
-                cursor.close()
-            if connector and connector.is_connected():
-                connector.close()
-                print("MySQL connection is closed.")
+            dal_logger.debug("Recipe '%s' deleted successfully.", recipe_name)
     
+    @indexes(added={'recipe': 'new_recipe_name'}, removed={'recipe': 'current_recipe_name'})
+    @invalidates
     def update_recipe(self, current_recipe_name, new_recipe_name, new_cookbook_name, new_servings, user_id):
         """
         Updates the name of a recipe in the database.
@@ -442,33 +1053,27 @@ class DAL:
         - str: An error message if an error occurs.
         """
         try:
-            connector = mysql.connector.connect(user=self.dbuser_name, 
-                                                password=self.dbpassword,
-                                                host=self.host,
-                                                database=self.database)
-            cursor = connector.cursor()
-            cursor.callproc("UpdateRecipe", [current_recipe_name, 
-                                             new_recipe_name, 
-                                             new_cookbook_name, new_servings, user_id])
+            with self.connection() as connector:
+                cursor = connector.cursor()
+                self.call_procedure(cursor, "UpdateRecipe", [current_recipe_name, 
+                                                             new_recipe_name, 
+                                                             new_cookbook_name, new_servings, user_id])
+                cursor.close()
+                connector.commit()
         except mysql.connector.Error as err:
             if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
-                print("Something is wrong with your user name or password")
+                dal_logger.error("Something is wrong with your user name or password")
             elif err.errno == errorcode.ER_BAD_DB_ERROR:
-                print("Database does not exist")
+                dal_logger.error("Database does not exist")
             elif err.sqlstate == '45000':  # Custom SQLSTATE for recipe not existing
-                print(f"Error: {err.msg}")
+                dal_logger.warning("Error: %s", err.msg)
             else:
-                print(err)
+                dal_logger.error("%s", err)
         else:
-            connector.commit()
-            print(f"Recipe '{new_recipe_name}' updated successfully.")
-        finally:
-            if cursor:
-                cursor.close()
-            if connector and connector.is_connected():
-                connector.close()
-                print("MySQL connection is closed.")
+            dal_logger.debug("Recipe '%s' updated successfully.", new_recipe_name)
         
+    @indexes(added={'ingredient': 'ingredient_name'})
+    @invalidates
     def add_ingredient(self, ingredient_name, user_id):
         """
         Adds a new ingredient to the database.
@@ -482,31 +1087,101 @@ class DAL:
         """
 
         try:
-            connector = mysql.connector.connect(user=self.dbuser_name, 
-                                                password=self.dbpassword,
-                                                host=self.host,
-                                                database=self.database)
-            cursor = connector.cursor()
-            cursor.callproc("AddIngredient", [ingredient_name, user_id])
+            with self.connection() as connector:
+                cursor = connector.cursor()
+                self.call_procedure(cursor, "AddIngredient", [ingredient_name, user_id])
+                cursor.close()
+                connector.commit()
         except mysql.connector.Error as err:
             if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
-                print("Something is wrong with your user name or password")
+                dal_logger.error("Something is wrong with your user name or password")
             elif err.errno == errorcode.ER_BAD_DB_ERROR:
-                print("Database does not exist")
+                dal_logger.error("Database does not exist")
             elif err.sqlstate == '45000':  # Custom SQLSTATE for ingredient already existing
-                print(f"Error: {err.msg}")
+                dal_logger.warning("Error: %s", err.msg)
             else:
-                print(err)
+                dal_logger.error("%s", err)
         else:
-            connector.commit()
-            print(f"Ingredient '{ingredient_name}' added successfully.")
-        finally:
-            if cursor:
-                cursor.close()
-            if connector and connector.is_connected():
-                connector.close()
-                print("MySQL connection is closed.")
+            dal_logger.debug("Ingredient '%s' added successfully.", ingredient_name)
+        
+    @indexes(added={'ingredient': lambda arguments, results: [
+        result['name'] for result in results if result['status'] == 'added']})
+    @invalidates
+    def add_ingredients_bulk(self, ingredient_names, user_id):
+        """
+        Adds many ingredients to the database in one transaction.
+
+        The names are stripped and deduplicated ignoring case, and the rest 
+        are inserted by a single AddIngredients call.  The database also 
+        treats accented letters as equal to unaccented ones, so each name's 
+        status comes from the rows the procedure reports inserting.  Names 
+        past the user's 500 ingredient slots are left out.
+    
+        Parameters:
+        - ingredient_names (list): The names of the ingredients to be added.
+    
+        Returns:
+        - list: One dictionary per given name, in order, with keys 'name' and 
+          'status'.  The status is 'added', 'exists', 'duplicate' for a 
+          repeat of an earlier name in the list, 'invalid' for an empty name 
+          or one over 100 characters, or 'quota_exceeded'.
+        - str: An error message if an error occurs.
+        """
+        # Each name's status, or the name when it is sent to the database
+        checked = []
+        unique_names = {}
+        for ingredient_name in ingredient_names:
+            name = ingredient_name.strip() if isinstance(ingredient_name, str) else ''
+            key = name.casefold()
+            if not name or len(name) > 100:
+                checked.append(('invalid', None))
+            elif key in unique_names:
+                checked.append(('duplicate', None))
+            else:
+                unique_names[key] = name
+                checked.append((None, name))
+
+        existing, added, present = set(), set(), set()
+        if unique_names:
+            try:
+                with self.connection() as connector:
+                    cursor = connector.cursor()
+                    existing_rows, present_rows = self.call_procedure(
+                        cursor, "AddIngredients", [json.dumps(list(unique_names.values())), user_id])
+                    cursor.close()
+                    connector.commit()
+            except mysql.connector.Error as err:
+                if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
+                    return "Something is wrong with your user name or password"
+                elif err.errno == errorcode.ER_BAD_DB_ERROR:
+                    return "Database does not exist"
+                elif err.sqlstate == '45000':
+                    return err.msg
+                else:
+                    return err
+            existing = {item[0] for item in existing_rows}
+            added = {item[0] for item in present_rows if item[1]}
+            present = {item[0] for item in present_rows}
+
+        results = []
+        for ingredient_name, (status, name) in zip(ingredient_names, checked):
+            if status is None:
+                if name in existing:
+                    status = 'exists'
+                elif name in added:
+                    status = 'added'
+                elif name in present:
+                    # Not inserted, but equal to a name inserted before it
+                    status = 'duplicate'
+                else:
+                    status = 'quota_exceeded'
+            results.append({ 'name': ingredient_name, 'status': status })
+        dal_logger.debug("Added %d of %d ingredients.", 
+                         sum(result['status'] == 'added' for result in results), len(results))
+        return results
         
+    @indexes(removed={'ingredient': 'ingredient_name'})
+    @invalidates
     def delete_ingredient(self, ingredient_name, user_id):
         """
         Deletes an ingredient from the database.
@@ -519,31 +1194,25 @@ class DAL:
         - str: An error message if an error occurs.
         """
         try:
-            connector = mysql.connector.connect(user=self.dbuser_name, 
-                                                password=self.dbpassword,
-                                                host=self.host,
-                                                database=self.database)
-            cursor = connector.cursor()
-            cursor.callproc("DeleteIngredient", [ingredient_name, user_id])
+            with self.connection() as connector:
+                cursor = connector.cursor()
+                self.call_procedure(cursor, "DeleteIngredient", [ingredient_name, user_id])
+                cursor.close()
+                connector.commit()
         except mysql.connector.Error as err:
             if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
-                print("Something is wrong with your user name or password")
+                dal_logger.error("Something is wrong with your user name or password")
             elif err.errno == errorcode.ER_BAD_DB_ERROR:
-                print("Database does not exist")
+                dal_logger.error("Database does not exist")
             elif err.sqlstate == '45000':  # Custom SQLSTATE for ingredient not existing
-                print(f"Error: {err.msg}")
+                dal_logger.warning("Error: %s", err.msg)
             else:
-                print(err)
+                dal_logger.error("%s", err)
         else:
-            connector.commit()
-            print(f"Ingredient '{ingredient_name}' deleted successfully.")
-        finally:
-            if cursor:
-                cursor.close()
-            if connector and connector.is_connected():
-                connector.close()
-                print("MySQL connection is closed.")
+            dal_logger.debug("Ingredient '%s' deleted successfully.", ingredient_name)
         
+    @indexes(added={'ingredient': 'new_ingredient_name'}, removed={'ingredient': 'current_ingredient_name'})
+    @invalidates
     def update_ingredient(self, current_ingredient_name, new_ingredient_name, user_id):
         """
         Updates the name of an ingredient in the database.
@@ -557,32 +1226,26 @@ class DAL:
         - Prints an error message to the console if an error occurs.
         """
         try:
-            connector = mysql.connector.connect(user=self.dbuser_name, 
-                                                password=self.dbpassword,
-                                                host=self.host,
-                                                database=self.database)
-            cursor = connector.cursor()
-            cursor.callproc("UpdateIngredient", [current_ingredient_name, 
-                                                 new_ingredient_name, user_id])
+            with self.connection() as connector:
+                cursor = connector.cursor()
+                self.call_procedure(cursor, "UpdateIngredient", [current_ingredient_name, 
+                                                                 new_ingredient_name, user_id])
+                cursor.close()
+                connector.commit()
         except mysql.connector.Error as err:
             if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
-                print("Something is wrong with your user name or password")
+                dal_logger.error("Something is wrong with your user name or password")
             elif err.errno == errorcode.ER_BAD_DB_ERROR:
-                print("Database does not exist")
+                dal_logger.error("Database does not exist")
             elif err.sqlstate == '45000':  # Custom SQLSTATE for ingredient not existing
-                print(f"Error: {err.msg}")
+                dal_logger.warning("Error: %s", err.msg)
             else:
-                print(err)
+                dal_logger.error("%s", err)
         else:
-            connector.commit()
-            print(f"Ingredient '{new_ingredient_name}' updated successfully.")
-        finally:
-            if cursor:
-                cursor.close()
-            if connector and connector.is_connected():
-                connector.close()
-                print("MySQL connection is closed.")
+            dal_logger.debug("Ingredient '%s' updated successfully.", new_ingredient_name)
 
+    @indexes()
+    @invalidates
     def add_ingredient_recipe_pairing(self, ingredient_name, recipe_name, user_id):
         """
         Adds a new ingredient-recipe pairing to the database.
@@ -596,31 +1259,199 @@ class DAL:
         - str: An error message if an error occurs.
         """
         try:
-            connector = mysql.connector.connect(user=self.dbuser_name, 
-                                                password=self.dbpassword,
-                                                host=self.host,
-                                                database=self.database)
-            cursor = connector.cursor()
-            cursor.callproc("AddIngredientRecipePairing", [ingredient_name, 
-                                                           recipe_name, user_id])
+            with self.connection() as connector:
+                cursor = connector.cursor()
+                self.call_procedure(cursor, "AddIngredientRecipePairing", [ingredient_name, 
+                                                                           recipe_name, user_id])
+                cursor.close()
+                connector.commit()
         except mysql.connector.Error as err:
             if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
-                print("Something is wrong with your user name or password")
+                dal_logger.error("Something is wrong with your user name or password")
             elif err.errno == errorcode.ER_BAD_DB_ERROR:
-                print("Database does not exist")
+                dal_logger.error("Database does not exist")
             elif err.sqlstate == '45000':
-                print(f"Error: {err.msg}")
+                dal_logger.warning("Error: %s", err.msg)
             else:
-                print(err)
+                dal_logger.error("%s", err)
         else:
-            connector.commit()
-            print(f"Ingredient '{ingredient_name}' paired with recipe '{recipe_name}' successfully.")
-        finally:
-            if cursor:
+            dal_logger.debug("Ingredient '%s' paired with recipe '%s' successfully.", ingredient_name, recipe_name)
+
+    @cached_read
+    def get_meal_plan(self, user_id, start_date, end_date):
+        """
+        Retrieves the meals planned from one day to another with the 
+        information of their recipes, in one range read.
+    
+        Parameters:
+        - start_date (str): The first day, as YYYY-MM-DD.
+        - end_date (str): The last day, as YYYY-MM-DD.
+    
+        Returns:
+        - list: A tuple per planned meal, ordered by day and slot, of the 
+          day, the slot, and the recipe's name, cookbook name, servings, 
+          online flag and webpage.
+        - str: An error message if an error occurs.
+        """
+        try:
+            meals = []
+            with self.connection() as connector:
+                cursor = connector.cursor()
+                for rows in self.call_procedure(cursor, "GetMealPlan", [user_id, start_date, end_date]):
+                    for item in rows:
+                        meals.append(item)
+                cursor.close()
+        except mysql.connector.Error as err:
+            if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
+                return "Something is wrong with your user name or password"
+            elif err.errno == errorcode.ER_BAD_DB_ERROR:
+                return "Database does not exist"
+            else:
+                return err
+        
+        else:
+            return meals
+
+    @cached_read
+    def get_shopping_list(self, user_id, start_date, end_date):
+        """
+        Retrieves the ingredients of the meals planned from one day to 
+        another, each once with the number of planned meals that need it.
+    
+        Parameters:
+        - start_date (str): The first day, as YYYY-MM-DD.
+        - end_date (str): The last day, as YYYY-MM-DD.
+    
+        Returns:
+        - list: A tuple per ingredient, ordered by name, of its name and the 
+          number of planned meals that need it.
+        - str: An error message if an error occurs.
+        """
+        try:
+            ingredients = []
+            with self.connection() as connector:
+                cursor = connector.cursor()
+                for rows in self.call_procedure(cursor, "GetShoppingList", [user_id, start_date, end_date]):
+                    for item in rows:
+                        ingredients.append(item)
+                cursor.close()
+        except mysql.connector.Error as err:
+            if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
+                return "Something is wrong with your user name or password"
+            elif err.errno == errorcode.ER_BAD_DB_ERROR:
+                return "Database does not exist"
+            else:
+                return err
+        
+        else:
+            return ingredients
+
+    @cached_read
+    def get_pantry_index(self, user_id):
+        """
+        Retrieves all of a user's ingredients and the ingredients of each of
+        their recipes in one call, and encodes the recipes as bitsets over
+        the ingredients.  The index is cached like the other reads until
+        the user changes their library.
+
+        Returns:
+        - PantryIndex: The user's recipes as ingredient bitsets.
+        - str: An error message if an error occurs.
+        """
+        try:
+            with self.connection() as connector:
+                cursor = connector.cursor()
+                ingredient_rows, pairing_rows = self.call_procedure(cursor, "GetPantryDocuments", [user_id])
+                cursor.close()
+        except mysql.connector.Error as err:
+            if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
+                return "Something is wrong with your user name or password"
+            elif err.errno == errorcode.ER_BAD_DB_ERROR:
+                return "Database does not exist"
+            else:
+                return err
+
+        else:
+            return PantryIndex(ingredient_rows, pairing_rows)
+
+    def match_pantry(self, ingredient_names, user_id, limit=20, max_missing=None):
+        """
+        Finds the user's recipes that can be made, or nearly made, with the
+        ingredients on hand, from the user's pantry index.
+
+        Parameters:
+        - ingredient_names (list): The names of the ingredients on hand.
+        - limit (int, optional): The most recipes returned. Defaults to 20.
+        - max_missing (int, optional): Leave out the recipes missing more
+          ingredients than this. Defaults to None, for no bound.
+
+        Returns:
+        - tuple: A (recipe name, ingredients on hand, missing ingredient
+          names) tuple per recipe, the ones that can be made first and then
+          by fewest missing ingredients, and the names not in the library.
+        - str: An error message if the index could not be built.
+        """
+        pantry_index = self.get_pantry_index(user_id)
+        if isinstance(pantry_index, (str, Exception)):
+            return pantry_index
+        return pantry_index.match(ingredient_names, limit, max_missing)
+
+    def get_recipes_by_ingredient(self, ingredient_names, user_id, match_all=True):
+        """
+        Finds the user's recipes that use all, or any, of some ingredients 
+        from the per-ingredient recipe lists of the user's pantry index.
+    
+        Parameters:
+        - ingredient_names (list): The names of the ingredients.
+        - match_all (bool, optional): Whether a recipe has to use every 
+          ingredient rather than at least one. Defaults to True.
+    
+        Returns:
+        - tuple: The names of the recipes in alphabetical order, and the 
+          ingredient names not in the library.
+        - str: An error message if the index could not be built.
+        """
+        pantry_index = self.get_pantry_index(user_id)
+        if isinstance(pantry_index, (str, Exception)):
+            return pantry_index
+        return pantry_index.recipes_using(ingredient_names, match_all)
+
+    @indexes()
+    @invalidates
+    def set_meal_plan(self, user_id, start_date, end_date, meals):
+        """
+        Replaces the meals planned from one day to another in one 
+        transaction.  Nothing is written if a planned recipe does not exist.
+    
+        Parameters:
+        - start_date (str): The first day, as YYYY-MM-DD.
+        - end_date (str): The last day, as YYYY-MM-DD.
+        - meals (list): A dictionary per meal with keys 'date', 'slot' and 
+          'recipe_name'; days of the range left out are cleared.
+    
+        Returns:
+        - None: If the plan is saved.
+        - str: An error message starting with 'Error: ' if the database 
+          refuses the plan, otherwise an error message if an error occurs.
+        """
+        try:
+            with self.connection() as connector:
+                cursor = connector.cursor()
+                self.call_procedure(cursor, "SetMealPlan", [user_id, start_date, end_date, json.dumps(meals)])
                 cursor.close()
-            if connector and connector.is_connected():
-                connector.close()
-                print("MySQL connection is closed.")
+                connector.commit()
+        except mysql.connector.Error as err:
+            if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
+                return "Something is wrong with your user name or password"
+            elif err.errno == errorcode.ER_BAD_DB_ERROR:
+                return "Database does not exist"
+            elif err.sqlstate == '45000':
+                return f"Error: {err.msg}"
+            else:
+                return str(err)
+        else:
+            dal_logger.debug("Meal plan from %s to %s saved with %d meals.", start_date, end_date, len(meals))
+            return None
 
     def add_user(self, email, password, first_name, last_name):
         """
@@ -637,12 +1468,11 @@ class DAL:
         - str: An error message if an error occurs.
         """
         try:
-            connector = mysql.connector.connect(user=self.dbuser_name, 
-                                                password=self.dbpassword,
-                                                host=self.host,
-                                                database=self.database)
-            cursor = connector.cursor()
-            cursor.callproc("AddUser", [email, password, first_name, last_name])
+            with self.connection() as connector:
+                cursor = connector.cursor()
+                self.call_procedure(cursor, "AddUser", [email, password, first_name, last_name])
+                cursor.close()
+                connector.commit()
         except mysql.connector.Error as err:
             if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
                 return "Something is wrong with your user name or password"
@@ -653,14 +1483,7 @@ class DAL:
             else:
                 return err
         else:
-            connector.commit()
             return f"User '{email}' added successfully."
-        finally:
-            if cursor:
-                cursor.close()
-            if connector and connector.is_connected():
-                connector.close()
-                print("MySQL connection is closed.")
 
     def delete_user(self, email):
         """
@@ -674,12 +1497,11 @@ class DAL:
         - str: An error message if an error occurs.
         """
         try:
-            connector = mysql.connector.connect(user=self.dbuser_name, 
-                                                password=self.dbpassword,
-                                                host=self.host,
-                                                database=self.database)
-            cursor = connector.cursor()
-            cursor.callproc("DeleteUser", [email])
+            with self.connection() as connector:
+                cursor = connector.cursor()
+                self.call_procedure(cursor, "DeleteUser", [email])
+                cursor.close()
+                connector.commit()
         except mysql.connector.Error as err:
             if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
                 return "Something is wrong with your user name or password"
@@ -690,13 +1512,7 @@ class DAL:
             else:
                 return err
         else:
-            connector.commit()
             return f"User '{email}' deleted successfully."
-        finally:
-            if cursor:
-                cursor.close()
-            if connector and connector.is_connected():
-                connector.close()
 
     def get_user_password(self, email):
         """
@@ -711,16 +1527,11 @@ class DAL:
         """
         try:
             user_password = ""
-            connector = mysql.connector.connect(user=self.dbuser_name, 
-                                                password=self.dbpassword,
-                                                host=self.host,
-                                                database=self.database)
-            
-            cursor = connector.cursor()
-            cursor.callproc("GetUserPassword", [email])
-            for x in cursor.stored_results():
-                user_password = x.fetchone()[0]
-    
+            with self.connection() as connector:
+                cursor = connector.cursor()
+                for rows in self.call_procedure(cursor, "GetUserPassword", [email]):
+                    user_password = rows[0][0]
+                cursor.close()
         except mysql.connector.Error as err:
             if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
                 return "Something is wrong with your user name or password"
@@ -732,7 +1543,6 @@ class DAL:
                 return err
         
         else:
-            connector.close()
             return user_password
         
     def get_user_info(self, email):
@@ -748,16 +1558,11 @@ class DAL:
         """
         try:
             user_info = ()
-            connector = mysql.connector.connect(user=self.dbuser_name, 
-                                                password=self.dbpassword,
-                                                host=self.host,
-                                                database=self.database)
-            
-            cursor = connector.cursor()
-            cursor.callproc("GetUserInfo", [email])
-            for x in cursor.stored_results():
-                user_info = x.fetchone()
-    
+            with self.connection() as connector:
+                cursor = connector.cursor()
+                for rows in self.call_procedure(cursor, "GetUserInfo", [email]):
+                    user_info = rows[0] if rows else None
+                cursor.close()
         except mysql.connector.Error as err:
             if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
                 return "Something is wrong with your user name or password"
@@ -769,7 +1574,6 @@ class DAL:
                 return err
         
         else:
-            connector.close()
             return user_info
         
 class BusinessLogic:
@@ -782,25 +1586,86 @@ class BusinessLogic:
 
     Methods:
     - register_routes: Registers all the routes for the Flask application.
+        - check_library_version: Answers a conditional GET of a read route 
+          with 304 Not Modified when the user's library has not changed.
+        - tag_library_version: Adds the library ETag to read responses and 
+          bumps the user's library version after every write.
         - check_recipe: Checks if a given recipe name is valid.
+        - check_cookbook: Checks if a given cookbook name is valid.
         - get_cookbook_names: Returns a list of all cookbook names in the database.
         - get_cookbook_info: Checks if a given cookbook name is in the active list and returns its information.
         - get_recipe_names: Returns a list of all recipe names in a specific cookbook.
         - get_all_recipe_names: Returns a list of all recipe names in the database.
         - get_recipe_info: Checks if a given recipe name is in the active list and returns its information.
+        - get_recipes_info: Returns the information and ingredients of several recipes at once.
         - add_cookbook: Adds a new cookbook to the database.
         - delete_cookbook: Deletes a cookbook from the database.
         - add_recipe: Adds a new recipe to the database.
+        - add_recipe_with_ingredients: Adds a new recipe and its ingredients 
+          to the database in one transaction.
         - delete_recipe: Deletes a recipe from the database.
         - add_ingredient: Adds a new ingredient to the database.
+        - add_ingredients: Adds many ingredients to the database at once 
+          and reports the status of each.
         - delete_ingredient: Deletes an ingredient from the database.
         - add_ingredient_recipe_pairing: Adds a new ingredient-recipe pairing to the database.
+        - search: Returns the cookbooks, recipes and ingredients whose names 
+          match the words of a query.
+        - autocomplete: Returns the cookbook, recipe and ingredient names 
+          that start with a prefix.
+        - resolve_recipe: Returns the recipe names closest to a mistyped 
+          one.
+        - get_meal_plan: Returns the meals planned for a week.
+        - get_shopping_list: Returns the ingredients of the meals planned 
+          over a range of days.
+        - get_pantry_recipes: Returns the recipes that can be made, or 
+          nearly made, with the ingredients on hand.
+        - get_recipes_by_ingredient: Returns the recipes that use all, or 
+          any, of some ingredients.
+        - set_meal_plan: Replaces the meals planned for a week.
+        - run_batch: Runs a list of operations on one connection, 
+          optionally in one transaction.
         - add_user: Adds a new user to the database.
         - login_user: Logs a user into the application.
+        - get_pool_stats: Returns the state of the database connection pool.
+        - get_cache_stats: Returns the counters of the DAL read cache.
+        - get_search_stats: Returns the counters of the DAL search indexes.
+        - get_metrics: Returns request, stored procedure, pool and cache 
+          metrics in the Prometheus text format.
+        - assign_request_id / return_request_id / clear_request_id: Tag 
+          each request and the log records it produces with a request id.
+        - start_request_metrics / record_request_metrics / 
+          finish_request_metrics: Record per-route latency, status counts 
+          and in-flight requests.
+    - bind_batch_operation: Checks one operation of a batch and binds it 
+      to its DAL method.
+    - page_response: Builds the response for one page of a listing.
+    - stream_response: Streams a listing as a JSON array chunk by chunk.
+    - week_start: Reads the first day of a week of the meal plan.
+    - encode_cursor / decode_cursor: Convert between the last name of a page
+      and the opaque cursor handed to clients.
     - run: Starts the Flask application.
     """
+    MAX_PAGE_SIZE = 500
+    MAX_BULK_SIZE = 1000
+    MAX_BATCH_SIZE = 100
+    PLAN_DAYS = 7
+    MEAL_SLOTS = ('breakfast', 'lunch', 'dinner')
+    MAX_SHOPPING_DAYS = 31
+    SEARCH_KINDS = KINDS
+    MAX_COMPLETIONS = 50
+    MAX_EDIT_DISTANCE = 3
+    BATCH_OPERATIONS = ('get_cookbook_names', 'get_cookbook_info', 'get_cookbook_detail', 
+                        'cookbook_exists', 'get_recipe_names', 'get_recipe_info', 
+                        'recipe_exists', 'get_recipe_ingredients', 'add_cookbook', 
+                        'delete_cookbook', 'add_recipe', 'add_recipe_with_ingredients', 
+                        'delete_recipe', 'add_ingredient', 'add_ingredients_bulk', 
+                        'delete_ingredient', 'add_ingredient_recipe_pairing')
+    REQUEST_ID_PATTERN = re.compile(r'[A-Za-z0-9._-]{1,128}')
+
     def __init__(self, p_dal):
         self.dal = p_dal
+        self.library_versions = LibraryVersions()
         self.app = Flask(__name__)
         self.cors = CORS()
         self.register_routes()
@@ -814,6 +1679,139 @@ class BusinessLogic:
         )
         self.cors.init_app(self.app, supports_credentials=True, resources={r"/*": {"origins": "http://localhost:8000"}})
         self.app.secret_key = os.environ.get('SECRET_KEY')
+
+        # Registered first so that every later hook and route logs with the 
+        # request's id
+        @self.app.before_request
+        def assign_request_id():
+            """
+            This method gives the request an id that is attached to every log 
+            record it produces, reusing a well-formed X-Request-ID header 
+            sent by a proxy or client.
+            """
+            request_id = request.headers.get('X-Request-ID', '')
+            if not self.REQUEST_ID_PATTERN.fullmatch(request_id):
+                request_id = uuid.uuid4().hex
+            g.request_id = request_id
+            request_id_var.set(request_id)
+
+        @self.app.after_request
+        def return_request_id(response):
+            """
+            This method echoes the request id in the X-Request-ID header.
+
+            Parameters:
+            - response (Response): The response produced by the route.
+
+            Returns:
+            - Response: The same response.
+            """
+            if 'request_id' in g:
+                response.headers['X-Request-ID'] = g.request_id
+            return response
+
+        @self.app.teardown_request
+        def clear_request_id(error):
+            """
+            This method stops tagging log records with the request id once 
+            the request is done, since the thread serves other requests.
+            """
+            request_id_var.set(None)
+
+        # Registered first so that they run even when another hook answers 
+        # the request early
+        @self.app.before_request
+        def start_request_metrics():
+            """
+            This method starts timing the request and counts it as in flight.
+            """
+            g.request_route = request.url_rule.rule if request.url_rule else 'unmatched'
+            g.request_start = time.perf_counter()
+            metrics.HTTP_REQUESTS_IN_FLIGHT.labels(g.request_route).inc()
+
+        @self.app.after_request
+        def record_request_metrics(response):
+            """
+            This method records the latency and status of the request.
+
+            Parameters:
+            - response (Response): The response produced by the route.
+
+            Returns:
+            - Response: The same response.
+            """
+            if 'request_start' in g:
+                metrics.HTTP_REQUEST_SECONDS.labels(request.method, g.request_route).observe(
+                    time.perf_counter() - g.request_start)
+                metrics.HTTP_REQUESTS.labels(request.method, g.request_route, response.status_code).inc()
+            return response
+
+        @self.app.teardown_request
+        def finish_request_metrics(error):
+            """
+            This method stops counting the request as in flight, whether or 
+            not it raised.
+            """
+            if 'request_route' in g:
+                metrics.HTTP_REQUESTS_IN_FLIGHT.labels(g.request_route).dec()
+
+        # Read routes whose responses depend only on the user's library
+        versioned_endpoints = {'check_recipe', 'check_cookbook', 
+                               'get_cookbook_names', 'get_cookbook_info', 
+                               'get_recipe_names', 'get_all_recipe_names', 
+                               'get_recipe_info', 'get_recipes_info', 
+                               'get_meal_plan', 'get_shopping_list', 
+                               'get_pantry_recipes', 
+                               'get_recipes_by_ingredient', 'search', 
+                               'autocomplete', 'resolve_recipe'}
+        # Read routes whose range defaults to the current week
+        dated_endpoints = {'get_meal_plan', 'get_shopping_list'}
+
+        @self.app.before_request
+        def check_library_version():
+            """
+            This method answers a conditional GET of a read route before the 
+            DAL is touched.
+
+            Returns:
+            - Response: An empty 304 Not Modified if the client's ETag matches 
+              the user's current library version.
+            - None: Otherwise, letting the route run.
+            """
+            if request.method != 'GET' or request.endpoint not in versioned_endpoints:
+                return None
+            # Taken before the route reads so a concurrent write can only 
+            # make the tag older than the body, never newer
+            g.library_etag = self.library_versions.etag(session.get('user_id'))
+            if request.endpoint in dated_endpoints and request.args.get('start') is None:
+                # The week changes without a write, so it is part of the tag
+                g.library_etag += '-' + self.week_start(None).isoformat()
+            if request.if_none_match.contains(g.library_etag):
+                response = make_response('', 304)
+                response.set_etag(g.library_etag)
+                response.headers['Cache-Control'] = 'private, no-cache'
+                return response
+            return None
+
+        @self.app.after_request
+        def tag_library_version(response):
+            """
+            This method tags read responses with the library ETag and bumps 
+            the user's library version after every write.
+
+            Parameters:
+            - response (Response): The response produced by the route.
+
+            Returns:
+            - Response: The same response, tagged when it is a read.
+            """
+            if request.method == 'GET':
+                if response.status_code == 200 and 'library_etag' in g:
+                    response.set_etag(g.library_etag)
+                    response.headers['Cache-Control'] = 'private, no-cache'
+            elif request.method in ('PUT', 'POST', 'DELETE'):
+                self.library_versions.bump(session.get('user_id'))
+            return response
         
         @self.app.route('/check_recipe/<p_recipe>')
         def check_recipe(p_recipe):
@@ -826,11 +1824,88 @@ class BusinessLogic:
             Returns:
             - JSON response: A dictionary with a 'validity' key. The value is 
               True if the recipe name is valid, False otherwise.
+            - HTTP status code: 200 on success, 500 if the database fails.
+            """
+            response_dict = { 'validity' : False }
+            current_user_id = session.get('user_id')
+            exists = self.dal.recipe_exists(p_recipe, current_user_id)
+            if not isinstance(exists, bool):
+                response_dict = { 'message': f'Error: {exists}', 'success': False}
+                return jsonify(response_dict), 500
+
+            if exists is True:
+                response_dict['validity'] = True
+            else:
+                response_dict['validity'] = False
+
+            response = make_response(jsonify(response_dict))
+            response.content_type = 'application/json'
+            return response
+
+        @self.app.route('/resolve_recipe/<p_recipe>')
+        def resolve_recipe(p_recipe):
+            """
+            This method finds the recipes whose names are closest to a 
+            possibly mistyped recipe name, so a typo can be corrected 
+            without downloading every recipe name.
+        
+            Parameters:
+            - p_recipe (str): The recipe name as typed.
+            - max_distance (optional query parameter): The most characters 
+              inserted, deleted or substituted to reach a recipe name, from 0 
+              to MAX_EDIT_DISTANCE. Defaults to 2.
+            - limit (optional query parameter): The most recipes returned, 
+              from 1 to MAX_COMPLETIONS. Defaults to 5.
+        
+            Returns:
+            - JSON response: A dictionary with keys 'recipe_name' and 
+              'matches', one dictionary per recipe with keys 'recipe_name' 
+              and 'distance', closest first.
+            - HTTP status code: 200 on success, 400 for a bad max_distance or 
+              limit, 500 if the database fails.
+            """
+            try:
+                max_distance = int(request.args.get('max_distance', 2))
+                limit = int(request.args.get('limit', 5))
+            except ValueError:
+                max_distance = limit = -1
+            if not 0 <= max_distance <= self.MAX_EDIT_DISTANCE or not 1 <= limit <= self.MAX_COMPLETIONS:
+                response_dict = { 'message': f'Error: max_distance must be between 0 and {self.MAX_EDIT_DISTANCE} and limit must be between 1 and {self.MAX_COMPLETIONS}', 'success': False}
+                return jsonify(response_dict), 400
+
+            current_user_id = session.get('user_id')
+            matches = self.dal.resolve_recipe(p_recipe, current_user_id, max_distance, limit)
+            if not isinstance(matches, list):
+                response_dict = { 'message': f'Error: {matches}', 'success': False}
+                return jsonify(response_dict), 500
+
+            response_dict = { 'recipe_name': p_recipe, 
+                              'matches': [{ 'recipe_name': name, 'distance': distance } for name, distance in matches] }
+            response = make_response(jsonify(response_dict))
+            response.content_type = 'application/json'
+            return response
+
+        @self.app.route('/check_cookbook/<p_cookbook>')
+        def check_cookbook(p_cookbook):
+            """
+            This method checks if a user-given cookbook name is valid.
+        
+            Parameters:
+            - p_cookbook (str): The cookbook name to be checked.
+        
+            Returns:
+            - JSON response: A dictionary with a 'validity' key. The value is 
+              True if the cookbook name is valid, False otherwise.
+            - HTTP status code: 200 on success, 500 if the database fails.
             """
             response_dict = { 'validity' : False }
             current_user_id = session.get('user_id')
-            all_recipe_names = self.dal.get_recipe_names(user_id=current_user_id)
-            if p_recipe in all_recipe_names:
+            exists = self.dal.cookbook_exists(p_cookbook, current_user_id)
+            if not isinstance(exists, bool):
+                response_dict = { 'message': f'Error: {exists}', 'success': False}
+                return jsonify(response_dict), 500
+
+            if exists is True:
                 response_dict['validity'] = True
             else:
                 response_dict['validity'] = False
@@ -844,17 +1919,34 @@ class BusinessLogic:
             """
             This method returns a list of all the names of all the cookbooks in the database.
         
+            Parameters:
+            - limit (int, optional query parameter): Returns one page of at 
+              most this many names instead of the whole list.
+            - cursor (str, optional query parameter): The next_cursor of the 
+              previous page.
+            - stream (optional query parameter): With '1' or 'true' the whole 
+              list is streamed in chunks instead of built in memory.
+
             Returns:
-            - JSON response: A list of all cookbook names in the database.
+            - JSON response: A list of all cookbook names in the database, or 
+              with limit a dictionary with keys 'items' and 'next_cursor'.
+            - HTTP status code: 200 on success, 500 if the database fails.
             """
             
             current_user_id = session.get('user_id')
-            print(current_user_id)
+            if 'limit' in request.args:
+                return self.page_response(lambda limit, after: self.dal.get_cookbook_names_page(
+                    user_id=current_user_id, after=after, limit=limit))
+            if request.args.get('stream') in ('1', 'true'):
+                return self.stream_response(self.dal.iter_cookbook_names(current_user_id))
             all_cookbook_names = self.dal.get_cookbook_names(current_user_id)
-            print(all_cookbook_names)
+            if not isinstance(all_cookbook_names, list):
+                response_dict = { 'message': f'Error: {all_cookbook_names}', 'success': False}
+                return jsonify(response_dict), 500
+
+            http_logger.debug("Cookbook names for user %s: %s", current_user_id, all_cookbook_names)
             response = make_response(jsonify(all_cookbook_names))
             response.content_type = 'application/json'
-            print(response)
             return response
         
         @self.app.route("/cookbook_info/<p_cookbook>") 
@@ -870,14 +1962,17 @@ class BusinessLogic:
               'validity' is True if the cookbook name is valid, False otherwise. 
               'message' contains information about the cookbook. 
               'recipes' is a list of recipes in the cookbook.
+            - HTTP status code: 200 on success, 500 if the database fails.
             """
             response_dict = { 'validity' : False, 'cookbook_name': '', 'online': False, 'message': '', 'url': '', 'recipes': [] }
             current_user_id = session.get('user_id')
-            current_cookbook_names = self.dal.get_cookbook_names(current_user_id)
-            cookbook = p_cookbook
-            if cookbook in current_cookbook_names:
-                cookbook_info = self.dal.get_cookbook_info(cookbook, current_user_id)
-                cookbook_recipes = self.dal.get_recipe_names(user_id=current_user_id, cookbook_name=cookbook)
+            cookbook_detail = self.dal.get_cookbook_detail(p_cookbook, current_user_id)
+            if not isinstance(cookbook_detail, tuple):
+                response_dict = { 'message': f'Error: {cookbook_detail}', 'success': False}
+                return jsonify(response_dict), 500
+
+            if cookbook_detail[0]:
+                cookbook_info, cookbook_recipes = cookbook_detail
                 if cookbook_info[1] == 1:
                     response_dict["validity"] = True
                     response_dict["cookbook_name"] = f"{cookbook_info[0]}"
@@ -917,8 +2012,6 @@ class BusinessLogic:
 
             #Call the DAL method to add the cookbook
             current_user_id = session.get('user_id')
-            print(current_user_id)
-            print(type(current_user_id))
             self.dal.add_cookbook(cookbook_name, is_book, current_user_id, website)
             response_dict = { 'message': f'Cookbook {cookbook_name} added successfully'}
             return jsonify(response_dict), 200
@@ -949,12 +2042,30 @@ class BusinessLogic:
         
             Parameters:
             - p_cookbook (str): The name of the cookbook.
+            - limit (int, optional query parameter): Returns one page of at 
+              most this many names instead of the whole list.
+            - cursor (str, optional query parameter): The next_cursor of the 
+              previous page.
+            - stream (optional query parameter): With '1' or 'true' the whole 
+              list is streamed in chunks instead of built in memory.
         
             Returns:
-            - JSON response: A list of all recipe names in the specified cookbook.
+            - JSON response: A list of all recipe names in the specified 
+              cookbook, or with limit a dictionary with keys 'items' and 
+              'next_cursor'.
+            - HTTP status code: 200 on success, 500 if the database fails.
             """
             current_user_id = session.get('user_id')
+            if 'limit' in request.args:
+                return self.page_response(lambda limit, after: self.dal.get_recipe_names_page(
+                    user_id=current_user_id, cookbook_name=p_cookbook, after=after, limit=limit))
+            if request.args.get('stream') in ('1', 'true'):
+                return self.stream_response(self.dal.iter_recipe_names(current_user_id, cookbook_name=p_cookbook))
             all_recipe_names = self.dal.get_recipe_names(user_id=current_user_id, cookbook_name=p_cookbook)
+            if not isinstance(all_recipe_names, list):
+                response_dict = { 'message': f'Error: {all_recipe_names}', 'success': False}
+                return jsonify(response_dict), 500
+
             response = make_response(jsonify(all_recipe_names))
             response.content_type = 'application/json'
             return response
@@ -964,11 +2075,30 @@ class BusinessLogic:
             """
             This method returns a list of the names of all the recipes in the database.
         
+            Parameters:
+            - limit (int, optional query parameter): Returns one page of at 
+              most this many names instead of the whole list.
+            - cursor (str, optional query parameter): The next_cursor of the 
+              previous page.
+            - stream (optional query parameter): With '1' or 'true' the whole 
+              list is streamed in chunks instead of built in memory.
+
             Returns:
-            - JSON response: A list of all recipe names in the database.
+            - JSON response: A list of all recipe names in the database, or 
+              with limit a dictionary with keys 'items' and 'next_cursor'.
+            - HTTP status code: 200 on success, 500 if the database fails.
             """
             current_user_id = session.get('user_id')
+            if 'limit' in request.args:
+                return self.page_response(lambda limit, after: self.dal.get_recipe_names_page(
+                    user_id=current_user_id, after=after, limit=limit))
+            if request.args.get('stream') in ('1', 'true'):
+                return self.stream_response(self.dal.iter_recipe_names(current_user_id))
             all_recipe_names = self.dal.get_recipe_names(user_id=current_user_id)
+            if not isinstance(all_recipe_names, list):
+                response_dict = { 'message': f'Error: {all_recipe_names}', 'success': False}
+                return jsonify(response_dict), 500
+
             response = make_response(jsonify(all_recipe_names))
             response.content_type = 'application/json'
             return response
@@ -985,12 +2115,23 @@ class BusinessLogic:
             - JSON response: A dictionary with keys 'message' and 'ingredients'. 
               'message' contains information about the recipe. 
               'ingredients' is a list of ingredients for the recipe.
+            - HTTP status code: 200 on success, 404 if the recipe does not 
+              exist, 500 if the database fails.
             """
             current_user_id = session.get('user_id')
             recipe_info = self.dal.get_recipe_info(p_recipe, current_user_id)
+            if recipe_info in (None, ()):
+                response_dict = { 'message': f'Error: recipe {p_recipe} not found', 'success': False}
+                return jsonify(response_dict), 404
+            if not isinstance(recipe_info, tuple):
+                response_dict = { 'message': f'Error: {recipe_info}', 'success': False}
+                return jsonify(response_dict), 500
             recipe_ingredients = self.dal.get_recipe_ingredients(p_recipe, current_user_id)
-            print(recipe_info)
-            print(recipe_ingredients)
+            if not isinstance(recipe_ingredients, list):
+                response_dict = { 'message': f'Error: {recipe_ingredients}', 'success': False}
+                return jsonify(response_dict), 500
+
+            http_logger.debug("Recipe info: %s %s", recipe_info, recipe_ingredients)
 
             recipe_name = recipe_info[0]
             cookbook_name = recipe_info[1]
@@ -1010,6 +2151,55 @@ class BusinessLogic:
             response.content_type = 'application/json'
             return response
         
+        @self.app.route('/recipes_info', methods=['GET'])
+        def get_recipes_info():
+            """
+            This method retrieves the information and ingredients of several 
+            recipes at once, in place of one recipe_info request per recipe.
+        
+            Parameters:
+            - names (query parameter, repeated): The names of the recipes, at 
+              most MAX_PAGE_SIZE of them.
+        
+            Returns:
+            - JSON response: A dictionary with keys 'recipes', one dictionary 
+              per recipe found in the order asked for with the keys of 
+              recipe_info, and 'missing', the names not found.
+            - HTTP status code: 200 on success, 400 without names or with too 
+              many, 500 if the database fails.
+            """
+            # Names differing only in case find the same recipe, so only the 
+            # first spelling is looked up
+            first_spellings = {}
+            for name in request.args.getlist('names'):
+                first_spellings.setdefault(name.casefold(), name)
+            recipe_names = tuple(first_spellings.values())
+            if not recipe_names or len(recipe_names) > self.MAX_PAGE_SIZE:
+                response_dict = { 'message': f'Error: names must be given 1 to {self.MAX_PAGE_SIZE} times', 'success': False}
+                return jsonify(response_dict), 400
+
+            current_user_id = session.get('user_id')
+            recipes = self.dal.get_recipes_info(recipe_names, current_user_id)
+            if not isinstance(recipes, list):
+                response_dict = { 'message': f'Error: {recipes}', 'success': False}
+                return jsonify(response_dict), 500
+
+            found = set()
+            recipes_list = []
+            for recipe_info, recipe_ingredients in recipes:
+                found.add(recipe_info[0].casefold())
+                recipes_list.append({ 'recipe_name' : recipe_info[0], 
+                                      'cookbook_name': recipe_info[1], 
+                                      'servings': recipe_info[2], 
+                                      'is_online': recipe_info[3] == 1, 
+                                      'url': recipe_info[4], 
+                                      'ingredients' : recipe_ingredients })
+            response_dict = { 'recipes': recipes_list, 
+                              'missing': [name for name in recipe_names if name.casefold() not in found] }
+            response = make_response(jsonify(response_dict))
+            response.content_type = 'application/json'
+            return response
+        
         @self.app.route('/add_recipe', methods=['PUT'])
         def add_recipe():
             """
@@ -1025,7 +2215,7 @@ class BusinessLogic:
             - HTTP status code: 200 on success.
             """
             data = request.json
-            print(data)
+            http_logger.debug("Add recipe request: %s", data)
             recipe_name = data['new_recipe_name']
             cookbook_name = data['new_cookbook_name']
             servings = data['new_servings']
@@ -1038,6 +2228,54 @@ class BusinessLogic:
             response_dict = { 'message': f'Recipe {recipe_name} added successfully'}
             return jsonify(response_dict), 200
 
+        @self.app.route('/add_recipe_with_ingredients', methods=['PUT'])
+        def add_recipe_with_ingredients():
+            """
+            This method adds a new recipe and its ingredients to the database 
+            in one transaction, in place of one add_recipe request followed 
+            by an add_ingredient and an add_ingredient_recipe_pairing request 
+            per ingredient.
+        
+            Parameters:
+            - JSON request data with keys 'new_recipe_name', 
+              'new_cookbook_name', 'new_servings', 'new_is_online', 
+              'new_webpage' and 'new_ingredients', a list of at most 
+              MAX_BULK_SIZE ingredient names.
+        
+            Returns:
+            - JSON response: A dictionary with 'message' and 'success' keys.
+            - HTTP status code: 200 on success, 400 if the request is 
+              malformed or the database refuses the recipe, 500 if the 
+              database fails.
+            """
+            data = request.json
+            http_logger.debug("Add recipe with ingredients request: %s", data)
+            ingredient_names = data.get('new_ingredients') if isinstance(data, dict) else None
+            if (not isinstance(ingredient_names, list) or len(ingredient_names) > self.MAX_BULK_SIZE
+                    or not all(isinstance(name, str) and 0 < len(name.strip()) <= 100 
+                               for name in ingredient_names)):
+                response_dict = { 'message': f'Error: new_ingredients must be a list of at most {self.MAX_BULK_SIZE} names of 1 to 100 characters', 'success': False}
+                return jsonify(response_dict), 400
+            recipe_name = data['new_recipe_name']
+            cookbook_name = data['new_cookbook_name']
+            servings = data['new_servings']
+            is_online = data['new_is_online']
+            webpage = data['new_webpage']
+
+            #Call the DAL method to add the recipe and its ingredients
+            current_user_id = session.get('user_id')
+            result = self.dal.add_recipe_with_ingredients(recipe_name, cookbook_name, servings, is_online, 
+                                                          ingredient_names, current_user_id, webpage)
+            if result is None:
+                response_dict = { 'message': f'Recipe {recipe_name} added successfully', 'success': True}
+                return jsonify(response_dict), 200
+            elif result.startswith('Error: '):
+                response_dict = { 'message': result, 'success': False}
+                return jsonify(response_dict), 400
+            else:
+                response_dict = { 'message': f'Error: {result}', 'success': False}
+                return jsonify(response_dict), 500
+
         @self.app.route("/delete_recipe/<p_recipe>", methods=['DELETE'])
         def delete_recipe(p_recipe):
             """
@@ -1076,6 +2314,41 @@ class BusinessLogic:
             response_dict = { 'message': f'Ingredient {ingredient_name} added successfully'}
             return jsonify(response_dict), 200
         
+        @self.app.route('/add_ingredients', methods=['PUT'])
+        def add_ingredients():
+            """
+            This method adds many ingredients to the database in one 
+            transaction.
+        
+            Parameters:
+            - JSON request data with a key 'new_ingredients' holding a list 
+              of at most MAX_BULK_SIZE ingredient names.
+        
+            Returns:
+            - JSON response: A dictionary with keys 'message', 'results' and 
+              'success'.  'results' holds a dictionary with keys 'name' and 
+              'status' for each given name, in order.
+            - HTTP status code: 200 on success, 400 for a missing or too 
+              long list, 500 if the database fails.
+            """
+            data = request.json
+            ingredient_names = data.get('new_ingredients') if isinstance(data, dict) else None
+            if not isinstance(ingredient_names, list) or len(ingredient_names) > self.MAX_BULK_SIZE:
+                response_dict = { 'message': f'Error: new_ingredients must be a list of at most {self.MAX_BULK_SIZE} names', 'success': False}
+                return jsonify(response_dict), 400
+
+            #Call the DAL method to add the ingredients
+            current_user_id = session.get('user_id')
+            results = self.dal.add_ingredients_bulk(ingredient_names, current_user_id)
+            if not isinstance(results, list):
+                response_dict = { 'message': f'Error: {results}', 'success': False}
+                return jsonify(response_dict), 500
+
+            added = sum(result['status'] == 'added' for result in results)
+            response_dict = { 'message': f'{added} of {len(results)} ingredients added', 
+                              'results': results, 'success': True}
+            return jsonify(response_dict), 200
+        
         @self.app.route("/delete_ingredient/<p_ingredient>", methods=['DELETE'])
         def delete_ingredient(p_ingredient):
             """
@@ -1117,6 +2390,376 @@ class BusinessLogic:
             response_dict = { 'message': f'Ingredient {ingredient_name} paired with recipe {recipe_name} successfully'}
             return jsonify(response_dict), 200
         
+        @self.app.route('/search', methods=['GET'])
+        def search():
+            """
+            This method searches the names of the user's cookbooks, recipes 
+            and ingredients for the words of a query, best match first.  A 
+            word matches a word of a name that equals it or starts with it, 
+            so the query may end with a partly typed word.
+        
+            Parameters:
+            - q (query parameter): The words to look for.
+            - type (optional query parameter, repeatable): recipe, cookbook 
+              or ingredient, to search only those kinds of names.
+            - limit (optional query parameter): The most results returned, 
+              from 1 to MAX_PAGE_SIZE. Defaults to 20.
+        
+            Returns:
+            - JSON response: A dictionary with keys 'query' and 'results', 
+              one dictionary per match with keys 'type' and 'name'.
+            - HTTP status code: 200 on success, 400 for a query without 
+              words or a bad type or limit, 500 if the database fails.
+            """
+            query = request.args.get('q', '')
+            kinds = tuple(dict.fromkeys(request.args.getlist('type'))) or self.SEARCH_KINDS
+            try:
+                limit = int(request.args.get('limit', 20))
+            except ValueError:
+                limit = 0
+            if (not tokenize(query) or not set(kinds) <= set(self.SEARCH_KINDS) 
+                    or not 1 <= limit <= self.MAX_PAGE_SIZE):
+                response_dict = { 'message': f'Error: q must contain a word, type must be one of {", ".join(self.SEARCH_KINDS)} and limit must be between 1 and {self.MAX_PAGE_SIZE}', 'success': False}
+                return jsonify(response_dict), 400
+
+            current_user_id = session.get('user_id')
+            results = self.dal.search(query, current_user_id, limit, kinds)
+            if not isinstance(results, list):
+                response_dict = { 'message': f'Error: {results}', 'success': False}
+                return jsonify(response_dict), 500
+
+            response_dict = { 'query': query, 
+                              'results': [{ 'type': kind, 'name': name } for kind, name in results] }
+            response = make_response(jsonify(response_dict))
+            response.content_type = 'application/json'
+            return response
+
+        @self.app.route('/autocomplete', methods=['GET'])
+        def autocomplete():
+            """
+            This method completes the start of a cookbook, recipe or 
+            ingredient name as the user types it, from memory.
+        
+            Parameters:
+            - prefix (query parameter): The start of the name, ignoring case.
+            - type (optional query parameter, repeatable): recipe, cookbook 
+              or ingredient, to complete only those kinds of names.
+            - limit (optional query parameter): The most completions 
+              returned, from 1 to MAX_COMPLETIONS. Defaults to 10.
+        
+            Returns:
+            - JSON response: A dictionary with keys 'prefix' and 
+              'completions', one dictionary per name with keys 'type' and 
+              'name', in alphabetical order.
+            - HTTP status code: 200 on success, 400 for an empty prefix or a 
+              bad type or limit, 500 if the database fails.
+            """
+            prefix = request.args.get('prefix', '')
+            kinds = tuple(dict.fromkeys(request.args.getlist('type'))) or self.SEARCH_KINDS
+            try:
+                limit = int(request.args.get('limit', 10))
+            except ValueError:
+                limit = 0
+            if (not prefix.strip() or not set(kinds) <= set(self.SEARCH_KINDS) 
+                    or not 1 <= limit <= self.MAX_COMPLETIONS):
+                response_dict = { 'message': f'Error: prefix must not be empty, type must be one of {", ".join(self.SEARCH_KINDS)} and limit must be between 1 and {self.MAX_COMPLETIONS}', 'success': False}
+                return jsonify(response_dict), 400
+
+            current_user_id = session.get('user_id')
+            completions = self.dal.autocomplete(prefix, current_user_id, limit, kinds)
+            if not isinstance(completions, list):
+                response_dict = { 'message': f'Error: {completions}', 'success': False}
+                return jsonify(response_dict), 500
+
+            response_dict = { 'prefix': prefix, 
+                              'completions': [{ 'type': kind, 'name': name } for kind, name in completions] }
+            response = make_response(jsonify(response_dict))
+            response.content_type = 'application/json'
+            return response
+
+        @self.app.route('/meal_plan', methods=['GET'])
+        def get_meal_plan():
+            """
+            This method returns the meals planned for a week with the 
+            information of their recipes.
+        
+            Parameters:
+            - start (optional query parameter): The first day of the week, as 
+              YYYY-MM-DD. Defaults to the Monday of the current week.
+        
+            Returns:
+            - JSON response: A dictionary with keys 'start', 'end' and 
+              'meals', one dictionary per planned meal with keys 'date', 
+              'slot', 'recipe_name', 'cookbook_name', 'servings', 'is_online' 
+              and 'url'.
+            - HTTP status code: 200 on success, 400 for a malformed start, 
+              500 if the database fails.
+            """
+            try:
+                start = self.week_start(request.args.get('start'))
+            except ValueError:
+                response_dict = { 'message': 'Error: start must be a date as YYYY-MM-DD', 'success': False}
+                return jsonify(response_dict), 400
+            end = start + datetime.timedelta(days=self.PLAN_DAYS - 1)
+
+            current_user_id = session.get('user_id')
+            meals = self.dal.get_meal_plan(current_user_id, start.isoformat(), end.isoformat())
+            if not isinstance(meals, list):
+                response_dict = { 'message': f'Error: {meals}', 'success': False}
+                return jsonify(response_dict), 500
+
+            meals_list = []
+            for plan_date, slot, recipe_name, cookbook_name, servings, is_online, url in meals:
+                meals_list.append({ 'date': plan_date.isoformat(), 'slot': slot, 
+                                    'recipe_name': recipe_name, 'cookbook_name': cookbook_name, 
+                                    'servings': servings, 'is_online': is_online == 1, 'url': url })
+            response_dict = { 'start': start.isoformat(), 'end': end.isoformat(), 'meals': meals_list }
+            response = make_response(jsonify(response_dict))
+            response.content_type = 'application/json'
+            return response
+
+        @self.app.route('/shopping_list', methods=['GET'])
+        def get_shopping_list():
+            """
+            This method returns the ingredients of the meals planned over a 
+            range of days, each once with the number of planned meals that 
+            need it.  The list is cached like the other reads until the user 
+            changes their plan or library.
+        
+            Parameters:
+            - start (optional query parameter): The first day, as YYYY-MM-DD. 
+              Defaults to the Monday of the current week.
+            - end (optional query parameter): The last day, as YYYY-MM-DD. 
+              Defaults to the end of the week that starts on start, and may 
+              be at most MAX_SHOPPING_DAYS days after it.
+        
+            Returns:
+            - JSON response: A dictionary with keys 'start', 'end' and 
+              'ingredients', one dictionary per ingredient with keys 
+              'ingredient_name' and 'meal_count'.
+            - HTTP status code: 200 on success, 400 for a malformed range, 
+              500 if the database fails.
+            """
+            try:
+                start = self.week_start(request.args.get('start'))
+                end = request.args.get('end')
+                if end is None:
+                    end = start + datetime.timedelta(days=self.PLAN_DAYS - 1)
+                else:
+                    end = datetime.date.fromisoformat(end)
+                if not start <= end < start + datetime.timedelta(days=self.MAX_SHOPPING_DAYS):
+                    raise ValueError(f'end must be from start to {self.MAX_SHOPPING_DAYS - 1} days after it')
+            except ValueError as err:
+                response_dict = { 'message': f'Error: {err}', 'success': False}
+                return jsonify(response_dict), 400
+
+            current_user_id = session.get('user_id')
+            ingredients = self.dal.get_shopping_list(current_user_id, start.isoformat(), end.isoformat())
+            if not isinstance(ingredients, list):
+                response_dict = { 'message': f'Error: {ingredients}', 'success': False}
+                return jsonify(response_dict), 500
+
+            ingredients_list = [{ 'ingredient_name': ingredient_name, 'meal_count': meal_count } 
+                                for ingredient_name, meal_count in ingredients]
+            response_dict = { 'start': start.isoformat(), 'end': end.isoformat(), 'ingredients': ingredients_list }
+            response = make_response(jsonify(response_dict))
+            response.content_type = 'application/json'
+            return response
+
+        @self.app.route('/pantry_recipes', methods=['GET'])
+        def get_pantry_recipes():
+            """
+            This method returns the recipes that use the ingredients on hand, 
+            the ones that can be made first and then by fewest missing 
+            ingredients.  Each recipe is matched as a bitset over the user's 
+            ingredients, so no recipe's ingredients are read one at a time.
+        
+            Parameters:
+            - ingredients (query parameter, repeated): The names of the 
+              ingredients on hand, at most MAX_PAGE_SIZE of them.
+            - limit (optional query parameter): The most recipes returned, 
+              from 1 to MAX_PAGE_SIZE. Defaults to 20.
+            - max_missing (optional query parameter): Leave out the recipes 
+              missing more ingredients than this. Defaults to no bound.
+        
+            Returns:
+            - JSON response: A dictionary with keys 'recipes', one dictionary 
+              per recipe with keys 'recipe_name', 'on_hand' and 'missing', the 
+              names of the ingredients it still needs, and 'unknown', the 
+              ingredient names not in the user's library.
+            - HTTP status code: 200 on success, 400 without ingredients, with 
+              too many or for a bad limit or max_missing, 500 if the database 
+              fails.
+            """
+            ingredient_names = tuple(dict.fromkeys(request.args.getlist('ingredients')))
+            try:
+                limit = int(request.args.get('limit', 20))
+                max_missing = request.args.get('max_missing')
+                max_missing = None if max_missing is None else int(max_missing)
+            except ValueError:
+                limit = max_missing = -1
+            if (not ingredient_names or len(ingredient_names) > self.MAX_PAGE_SIZE 
+                    or not 1 <= limit <= self.MAX_PAGE_SIZE or (max_missing is not None and max_missing < 0)):
+                response_dict = { 'message': f'Error: ingredients must be given 1 to {self.MAX_PAGE_SIZE} times, limit must be between 1 and {self.MAX_PAGE_SIZE} and max_missing must not be negative', 'success': False}
+                return jsonify(response_dict), 400
+
+            current_user_id = session.get('user_id')
+            matches = self.dal.match_pantry(ingredient_names, current_user_id, limit, max_missing)
+            if not isinstance(matches, tuple):
+                response_dict = { 'message': f'Error: {matches}', 'success': False}
+                return jsonify(response_dict), 500
+
+            recipes, unknown = matches
+            recipes_list = [{ 'recipe_name': recipe_name, 'on_hand': on_hand, 'missing': missing } 
+                            for recipe_name, on_hand, missing in recipes]
+            response_dict = { 'recipes': recipes_list, 'unknown': unknown }
+            response = make_response(jsonify(response_dict))
+            response.content_type = 'application/json'
+            return response
+
+        @self.app.route('/recipes_by_ingredient', methods=['GET'])
+        def get_recipes_by_ingredient():
+            """
+            This method returns the recipes that use all, or any, of some 
+            ingredients, in place of reading every recipe's ingredients.
+        
+            Parameters:
+            - ingredients (query parameter, repeated): The names of the 
+              ingredients, at most MAX_PAGE_SIZE of them.
+            - match (optional query parameter): 'all' for the recipes using 
+              every ingredient, 'any' for the recipes using at least one. 
+              Defaults to 'all'.
+        
+            Returns:
+            - JSON response: A dictionary with keys 'recipes', the names of 
+              the recipes in alphabetical order, and 'unknown', the 
+              ingredient names not in the user's library.
+            - HTTP status code: 200 on success, 400 without ingredients, with 
+              too many or for a bad match, 500 if the database fails.
+            """
+            ingredient_names = tuple(dict.fromkeys(request.args.getlist('ingredients')))
+            match = request.args.get('match', 'all')
+            if not ingredient_names or len(ingredient_names) > self.MAX_PAGE_SIZE or match not in ('all', 'any'):
+                response_dict = { 'message': f"Error: ingredients must be given 1 to {self.MAX_PAGE_SIZE} times and match must be 'all' or 'any'", 'success': False}
+                return jsonify(response_dict), 400
+
+            current_user_id = session.get('user_id')
+            recipes = self.dal.get_recipes_by_ingredient(ingredient_names, current_user_id, match == 'all')
+            if not isinstance(recipes, tuple):
+                response_dict = { 'message': f'Error: {recipes}', 'success': False}
+                return jsonify(response_dict), 500
+
+            recipe_names, unknown = recipes
+            response_dict = { 'recipes': recipe_names, 'unknown': unknown }
+            response = make_response(jsonify(response_dict))
+            response.content_type = 'application/json'
+            return response
+
+        @self.app.route('/meal_plan', methods=['PUT'])
+        def set_meal_plan():
+            """
+            This method replaces the meals planned for a week in one 
+            transaction, after checking every meal.
+        
+            Parameters:
+            - JSON request data with keys 'start', the first day of the week 
+              as YYYY-MM-DD, and 'meals', a list of dictionaries with keys 
+              'date', a day of that week, 'slot', one of MEAL_SLOTS, and 
+              'recipe_name'.  Each day and slot may be given once; the ones 
+              left out are cleared.
+        
+            Returns:
+            - JSON response: A dictionary with 'message' and 'success' keys.
+            - HTTP status code: 200 on success, 400 if a meal is malformed or 
+              its recipe does not exist, 500 if the database fails.
+            """
+            data = request.json
+            try:
+                if not isinstance(data, dict) or not isinstance(data.get('meals'), list):
+                    raise ValueError('meals must be a list')
+                start = self.week_start(data.get('start'))
+                end = start + datetime.timedelta(days=self.PLAN_DAYS - 1)
+                meals = {}
+                for meal in data['meals']:
+                    if not isinstance(meal, dict) or not isinstance(meal.get('recipe_name'), str):
+                        raise ValueError('each meal needs a recipe_name')
+                    plan_date = datetime.date.fromisoformat(str(meal.get('date')))
+                    if not start <= plan_date <= end or meal.get('slot') not in self.MEAL_SLOTS:
+                        raise ValueError(f'each meal needs a date from {start} to {end} and a slot of {", ".join(self.MEAL_SLOTS)}')
+                    if (plan_date, meal['slot']) in meals:
+                        raise ValueError(f'{meal["slot"]} on {plan_date} is planned twice')
+                    meals[(plan_date, meal['slot'])] = { 'date': plan_date.isoformat(), 'slot': meal['slot'], 
+                                                         'recipe_name': meal['recipe_name'] }
+            except ValueError as err:
+                response_dict = { 'message': f'Error: {err}', 'success': False}
+                return jsonify(response_dict), 400
+
+            current_user_id = session.get('user_id')
+            result = self.dal.set_meal_plan(current_user_id, start.isoformat(), end.isoformat(), list(meals.values()))
+            if result is None:
+                response_dict = { 'message': f'Meal plan for the week of {start.isoformat()} saved successfully', 'success': True}
+                return jsonify(response_dict), 200
+            elif result.startswith('Error: '):
+                response_dict = { 'message': result, 'success': False}
+                return jsonify(response_dict), 400
+            else:
+                response_dict = { 'message': f'Error: {result}', 'success': False}
+                return jsonify(response_dict), 500
+
+        @self.app.route('/batch', methods=['POST'])
+        def run_batch():
+            """
+            This method runs an ordered list of operations on one pooled 
+            connection, optionally in one all-or-nothing transaction.
+        
+            Parameters:
+            - JSON request data
+                - 'operations': A list of at most MAX_BATCH_SIZE dictionaries 
+                  with keys 'op', one of BATCH_OPERATIONS, and 'args', the 
+                  keyword arguments of the DAL method of that name without 
+                  user_id.
+                - 'transactional' (optional): With true the operations are 
+                  committed together, and only if all of them succeed; the 
+                  operations after a failed one are skipped.
+            
+            Returns:
+            - JSON response: A dictionary with keys 'results', one per 
+              operation in order with keys 'op', 'success', 'result' and, on 
+              failure, 'message'; 'committed', whether the writes were kept; 
+              and 'success', whether every operation succeeded.
+            - HTTP status code: 200 unless a transactional batch was rolled 
+              back, 400 for that or a malformed batch.
+            """
+            data = request.json
+            operations = data.get('operations') if isinstance(data, dict) else None
+            transactional = isinstance(data, dict) and data.get('transactional') is True
+            current_user_id = session.get('user_id')
+            try:
+                if not isinstance(operations, list) or len(operations) > self.MAX_BATCH_SIZE:
+                    raise ValueError(f'operations must be a list of at most {self.MAX_BATCH_SIZE} operations')
+                calls = [self.bind_batch_operation(operation, current_user_id) for operation in operations]
+            except ValueError as err:
+                response_dict = { 'message': f'Error: {err}', 'success': False}
+                return jsonify(response_dict), 400
+
+            results = []
+            with self.dal.batch(current_user_id, transactional) as batch:
+                for name, call in calls:
+                    if transactional and batch.failed:
+                        results.append({ 'op': name, 'success': False, 'result': None, 
+                                         'message': 'Skipped after an earlier operation failed' })
+                        continue
+                    result, error = batch.run(call)
+                    if error is None:
+                        results.append({ 'op': name, 'success': True, 'result': result })
+                    else:
+                        results.append({ 'op': name, 'success': False, 'result': None, 
+                                         'message': f'Error: {getattr(error, "msg", error)}' })
+            committed = not (transactional and batch.failed)
+            response_dict = { 'results': results, 'committed': committed, 
+                              'success': not batch.failed }
+            return jsonify(response_dict), 200 if committed else 400
+        
         @self.app.route('/add_user', methods=['PUT'])
         def add_user():
             """
@@ -1142,7 +2785,7 @@ class BusinessLogic:
 
             #Call the DAL method to add the user
             result = self.dal.add_user(email, hashed_password, first_name, last_name)
-            print(result)
+            http_logger.debug("Add user result: %s", result)
 
             #Check the result and return the appropriate response
             if result == "Something is wrong with your user name or password" or result == "Database does not exist" or result == "Error: User already exists":
@@ -1170,7 +2813,7 @@ class BusinessLogic:
 
             # Call the DAL method to delete the user
             result = self.dal.delete_user(email)
-            print(result)
+            http_logger.debug("Delete user result: %s", result)
 
             # Check the result and return the appropriate response
             if result == "Something is wrong with your user name or password" or result == "Database does not exist" or result.startswith("Error:"):
@@ -1199,7 +2842,6 @@ class BusinessLogic:
 
             # Get the hashed password from the database
             user_info = self.dal.get_user_info(email)
-            print(user_info)
 
             # Ensure user exists
             if user_info == "Something is wrong with your user name or password" or user_info == "Database does not exist" or user_info == "Error: User does not exist":
@@ -1212,7 +2854,7 @@ class BusinessLogic:
             if check_password_hash(hashed_password, password):
                 # Store the user's id in the session
                 session['user_id'] = user_info[0]
-                print(session['user_id'])
+                http_logger.info("User %s logged in", session['user_id'])
         
                 response_dict = {'message': f'User {email} logged in successfully', 
                                  'success': True,
@@ -1239,17 +2881,242 @@ class BusinessLogic:
         
             response_dict = {'message': 'User logged out successfully', 'success': True}
             return jsonify(response_dict), 200
+
+        @self.app.route('/pool_stats')
+        def get_pool_stats():
+            """
+            This method returns the state of the database connection pool 
+            for monitoring.
+
+            Returns:
+            - JSON response: A dictionary of pool settings, occupancy and 
+              lifetime counters.
+            """
+            response = make_response(jsonify(self.dal.get_pool_stats()))
+            response.content_type = 'application/json'
+            return response
+
+        @self.app.route('/metrics')
+        def get_metrics():
+            """
+            This method returns the request, stored procedure, connection 
+            pool, read cache and slow call metrics of this process.
+
+            Returns:
+            - Text response: The metrics in the Prometheus text exposition 
+              format.
+            """
+            extra_lines = (metrics.render_samples('db_pool', 'Database connection pool statistic.', self.dal.get_pool_stats(), metrics.POOL_COUNTERS)
+                           + metrics.render_samples('db_cache', 'DAL read cache statistic.', self.dal.get_cache_stats(), metrics.CACHE_COUNTERS)
+                           + metrics.render_samples('db_trace', 'Stored procedure call tracer statistic.', self.dal.get_trace_stats(), metrics.TRACE_COUNTERS))
+            response = make_response(metrics.REGISTRY.render(extra_lines))
+            response.content_type = 'text/plain; version=0.0.4; charset=utf-8'
+            return response
+
+        @self.app.route('/cache_stats')
+        def get_cache_stats():
+            """
+            This method returns the counters of the DAL read cache for 
+            monitoring.
+
+            Returns:
+            - JSON response: A dictionary of cache settings, size and hit, 
+              miss and eviction counters.
+            """
+            response = make_response(jsonify(self.dal.get_cache_stats()))
+            response.content_type = 'application/json'
+            return response
+
+        @self.app.route('/search_stats')
+        def get_search_stats():
+            """
+            This method returns the counters of the DAL search indexes for 
+            monitoring.
+
+            Returns:
+            - JSON response: A dictionary of index settings, size and 
+              search, build and update counters.
+            """
+            response = make_response(jsonify(self.dal.get_search_stats()))
+            response.content_type = 'application/json'
+            return response
             
+    def bind_batch_operation(self, operation, user_id):
+        """
+        Checks one operation of a batch and binds it to its DAL method.
+
+        Parameters:
+        - operation (dict): The operation, with keys 'op' and 'args'.
+        - user_id (int): The user the batch runs for.
+
+        Returns:
+        - tuple: The operation's name and a callable running it.
+
+        Raises:
+        - ValueError: If the operation is unknown or its arguments do not 
+          fit its DAL method.
+        """
+        name = operation.get('op') if isinstance(operation, dict) else None
+        args = operation.get('args', {}) if isinstance(operation, dict) else None
+        if name not in self.BATCH_OPERATIONS or not isinstance(args, dict):
+            raise ValueError(f'op must be one of {", ".join(self.BATCH_OPERATIONS)} and args a dictionary')
+        for key, value in args.items():
+            # Lists are only taken as ingredient names; anything a cached 
+            # read is keyed by has to be hashable
+            if key == 'ingredient_names':
+                valid = isinstance(value, list) and all(isinstance(item, str) for item in value)
+            else:
+                valid = value is None or isinstance(value, (str, int, float, bool))
+            if not valid or key == 'user_id':
+                raise ValueError(f'{name} does not take {key} as given')
+        method = getattr(self.dal, name)
+        try:
+            inspect.signature(method).bind(user_id=user_id, **args)
+        except TypeError as err:
+            raise ValueError(f'{name}: {err}')
+        return name, lambda: method(user_id=user_id, **args)
+
+    def page_response(self, fetch_page):
+        """
+        Builds the response for one page of a paginated listing from the 
+        'limit' and 'cursor' query parameters.
+
+        Parameters:
+        - fetch_page (callable): Takes a limit and the last name of the 
+          previous page (or None) and returns the DAL page tuple.
+
+        Returns:
+        - JSON response: A dictionary with keys 'items' and 'next_cursor'; 
+          'next_cursor' is None on the last page.
+        - HTTP status code: 200 on success, 400 for a bad limit or cursor.
+        """
+        try:
+            limit = int(request.args['limit'])
+            if limit < 1 or limit > self.MAX_PAGE_SIZE:
+                raise ValueError
+            after = self.decode_cursor(request.args.get('cursor'))
+        except ValueError:
+            response_dict = { 'message': f'Error: limit must be between 1 and {self.MAX_PAGE_SIZE} and cursor must come from a previous page', 'success': False}
+            return jsonify(response_dict), 400
+
+        page = fetch_page(limit, after)
+        if not isinstance(page, tuple):
+            response_dict = { 'message': f'Error: {page}', 'success': False}
+            return jsonify(response_dict), 500
+
+        items, next_after = page
+        response_dict = { 'items': items, 
+                          'next_cursor': self.encode_cursor(next_after) }
+        response = make_response(jsonify(response_dict))
+        response.content_type = 'application/json'
+        return response
+
+    def stream_response(self, chunks):
+        """
+        Streams a JSON array of names from a DAL chunk iterator, so only one 
+        chunk is held in memory at a time.
+
+        The first chunk is read before the response starts, so a database 
+        that cannot be reached still produces an error status.
+
+        Parameters:
+        - chunks (iterator): Yields lists of names.
+
+        Returns:
+        - Response: A streamed JSON array of all the names.
+        - HTTP status code: 500 if the first chunk cannot be read.
+        """
+        try:
+            first_chunk = next(chunks, [])
+        except mysql.connector.Error as err:
+            response_dict = { 'message': f'Error: {err}', 'success': False}
+            return jsonify(response_dict), 500
+
+        def generate():
+            yield '['
+            separator = ''
+            for chunk in itertools.chain([first_chunk], chunks):
+                if chunk:
+                    yield separator + ','.join(json.dumps(name) for name in chunk)
+                    separator = ','
+            yield ']'
+
+        return Response(stream_with_context(generate()), mimetype='application/json')
+
+    @staticmethod
+    def week_start(value):
+        """
+        Reads the first day of a week of the meal plan.
+
+        Parameters:
+        - value (str): The day as YYYY-MM-DD, or None for the Monday of the 
+          current week.
+
+        Returns:
+        - datetime.date: The first day of the week.
+
+        Raises:
+        - ValueError: If the value is not a date as YYYY-MM-DD.
+        """
+        if value is None:
+            today = datetime.date.today()
+            return today - datetime.timedelta(days=today.weekday())
+        if not isinstance(value, str):
+            raise ValueError("Invalid date")
+        return datetime.date.fromisoformat(value)
+
+    @staticmethod
+    def encode_cursor(after):
+        """
+        Wraps the last name of a page in an opaque cursor string.
+
+        Parameters:
+        - after (str): The last name of the page, or None.
+
+        Returns:
+        - str: The cursor, or None if there is no next page.
+        """
+        if after is None:
+            return None
+        return base64.urlsafe_b64encode(json.dumps({'after': after}).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """
+        Unwraps a cursor made by encode_cursor.
+
+        Parameters:
+        - cursor (str): The cursor from the query string, or None.
+
+        Returns:
+        - str: The last name of the previous page, or None for the first page.
+
+        Raises:
+        - ValueError: If the cursor was not made by encode_cursor.
+        """
+        if not cursor:
+            return None
+        try:
+            after = json.loads(base64.urlsafe_b64decode(cursor.encode()))['after']
+        except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError, KeyError, TypeError):
+            raise ValueError("Invalid cursor")
+        if not isinstance(after, str):
+            raise ValueError("Invalid cursor")
+        return after
+
     def run(self):
         """
         This method starts the Flask application on the local machine.
     
-        The application will be accessible on port '5000'.
+        The application will be accessible on port '5000'.  This is Flask's 
+        single-process development server; production deployments serve 
+        wsgi.app through Gunicorn using gunicorn.conf.py instead.
         """
-        print("Listening at '0.0.0.0:5000'...")
+        http_logger.info("Listening at '0.0.0.0:%s'...", os.environ.get('PORT', 5000))
         self.app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
     
 if __name__ == '__main__':      
+    configure_logging()
     my_dal = DAL()
     my_bl = BusinessLogic(my_dal)
     my_bl.run()
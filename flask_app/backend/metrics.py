@@ -0,0 +1,246 @@
+"""
+This file contains the metrics collected by the meal planning back-end and
+their rendering in the Prometheus text exposition format.
+
+It includes:
+- Counter, Gauge and Histogram Classes
+- Metrics Registry Class
+- The registry and metrics shared by the DAL and the Business Logic
+
+Metrics are kept per process.  When the application runs under several
+Gunicorn workers each worker reports its own series, so scrape the workers
+individually or sum the series across them.
+"""
+
+import threading
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(label_names, label_values, extra=()):
+    pairs = list(zip(label_names, label_values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class _Metric:
+    """Shared bookkeeping for a labelled metric family."""
+    kind = ''
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def labels(self, *label_values):
+        """
+        Returns the series of this metric for the given label values.
+
+        Parameters:
+        - label_values (str): One value per label name, in order.
+
+        Returns:
+        - The child series, created on first use.
+        """
+        if len(label_values) != len(self.label_names):
+            raise ValueError(f"{self.name} takes labels {self.label_names}")
+        key = tuple(str(value) for value in label_values)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = self._new_series()
+            return series
+
+    def render(self):
+        """Returns the metric family in the text exposition format."""
+        lines = [f'# HELP {self.name} {self.documentation}',
+                 f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            series = sorted(self._series.items())
+        for label_values, child in series:
+            lines.extend(self._render_series(label_values, child))
+        return lines
+
+class _Value:
+    """A single number guarded by a lock."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value):
+        with self._lock:
+            self.value = value
+
+class Counter(_Metric):
+    """A labelled count that only goes up."""
+    kind = 'counter'
+
+    def _new_series(self):
+        return _Value()
+
+    def _render_series(self, label_values, child):
+        return [f'{self.name}{_format_labels(self.label_names, label_values)} {_format_value(child.value)}']
+
+class Gauge(Counter):
+    """A labelled value that can go up and down."""
+    kind = 'gauge'
+
+class _HistogramSeries:
+    """Bucket counts, sum and count of one labelled histogram series."""
+
+    def __init__(self, buckets):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, amount):
+        with self._lock:
+            self.sum += amount
+            self.count += 1
+            for index, bound in enumerate(self.buckets):
+                if amount <= bound:
+                    self.counts[index] += 1
+                    break
+
+class Histogram(_Metric):
+    """A labelled distribution of observations, such as latencies."""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def _new_series(self):
+        return _HistogramSeries(self.buckets)
+
+    def _render_series(self, label_values, child):
+        with child._lock:
+            counts, total, count = list(child.counts), child.sum, child.count
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.label_names, label_values, [('le', _format_value(bound))])
+            lines.append(f'{self.name}_bucket{labels} {cumulative}')
+        labels = _format_labels(self.label_names, label_values)
+        lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+        lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+class MetricsRegistry:
+    """
+    A collection of metric families rendered together.
+
+    Methods:
+    - register: Adds a metric family and returns it
+    - render: Returns every family in the text exposition format
+    """
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        """
+        Adds a metric family to the registry.
+
+        Parameters:
+        - metric (Counter, Gauge or Histogram): The family to add.
+
+        Returns:
+        - The same family, for assignment at module level.
+        """
+        self._metrics.append(metric)
+        return metric
+
+    def render(self, extra_lines=()):
+        """
+        Renders every registered family.
+
+        Parameters:
+        - extra_lines (list, optional): Already formatted lines to append,
+          for values sampled at scrape time.
+
+        Returns:
+        - str: The text exposition document.
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        lines.extend(extra_lines)
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    'http_requests_total', 'HTTP requests by method, route and status.',
+    ('method', 'route', 'status')))
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'http_request_duration_seconds', 'Time spent handling HTTP requests.',
+    ('method', 'route')))
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.register(Gauge(
+    'http_requests_in_flight', 'HTTP requests currently being handled.',
+    ('route',)))
+DB_PROCEDURE_SECONDS = REGISTRY.register(Histogram(
+    'db_procedure_duration_seconds', 'Time spent in stored procedure calls, including fetching results.',
+    ('procedure',)))
+DB_PROCEDURE_ERRORS = REGISTRY.register(Counter(
+    'db_procedure_errors_total', 'Stored procedure calls that raised a database error.',
+    ('procedure',)))
+
+# The lifetime totals in the statistics of the pool, the read cache and the
+# call tracer, exported as counters instead of gauges
+POOL_COUNTERS = frozenset({'created', 'closed', 'borrowed', 'waits', 'timeouts',
+                           'failed_pings', 'expired'})
+CACHE_COUNTERS = frozenset({'hits', 'misses', 'evictions', 'expirations',
+                            'invalidations'})
+TRACE_COUNTERS = frozenset({'calls', 'slow_calls', 'dropped_explains'})
+
+def render_samples(name, documentation, values, counters=frozenset()):
+    """
+    Formats a family of unlabelled values sampled at scrape time.
+
+    Parameters:
+    - name (str): The metric name prefix.
+    - documentation (str): The help text.
+    - values (dict): Suffixes mapped to numbers, non numeric values are skipped.
+    - counters (set, optional): The suffixes whose values only ever grow.
+      They are typed counter and named with a _total suffix, the others are
+      point-in-time values typed gauge. Defaults to none.
+
+    Returns:
+    - list: The formatted lines.
+    """
+    lines = []
+    for suffix, value in sorted(values.items()):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        if suffix in counters:
+            metric_name, kind = f'{name}_{suffix}_total', 'counter'
+        else:
+            metric_name, kind = f'{name}_{suffix}', 'gauge'
+        lines.append(f'# HELP {metric_name} {documentation}')
+        lines.append(f'# TYPE {metric_name} {kind}')
+        lines.append(f'{metric_name} {_format_value(value)}')
+    return lines
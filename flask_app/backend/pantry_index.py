@@ -0,0 +1,165 @@
+"""
+This file contains the pantry index the meal planning back-end uses to find
+the recipes a user can cook with the ingredients they have on hand, and the
+recipes that use given ingredients.
+
+It includes:
+- Pantry Index Class
+
+Each of the user's ingredients gets a bit, numbered by its place in the
+user's list, and each recipe becomes an integer with the bits of its
+ingredients set.  A user has at most 500 ingredients, so a recipe fits in a
+few machine words and matching a pantry against a recipe is one AND and one
+bit count instead of a GetMealIngredients call per recipe.
+
+The index also keeps, for each ingredient, the sorted array of the places
+of the recipes that use it in the alphabetical list of recipes.  Recipes
+using all of several ingredients are the intersection of their arrays,
+found by binary searching the longer arrays for the entries of the
+shortest, and recipes using any of them are the union.
+
+An index is immutable once built, so the DAL keeps it in the read cache,
+which drops it whenever the user's library changes.
+"""
+
+import bisect
+import heapq
+from array import array
+
+class PantryIndex:
+    """
+    A user's recipes encoded as bitsets over the user's ingredients.
+
+    Instantiation parameters:
+    - ingredients: An (id, name) tuple per ingredient of the user
+    - pairings: A (recipe name, ingredient id) tuple per ingredient of each
+      of the user's recipes
+
+    Methods:
+    - match: Returns the recipes best covered by a pantry
+    - recipes_using: Returns the recipes that use all or any of some
+      ingredients
+    """
+    def __init__(self, ingredients, pairings):
+        self._names = []
+        self._bits = {}
+        bit_of_id = {}
+        for ingredient_id, ingredient_name in ingredients:
+            bit_of_id[ingredient_id] = len(self._names)
+            self._bits[ingredient_name.casefold()] = len(self._names)
+            self._names.append(ingredient_name)
+
+        masks = {}
+        for recipe_name, ingredient_id in pairings:
+            masks[recipe_name] = masks.get(recipe_name, 0) | 1 << bit_of_id[ingredient_id]
+        self._recipes = sorted(masks, key=str.casefold)
+        self._masks = [masks[recipe_name] for recipe_name in self._recipes]
+        self._sizes = [mask.bit_count() for mask in self._masks]
+
+        # Filled in recipe order, so each array comes out sorted
+        self._postings = [array('I') for _ in self._names]
+        for position, mask in enumerate(self._masks):
+            while mask:
+                low = mask & -mask
+                self._postings[low.bit_length() - 1].append(position)
+                mask ^= low
+
+    def __len__(self):
+        return len(self._recipes)
+
+    def match(self, ingredient_names, limit=20, max_missing=None):
+        """
+        Returns the recipes that use at least one of the ingredients on
+        hand, the ones that can be made first and then by fewest missing
+        ingredients, most ingredients on hand and name.
+
+        Parameters:
+        - ingredient_names (list): The names of the ingredients on hand,
+          in any case.
+        - limit (int, optional): The most recipes returned. Defaults to 20.
+        - max_missing (int, optional): Leave out the recipes missing more
+          ingredients than this. Defaults to None, for no bound.
+
+        Returns:
+        - list: A (recipe name, ingredients on hand, missing ingredient
+          names) tuple per recipe, best first.
+        - list: The ingredient names that are not in the user's library.
+        """
+        pantry = 0
+        unknown = []
+        for ingredient_name in ingredient_names:
+            bit = self._bits.get(ingredient_name.strip().casefold())
+            if bit is None:
+                unknown.append(ingredient_name)
+            else:
+                pantry |= 1 << bit
+        if max_missing is None:
+            max_missing = len(self._names)
+
+        candidates = []
+        for recipe_name, mask, size in zip(self._recipes, self._masks, self._sizes):
+            on_hand = (mask & pantry).bit_count()
+            if on_hand and size - on_hand <= max_missing:
+                candidates.append((size - on_hand, -on_hand, recipe_name, mask))
+
+        matches = []
+        # Recipe names are unique, so ties never compare the masks
+        for missing_count, on_hand, recipe_name, mask in heapq.nsmallest(limit, candidates):
+            matches.append((recipe_name, -on_hand, self._decode(mask & ~pantry)))
+        return matches, unknown
+
+    def recipes_using(self, ingredient_names, match_all=True):
+        """
+        Returns the recipes that use all, or any, of some ingredients.
+
+        Parameters:
+        - ingredient_names (list): The names of the ingredients, in any
+          case.
+        - match_all (bool, optional): Whether a recipe has to use every
+          ingredient rather than at least one. Defaults to True.
+
+        Returns:
+        - list: The names of the recipes, in alphabetical order.
+        - list: The ingredient names that are not in the user's library.
+        """
+        postings = []
+        unknown = []
+        for ingredient_name in ingredient_names:
+            bit = self._bits.get(ingredient_name.strip().casefold())
+            if bit is None:
+                unknown.append(ingredient_name)
+            else:
+                postings.append(self._postings[bit])
+        if not postings or (match_all and unknown):
+            return [], unknown
+
+        if match_all:
+            postings.sort(key=len)
+            positions = postings[0]
+            for posting in postings[1:]:
+                positions = _intersect(positions, posting)
+        else:
+            positions = sorted(set().union(*postings))
+        return [self._recipes[position] for position in positions], unknown
+
+    def _decode(self, mask):
+        # The names of the ingredients whose bits are set, in bit order
+        names = []
+        while mask:
+            low = mask & -mask
+            names.append(self._names[low.bit_length() - 1])
+            mask ^= low
+        return names
+
+def _intersect(shorter, longer):
+    # Binary searches the longer sorted array for each entry of the
+    # shorter, never looking behind the last entry found
+    found = []
+    low = 0
+    for position in shorter:
+        low = bisect.bisect_left(longer, position, low)
+        if low == len(longer):
+            break
+        if longer[low] == position:
+            found.append(position)
+    return found
@@ -0,0 +1,212 @@
+"""
+This file contains the in-process read cache used by the meal planning
+back-end.
+
+It includes:
+- Read Cache Class
+- cached_read decorator for DAL read methods
+- invalidates decorator for DAL write methods
+
+Entries are keyed by (user id, method name, arguments) so each user's
+library is cached independently, and every write a user makes drops all of
+that user's entries.  Each entry remembers the user's library version from
+when it was loaded; the versions sit in shared memory, so when the cache is
+created before worker processes fork a write in one worker also retires the
+entries cached by every other worker.
+"""
+
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+
+from library_versions import LibraryVersions
+
+class ReadCache:
+    """
+    A thread safe LRU cache with a time to live, partitioned by user.
+
+    Instantiation parameters:
+    - max_entries: The most entries kept before the least recently used is
+      evicted, 0 disables caching
+    - ttl: Seconds an entry stays valid
+    - versions: The library versions entries are checked against, a new
+      LibraryVersions by default
+
+    Methods:
+    - get_or_load: Returns a cached value or loads and stores it
+    - invalidate_user: Drops every entry belonging to a user
+    - clear: Drops every entry
+    - get_stats: Returns hit, miss and eviction counters
+    """
+    def __init__(self, max_entries=10000, ttl=300, versions=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.versions = versions if versions is not None else LibraryVersions()
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._user_keys = {}
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    def get_or_load(self, user_id, method, args, loader):
+        """
+        Returns the cached result of a read, loading it on a miss.
+
+        Error results (messages and exceptions returned by the DAL) are passed
+        through without being cached.  A load that overlaps a write for the
+        same user is not stored, so it cannot resurrect invalidated data.
+
+        Parameters:
+        - user_id (int): The user the read belongs to.
+        - method (str): The name of the DAL method.
+        - args (tuple): The hashable arguments of the read.
+        - loader (callable): Performs the read on a miss.
+
+        Returns:
+        - The cached or freshly loaded result.
+        """
+        if self.max_entries <= 0:
+            return loader()
+
+        key = (user_id, method, args)
+        version = self.versions.get_version(user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, entry_version, value = entry
+                if entry_version != version:
+                    self._invalidations += 1
+                    self._remove(key)
+                elif expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return _copy(value)
+                else:
+                    self._expirations += 1
+                    self._remove(key)
+            self._misses += 1
+
+        value = loader()
+        if isinstance(value, (str, Exception)):
+            return value
+
+        with self._lock:
+            if self.versions.get_version(user_id) == version:
+                self._entries[key] = (time.monotonic() + self.ttl, version, _copy(value))
+                self._entries.move_to_end(key)
+                self._user_keys.setdefault(user_id, set()).add(key)
+                while len(self._entries) > self.max_entries:
+                    oldest = next(iter(self._entries))
+                    self._remove(oldest)
+                    self._evictions += 1
+        return value
+
+    def invalidate_user(self, user_id):
+        """
+        Drops every entry belonging to a user.
+
+        Parameters:
+        - user_id (int): The user whose library changed.
+        """
+        self.versions.bump(user_id)
+        with self._lock:
+            self._invalidations += 1
+            for key in self._user_keys.pop(user_id, ()):
+                self._entries.pop(key, None)
+
+    def clear(self):
+        """Drops every entry held by this process."""
+        with self._lock:
+            self._entries.clear()
+            self._user_keys.clear()
+
+    def get_stats(self):
+        """
+        Returns counters describing the cache.
+
+        Returns:
+        - dict: Configuration, current size and lifetime counters.
+        """
+        with self._lock:
+            return {
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'entries': len(self._entries),
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'invalidations': self._invalidations,
+            }
+
+    def _remove(self, key):
+        self._entries.pop(key, None)
+        user_keys = self._user_keys.get(key[0])
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._user_keys[key[0]]
+
+def _copy(value):
+    # Copies the lists, dicts and sets a result is built from, including
+    # those nested in tuples, so a caller mutating its result cannot change
+    # the cached entry.  Anything else is an immutable value or an index
+    # that is never changed once built, and is shared.
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    if isinstance(value, tuple):
+        items = tuple(_copy(item) for item in value)
+        # Tuples of immutable values are kept as they are
+        return value if all(item is original for item, original in zip(items, value)) else items
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+    if isinstance(value, set):
+        return set(value)
+    return value
+
+def _split_user_id(signature, instance, args, kwargs):
+    bound = signature.bind(instance, *args, **kwargs)
+    bound.apply_defaults()
+    arguments = dict(bound.arguments)
+    del arguments['self']
+    user_id = arguments.pop('user_id')
+    return user_id, tuple(arguments.items())
+
+def cached_read(method):
+    """
+    Decorates a DAL read method taking a user_id argument so that its results
+    are served from the instance's read cache, except inside a batch.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        # Inside a batch a read may see the batch's uncommitted writes, 
+        # which other requests must not be served
+        if getattr(getattr(self, '_local', None), 'batch', None) is not None:
+            return method(self, *args, **kwargs)
+        user_id, key_args = _split_user_id(signature, self, args, kwargs)
+        return self.cache.get_or_load(user_id, method.__name__, key_args,
+                                      lambda: method(self, *args, **kwargs))
+    return wrapper
+
+def invalidates(method):
+    """
+    Decorates a DAL write method taking a user_id argument so that the user's
+    cached reads are dropped once it has run.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        user_id, _ = _split_user_id(signature, self, args, kwargs)
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self.cache.invalidate_user(user_id)
+    return wrapper
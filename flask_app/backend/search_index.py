@@ -0,0 +1,422 @@
+"""
+This file contains the in-process search index used by the meal planning
+back-end.
+
+It includes:
+- Search Index Class, serving word searches, name completions and
+  resolutions of mistyped names
+- indexes decorator for DAL write methods
+- tokenize function
+
+Each user gets an inverted index from the words of their cookbook, recipe
+and ingredient names to the names containing them, built from the database
+the first time the user searches.  A search looks its words up in the index
+instead of scanning the tables with LIKE, so it costs a few dictionary and
+binary search lookups however large the library is.  Each index also keeps
+the lower case names of each kind in a sorted list, sharing the strings of
+the inverted index, so completing a typed prefix is a binary search followed
+by reading the next few names.  The first time a mistyped name of a kind is
+resolved, the lower case names of that kind are also put in a BK-tree, which
+finds the names closest to it by edit distance without comparing it to all
+of them.
+
+The DAL writes keep a user's index up to date by adding and removing the
+names they change.  Like the read cache, each index remembers the user's
+library version from when it was last brought up to date; an index that
+missed a write, such as one handled by another worker process or rolled
+back with a batch, no longer matches the version and is rebuilt.
+"""
+
+import bisect
+import functools
+import heapq
+import inspect
+import itertools
+import re
+import threading
+from collections import OrderedDict
+
+from bk_tree import BKTree
+from library_versions import LibraryVersions
+
+KINDS = ('recipe', 'cookbook', 'ingredient')
+
+# Score of a query word matching a whole word of a name, and a prefix of one
+EXACT_WORD_SCORE = 2
+PREFIX_WORD_SCORE = 1
+
+_WORD_PATTERN = re.compile(r'\w+')
+
+def tokenize(text):
+    """
+    Splits a name or a query into lower case words.
+
+    Parameters:
+    - text (str): The text to split.
+
+    Returns:
+    - list: The words of the text, in order.
+    """
+    return _WORD_PATTERN.findall(text.casefold())
+
+def _key(kind, name):
+    # Names are unique per user ignoring case, like the database's collation
+    return (kind, name.strip().casefold())
+
+class _UserIndex:
+    """
+    The inverted index of one user's library.
+    """
+    def __init__(self, version):
+        self.version = version
+        # The display name, words and tie breaking rank of each name
+        self.names = {}
+        self.postings = {}
+        self.words = []
+        self.sorted_names = {kind: [] for kind in KINDS}
+        # Built on the first resolution of a kind
+        self.trees = {}
+
+    def add(self, kind, name):
+        key = _key(kind, name)
+        if key in self.names:
+            return
+        words = tokenize(name)
+        self.names[key] = (name.strip(), ' '.join(words), (len(key[1]), KINDS.index(kind), key[1]))
+        bisect.insort(self.sorted_names[kind], key[1])
+        if kind in self.trees:
+            self.trees[kind].add(key[1])
+        for word in set(words):
+            posting = self.postings.get(word)
+            if posting is None:
+                posting = self.postings[word] = set()
+                bisect.insort(self.words, word)
+            posting.add(key)
+
+    def remove(self, kind, name):
+        key = _key(kind, name)
+        entry = self.names.pop(key, None)
+        if entry is None:
+            return
+        sorted_names = self.sorted_names[kind]
+        del sorted_names[bisect.bisect_left(sorted_names, key[1])]
+        if kind in self.trees:
+            self.trees[kind].remove(key[1])
+        for word in set(entry[1].split()):
+            posting = self.postings[word]
+            posting.discard(key)
+            if not posting:
+                del self.postings[word]
+                del self.words[bisect.bisect_left(self.words, word)]
+
+    def match(self, word):
+        """Returns the postings of a word and of the longer words it starts."""
+        exact = self.postings.get(word, frozenset())
+        prefixed = []
+        position = bisect.bisect_left(self.words, word)
+        while position < len(self.words) and self.words[position].startswith(word):
+            if self.words[position] != word:
+                prefixed.append(self.postings[self.words[position]])
+            position += 1
+        return exact, prefixed
+
+    def search(self, words, kinds, limit):
+        matches = []
+        for word in set(words):
+            exact, prefixed = self.match(word)
+            matches.append((len(exact) + sum(len(posting) for posting in prefixed), exact, prefixed))
+        if not matches:
+            return []
+        # Every word of the query has to match, so start from the rarest and 
+        # only look the candidates up in the postings of the others
+        matches.sort(key=lambda match: match[0])
+        _, exact, prefixed = matches[0]
+        scores = {key: EXACT_WORD_SCORE for key in exact if key[0] in kinds}
+        for posting in prefixed:
+            for key in posting:
+                if key[0] in kinds:
+                    scores.setdefault(key, PREFIX_WORD_SCORE)
+        for _, exact, prefixed in matches[1:]:
+            narrowed = {}
+            for key, score in scores.items():
+                if key in exact:
+                    narrowed[key] = score + EXACT_WORD_SCORE
+                elif any(key in posting for posting in prefixed):
+                    narrowed[key] = score + PREFIX_WORD_SCORE
+            scores = narrowed
+        query = ' '.join(words)
+        best = heapq.nsmallest(limit, ((-score, self.names[key][1] != query, self.names[key][2], key)
+                                       for key, score in scores.items()))
+        return [(key[0], self.names[key][0]) for _, _, _, key in best]
+
+    def complete(self, prefix, kinds, limit):
+        completions = []
+        for kind in kinds:
+            sorted_names = self.sorted_names[kind]
+            position = bisect.bisect_left(sorted_names, prefix)
+            for name in itertools.islice(sorted_names, position, position + limit):
+                if not name.startswith(prefix):
+                    break
+                completions.append((name, kind))
+        completions.sort()
+        return [(kind, self.names[(kind, name)][0]) for name, kind in completions[:limit]]
+
+    def resolve(self, name, kind, max_distance, limit):
+        tree = self.trees.get(kind)
+        if tree is None:
+            tree = self.trees[kind] = BKTree(self.sorted_names[kind])
+        return [(self.names[(kind, match)][0], distance) 
+                for distance, match in tree.search(name, max_distance, limit)]
+
+class SearchIndex:
+    """
+    A thread safe LRU of per-user inverted indexes over the names of their
+    cookbooks, recipes and ingredients.
+
+    Instantiation parameters:
+    - max_users: The most user indexes kept before the least recently used
+      is dropped, 0 builds an index for every search without keeping it
+    - versions: The library versions indexes are checked against, a new
+      LibraryVersions by default
+
+    Methods:
+    - search: Returns the names matching a query, best first
+    - complete: Returns the names starting with a prefix, in order
+    - resolve: Returns the names of a kind closest to a mistyped name
+    - update: Applies a write to a user's index
+    - invalidate_user: Drops a user's index
+    - clear: Drops every index
+    - get_stats: Returns build and search counters
+    """
+    def __init__(self, max_users=1000, versions=None):
+        self.max_users = max_users
+        self.versions = versions if versions is not None else LibraryVersions()
+        self._lock = threading.Lock()
+        self._indexes = OrderedDict()
+        self._searches = 0
+        self._completions = 0
+        self._resolutions = 0
+        self._builds = 0
+        self._updates = 0
+        self._evictions = 0
+
+    def search(self, user_id, query, loader, limit=20, kinds=KINDS):
+        """
+        Returns the names whose words match every word of a query, building
+        the user's index on the first search.
+
+        A query word matches a word of a name that equals it or starts with
+        it.  Names matching more words whole rank first, then names equal to
+        the query, then shorter names.
+
+        Parameters:
+        - user_id (int): The user whose library is searched.
+        - query (str): The words to look for.
+        - loader (callable): Returns a dictionary of the user's names per
+          kind, or an error message, when the index has to be built.
+        - limit (int, optional): The most results returned. Defaults to 20.
+        - kinds (tuple, optional): The kinds of names searched. Defaults to
+          all of them.
+
+        Returns:
+        - list: A (kind, name) tuple per match, best first.
+        - str or Exception: The loader's error if the index could not be
+          built.
+        """
+        words = tokenize(query)
+        with self._lock:
+            self._searches += 1
+        return self._query(user_id, loader, lambda index: index.search(words, kinds, limit))
+
+    def complete(self, user_id, prefix, loader, limit=10, kinds=KINDS):
+        """
+        Returns the names that start with a prefix, ignoring case, in 
+        alphabetical order, building the user's index on the first call.
+
+        Parameters:
+        - user_id (int): The user whose library is searched.
+        - prefix (str): The start of the names, as typed so far.
+        - loader (callable): Returns a dictionary of the user's names per
+          kind, or an error message, when the index has to be built.
+        - limit (int, optional): The most completions returned. Defaults to 
+          10.
+        - kinds (tuple, optional): The kinds of names completed. Defaults to
+          all of them.
+
+        Returns:
+        - list: A (kind, name) tuple per completion, in order.
+        - str or Exception: The loader's error if the index could not be
+          built.
+        """
+        prefix = prefix.lstrip().casefold()
+        with self._lock:
+            self._completions += 1
+        return self._query(user_id, loader, lambda index: index.complete(prefix, kinds, limit))
+
+    def resolve(self, user_id, name, loader, max_distance=2, limit=5, kind='recipe'):
+        """
+        Returns the names of a kind closest to a possibly mistyped name by 
+        edit distance, ignoring case, building the user's index on the first 
+        call.
+
+        Parameters:
+        - user_id (int): The user whose library is searched.
+        - name (str): The name as typed.
+        - loader (callable): Returns a dictionary of the user's names per
+          kind, or an error message, when the index has to be built.
+        - max_distance (int, optional): The most characters inserted, 
+          deleted or substituted to reach a name. Defaults to 2.
+        - limit (int, optional): The most names returned. Defaults to 5.
+        - kind (str, optional): The kind of names resolved. Defaults to 
+          'recipe'.
+
+        Returns:
+        - list: A (name, distance) tuple per match, closest first, ties in 
+          alphabetical order.
+        - str or Exception: The loader's error if the index could not be
+          built.
+        """
+        name = name.strip().casefold()
+        with self._lock:
+            self._resolutions += 1
+        return self._query(user_id, loader, lambda index: index.resolve(name, kind, max_distance, limit))
+
+    def _query(self, user_id, loader, run):
+        """Runs a lookup on the user's index, building it if needed."""
+        version = self.versions.get_version(user_id)
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is not None and index.version == version:
+                self._indexes.move_to_end(user_id)
+                return run(index)
+
+        documents = loader()
+        if isinstance(documents, (str, Exception)):
+            return documents
+        index = _UserIndex(version)
+        for kind, names in documents.items():
+            for name in names:
+                index.add(kind, name)
+
+        with self._lock:
+            self._builds += 1
+            # A build that overlapped a write may have missed it
+            if self.max_users > 0 and self.versions.get_version(user_id) == version:
+                self._indexes[user_id] = index
+                self._indexes.move_to_end(user_id)
+                while len(self._indexes) > self.max_users:
+                    self._indexes.popitem(last=False)
+                    self._evictions += 1
+            return run(index)
+
+    def update(self, user_id, version, added, removed):
+        """
+        Applies a write to a user's index, which is dropped instead if it
+        may have missed another write.
+
+        Parameters:
+        - user_id (int): The user who wrote to their library.
+        - version (int): The user's library version before the write, which
+          bumped it once.
+        - added (dict): The names the write created, per kind.
+        - removed (dict): The names the write deleted, per kind.
+        """
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is None:
+                return
+            if index.version != version or self.versions.get_version(user_id) != version + 1:
+                del self._indexes[user_id]
+                return
+            for kind, names in removed.items():
+                for name in names:
+                    index.remove(kind, name)
+            for kind, names in added.items():
+                for name in names:
+                    index.add(kind, name)
+            index.version = version + 1
+            self._updates += 1
+
+    def invalidate_user(self, user_id):
+        """
+        Drops a user's index.
+
+        Parameters:
+        - user_id (int): The user whose index is dropped.
+        """
+        with self._lock:
+            self._indexes.pop(user_id, None)
+
+    def clear(self):
+        """Drops every index held by this process."""
+        with self._lock:
+            self._indexes.clear()
+
+    def get_stats(self):
+        """
+        Returns counters describing the indexes.
+
+        Returns:
+        - dict: Configuration, current size and lifetime counters.
+        """
+        with self._lock:
+            return {
+                'max_users': self.max_users,
+                'users': len(self._indexes),
+                'names': sum(len(index.names) for index in self._indexes.values()),
+                'searches': self._searches,
+                'completions': self._completions,
+                'resolutions': self._resolutions,
+                'builds': self._builds,
+                'updates': self._updates,
+                'evictions': self._evictions,
+            }
+
+def _names(changes, arguments, result):
+    names = {}
+    for kind, source in changes.items():
+        value = source(arguments, result) if callable(source) else arguments[source]
+        names[kind] = [value] if isinstance(value, str) else [name for name in value if isinstance(name, str)]
+    return names
+
+def indexes(added=None, removed=None):
+    """
+    Decorates a DAL write method taking a user_id argument so that the
+    names it changes are applied to the user's search index.  It goes above
+    the invalidates decorator, whose version bump it expects, and reads the
+    error the DAL's call_procedure notes on the thread.
+
+    A write that fails leaves the library as it was, so only the bump is
+    applied.  A write that changes no names, such as a pairing, is decorated
+    without arguments to keep the index from being rebuilt after it.
+
+    Parameters:
+    - added (dict, optional): The argument holding the name or list of names
+      the write creates, per kind, or a callable taking the bound arguments
+      and the result and returning them.
+    - removed (dict, optional): The same for the names the write deletes.
+    """
+    added = added or {}
+    removed = removed or {}
+
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            user_id = bound.arguments['user_id']
+            version = self.search_index.versions.get_version(user_id)
+            self._local.error = None
+            result = method(self, *args, **kwargs)
+            # Some DAL writes log their errors and return None either way, 
+            # so the error call_procedure notes is checked as well
+            if (result is None or isinstance(result, list)) and self._local.error is None:
+                self.search_index.update(user_id, version, _names(added, bound.arguments, result),
+                                         _names(removed, bound.arguments, result))
+            else:
+                self.search_index.update(user_id, version, {}, {})
+            return result
+        return wrapper
+    return decorator
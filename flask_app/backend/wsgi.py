@@ -0,0 +1,20 @@
+"""
+This file contains the production entry point of the meal planning back-end.
+
+It includes:
+- An instance of the DAL to be used on the backend
+- An instance of the Business Logic that uses the instance of the DAL
+- The Flask application of that Business Logic, for any WSGI server
+
+To serve the application with several worker processes, each running several
+threads, run `gunicorn -c gunicorn.conf.py wsgi:app` in this directory.  The
+settings in gunicorn.conf.py are read from the environment.
+"""
+
+from meal_planning_backend import DAL, BusinessLogic
+from logging_setup import configure_logging
+
+configure_logging()
+my_dal = DAL()
+my_bl = BusinessLogic(my_dal)
+app = my_bl.app
@@ -0,0 +1,77 @@
+"""
+This file benchmarks recipe validation against a growing recipe library.
+
+It compares:
+- The old check, which downloads every recipe name and scans the list
+- DAL.recipe_exists, a single primary key lookup
+
+A throwaway user is created and filled with recipes inserted directly into
+the Recipe relation (bypassing the per-user cap of AddRecipe), then deleted
+again at the end, which cascades to its recipes.  Both checks are timed
+without the DAL read cache, which would otherwise answer every repeat after
+the first, and the raw inserts drop the user's cached reads.
+
+To run the benchmark set DB_USER and DB_PASSWORD as for the backend and run
+`python exists_benchmark.py` from this directory.  The lookup column should
+stay flat as the library grows while the scan column grows with it.
+"""
+
+import os, statistics, sys, time
+
+# Add the backend directory to the system path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from meal_planning_backend import DAL
+
+BENCH_EMAIL = 'exists-benchmark@example.com'
+LIBRARY_SIZES = [100, 1000, 10000, 50000]
+REPEATS = 50
+
+def time_call(function):
+    """Return the median wall time of a call in milliseconds."""
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def grow_library(dal, user_id, current_size, new_size):
+    """Insert recipes until the user owns new_size of them."""
+    rows = [(f'Benchmark Recipe {n:06d}', 2, False, user_id)
+            for n in range(current_size, new_size)]
+    with dal.pool.connection() as connector:
+        cursor = connector.cursor()
+        cursor.executemany("INSERT INTO Recipe (RecipeName, TotalServings, IsOnline, UserId) "
+                           "VALUES (%s, %s, %s, %s)", rows)
+        cursor.close()
+        connector.commit()
+    # The inserts bypass the DAL writes, so retire the user's cached reads
+    dal.cache.invalidate_user(user_id)
+
+def main():
+    dal = DAL()
+    dal.delete_user(BENCH_EMAIL)
+    dal.add_user(BENCH_EMAIL, 'benchmark', 'Bench', 'Mark')
+    user_id = dal.get_user_info(BENCH_EMAIL)[0]
+
+    print(f"{'recipes':>8} {'scan (ms)':>10} {'lookup (ms)':>12}")
+    try:
+        size = 0
+        for new_size in LIBRARY_SIZES:
+            grow_library(dal, user_id, size, new_size)
+            size = new_size
+            target = f'Benchmark Recipe {size - 1:06d}'
+            # The undecorated methods, so every repeat reaches the database
+            get_recipe_names = DAL.get_recipe_names.__wrapped__
+            recipe_exists = DAL.recipe_exists.__wrapped__
+            assert target in get_recipe_names(dal, user_id)
+            assert recipe_exists(dal, target, user_id) is True
+            scan = time_call(lambda: target in get_recipe_names(dal, user_id))
+            lookup = time_call(lambda: recipe_exists(dal, target, user_id))
+            print(f"{size:>8} {scan:>10.3f} {lookup:>12.3f}")
+    finally:
+        dal.delete_user(BENCH_EMAIL)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+This file benchmarks resolving a mistyped recipe name against a growing
+recipe library.
+
+It compares:
+- Brute force, which computes the edit distance to every recipe name
+- BKTree.search, which only visits the part of the tree within range
+
+The library is made of generated recipe names and every query is one of
+them with a typo, so nothing touches the database.
+
+To run the benchmark run `python fuzzy_benchmark.py` from this directory.
+The brute force columns grow with the library while the tree's grow much
+more slowly.
+"""
+
+import os, random, statistics, sys, time
+
+# Add the backend directory to the system path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from bk_tree import BKTree, levenshtein
+
+LIBRARY_SIZES = [1000, 5000, 20000, 50000]
+QUERIES = 50
+MAX_DISTANCE = 2
+LIMIT = 5
+
+STYLES = ['Grilled', 'Roasted', 'Spicy', 'Creamy', 'Smoked', 'Baked', 'Crispy',
+          'Lemon', 'Garlic', 'Honey', 'Braised', 'Sheet Pan', 'Slow Cooker']
+MAINS = ['Chicken', 'Beef', 'Pork', 'Salmon', 'Shrimp', 'Tofu', 'Lentil', 'Turkey',
+         'Chickpea', 'Mushroom', 'Cauliflower', 'Sweet Potato', 'Black Bean']
+DISHES = ['Curry', 'Tacos', 'Soup', 'Stew', 'Salad', 'Pasta', 'Burgers', 'Chili',
+          'Stir Fry', 'Casserole', 'Risotto', 'Enchiladas', 'Noodles', 'Bowls']
+
+def recipe_names(count, rng):
+    """Return count distinct generated recipe names."""
+    names = set()
+    while len(names) < count:
+        name = f'{rng.choice(STYLES)} {rng.choice(MAINS)} {rng.choice(DISHES)}'
+        names.add(name if len(names) < len(STYLES) * len(MAINS) * len(DISHES)
+                  else f'{name} {rng.randint(2, 99999)}')
+    return sorted(name.casefold() for name in names)
+
+def typo(name, rng):
+    """Drop, double or swap one character of a name."""
+    position = rng.randrange(1, len(name) - 1)
+    return rng.choice([name[:position] + name[position + 1:],
+                       name[:position] + name[position] + name[position:],
+                       name[:position - 1] + name[position] + name[position - 1] + name[position + 1:]])
+
+def brute_force(names, query):
+    """Return the closest names by computing every distance."""
+    matches = []
+    for name in names:
+        distance = levenshtein(query, name, MAX_DISTANCE)
+        if distance <= MAX_DISTANCE:
+            matches.append((distance, name))
+    return sorted(matches)[:LIMIT]
+
+def time_queries(function, queries):
+    """Return the median wall time of a query in milliseconds."""
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        function(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def main():
+    rng = random.Random(42)
+    print(f"{'recipes':>8} {'brute (ms)':>11} {'tree (ms)':>10} {'distances':>10}")
+    for size in LIBRARY_SIZES:
+        names = recipe_names(size, rng)
+        # Built from the sorted names, like the search index builds it
+        tree = BKTree(names)
+        queries = [typo(rng.choice(names), rng) for _ in range(QUERIES)]
+        comparisons = []
+        def search(query):
+            tree.search(query, MAX_DISTANCE, LIMIT)
+            comparisons.append(tree.comparisons)
+        for query in queries:
+            assert tree.search(query, MAX_DISTANCE, LIMIT) == brute_force(names, query)
+        brute = time_queries(lambda query: brute_force(names, query), queries)
+        bk = time_queries(search, queries)
+        print(f"{size:>8} {brute:>11.3f} {bk:>10.3f} {statistics.median(comparisons):>10.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+    A class to test the BatchConnection class and the DAL batch methods.
+
+    Fixtures
+    ----------
+    - connector - A mocked pooled connection
+    - dal - A DAL whose pool hands out the mocked connection
+
+    Tested Methods
+    --------------
+    - BatchConnection.commit
+    - BatchConnection.run
+    - BatchConnection.finish
+    - DAL.connection
+    - DAL.batch
+"""
+
+import pytest, sys, os, contextlib
+from unittest.mock import MagicMock
+import mysql.connector
+
+# Add the backend directory to the system path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from batch import BatchConnection
+from meal_planning_backend import DAL
+
+@pytest.fixture
+def connector():
+    """Fixture to mock a pooled connection."""
+    return MagicMock()
+
+@pytest.fixture
+def dal(connector):
+    """Fixture to create a DAL whose pool hands out the mocked connection."""
+    dal = DAL()
+    dal.pool = MagicMock()
+    dal.pool.connection.side_effect = lambda: contextlib.nullcontext(connector)
+    dal.tracer = MagicMock()
+    return dal
+
+def failing_cursor(message):
+    cursor = MagicMock()
+    cursor.callproc.side_effect = mysql.connector.Error(msg=message, sqlstate='45000')
+    return cursor
+
+class TestBatch:
+
+    def test_commits_pass_through_outside_a_transaction(self, connector):
+        batch = BatchConnection(connector)
+        result, error = batch.run(lambda: batch.commit() or 'done')
+        assert (result, error) == ('done', None)
+        connector.commit.assert_called_once()
+        assert batch.finish() is True
+
+    def test_failed_operation_is_rolled_back(self, connector):
+        batch = BatchConnection(connector)
+        error = mysql.connector.Error(msg='Cookbook already exists')
+        result, raised = batch.run(lambda: batch.record_error(error))
+        assert raised is error
+        assert batch.failed
+        connector.rollback.assert_called_once()
+        # The next operation starts without the earlier error
+        assert batch.run(lambda: None) == (None, None)
+
+    def test_transaction_commits_once_at_the_end(self, connector):
+        batch = BatchConnection(connector, transactional=True)
+        batch.run(batch.commit)
+        batch.run(batch.commit)
+        connector.commit.assert_not_called()
+        assert batch.finish() is True
+        connector.commit.assert_called_once()
+
+    def test_failed_transaction_is_rolled_back(self, connector):
+        batch = BatchConnection(connector, transactional=True)
+        batch.run(lambda: batch.record_error(mysql.connector.Error(msg='boom')))
+        connector.rollback.assert_not_called()
+        assert batch.finish() is False
+        connector.rollback.assert_called_once()
+        connector.commit.assert_not_called()
+
+    def test_dal_methods_share_the_batch_connection(self, dal, connector):
+        with dal.batch(1) as batch:
+            dal.add_ingredient('salt', 1)
+            dal.add_ingredient('pepper', 1)
+        assert dal.pool.connection.call_count == 1
+        assert connector.cursor.call_count == 2
+        assert connector.commit.call_count == 2
+        # Outside the batch each method borrows its own connection again
+        dal.add_ingredient('cumin', 1)
+        assert dal.pool.connection.call_count == 2
+
+    def test_dal_errors_are_recorded_on_the_batch(self, dal, connector):
+        connector.cursor.side_effect = [MagicMock(), failing_cursor('Ingredient already exists')]
+        with dal.batch(1, transactional=True) as batch:
+            assert batch.run(lambda: dal.add_ingredient('salt', 1)) == (None, None)
+            result, error = batch.run(lambda: dal.add_ingredient('salt', 1))
+        assert error.msg == 'Ingredient already exists'
+        connector.commit.assert_not_called()
+        connector.rollback.assert_called_once()
+
+    def test_reads_in_a_batch_are_not_cached(self, dal, connector):
+        connector.cursor.side_effect = [MagicMock(), MagicMock(), failing_cursor('Unknown column')]
+        with dal.batch(1, transactional=True) as batch:
+            batch.run(lambda: dal.add_cookbook('cookbook1', True, 1))
+            # Reads the uncommitted cookbook, which no other request may see
+            batch.run(lambda: dal.get_cookbook_names(1))
+            assert dal.get_cache_stats()['entries'] == 0
+            batch.run(lambda: dal.get_recipe_info('recipe1', 1))
+        assert dal.get_cache_stats()['entries'] == 0
+
+    def test_committed_batch_moves_the_library_version(self, dal, connector):
+        versions = dal.cache.versions
+        with dal.batch(1, transactional=True) as batch:
+            batch.run(lambda: dal.add_ingredient('salt', 1))
+            during = versions.get_version(1)
+            # Another request caches the rows from before the commit
+            dal.cache.get_or_load(1, 'get_cookbook_names', (), lambda: ['before commit'])
+            connector.commit.assert_not_called()
+        connector.commit.assert_called_once()
+        assert versions.get_version(1) > during
+        assert dal.cache.get_or_load(1, 'get_cookbook_names', (), lambda: ['after commit']) == ['after commit']
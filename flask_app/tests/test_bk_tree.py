@@ -0,0 +1,89 @@
+"""
+    A class to test the BKTree class and the levenshtein function.
+
+    Tested Methods
+    --------------
+    - levenshtein
+    - BKTree.add
+    - BKTree.remove
+    - BKTree.search
+"""
+
+import pytest, sys, os, random
+
+# Add the backend directory to the system path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from bk_tree import BKTree, levenshtein
+
+def matrix_distance(first, second):
+    """The textbook dynamic programming edit distance."""
+    previous = list(range(len(second) + 1))
+    for row, first_char in enumerate(first, 1):
+        current = [row]
+        for column, second_char in enumerate(second, 1):
+            current.append(min(previous[column] + 1, current[column - 1] + 1,
+                               previous[column - 1] + (first_char != second_char)))
+        previous = current
+    return previous[-1]
+
+def brute_force(words, query, max_distance, limit):
+    return sorted((levenshtein(query, word), word) for word in set(words)
+                  if levenshtein(query, word) <= max_distance)[:limit]
+
+def random_words(rng, count):
+    return [''.join(rng.choice('abcde ') for _ in range(rng.randint(3, 12))) for _ in range(count)]
+
+class TestBKTree:
+
+    def test_levenshtein(self):
+        assert levenshtein('chiken curry', 'chicken curry') == 1
+        assert levenshtein('kitten', 'sitting') == 3
+        assert levenshtein('', 'soup') == 4
+        assert levenshtein('soup', 'soup') == 0
+        assert levenshtein('a', 'chicken curry', bound=2) == 3
+
+    def test_levenshtein_matches_the_matrix(self):
+        rng = random.Random(1)
+        for _ in range(500):
+            first, second = random_words(rng, 2)
+            assert levenshtein(first, second) == matrix_distance(first, second)
+        long_name = 'x' * 70 + 'chicken curry'
+        assert levenshtein(long_name, long_name[::-1]) == matrix_distance(long_name, long_name[::-1])
+
+    def test_search_matches_brute_force(self):
+        rng = random.Random(2)
+        words = random_words(rng, 400)
+        tree = BKTree(words)
+        assert len(tree) == len(set(words))
+        for query in random_words(rng, 30):
+            for max_distance, limit in ((0, 1), (1, 3), (2, 5), (3, 10)):
+                assert tree.search(query, max_distance, limit) == brute_force(words, query, max_distance, limit)
+
+    def test_closest_ties_are_alphabetical(self):
+        tree = BKTree(['chicken curry', 'chicken soup', 'beef stew', 'beef curry', 'chickpea curry', 'beef soup'])
+        assert tree.search('chiken curry', 3, 5) == [(1, 'chicken curry'), (3, 'chickpea curry')]
+        assert tree.search('beef s', 3, 5) == [(3, 'beef soup'), (3, 'beef stew')]
+        assert tree.search('beef s', 3, 1) == [(3, 'beef soup')]
+        assert tree.search('beef curri', 3, 1) == [(1, 'beef curry')]
+        assert tree.search('lasagna', 2, 5) == []
+
+    def test_removed_words_are_not_found(self):
+        rng = random.Random(3)
+        words = sorted(set(random_words(rng, 300)))
+        tree = BKTree(words)
+        for word in words[:200]:
+            tree.remove(word)
+        tree.remove('not in the tree')
+        assert len(tree) == len(words) - 200
+        assert tree.search(words[0], 0, 1) == []
+        assert tree.search(words[250], 0, 1) == [(0, words[250])]
+        tree.add(words[0])
+        assert tree.search(words[0], 0, 1) == [(0, words[0])]
+
+    def test_search_visits_a_fraction_of_a_large_tree(self):
+        words = [f'{["grilled", "roasted", "spicy", "baked"][n % 4]} '
+                 f'{["chicken", "salmon", "tofu", "beef"][n // 4 % 4]} {n}' for n in range(20000)]
+        tree = BKTree(words)
+        assert tree.search('grilled chiken 1232', 2, 5)[0] == (1, 'grilled chicken 1232')
+        assert tree.comparisons < len(words) / 4
@@ -11,19 +11,39 @@
     Tested Methods
     --------------
     - check_recipe
+    - check_cookbook
     - get_cookbook_names
     - get_cookbook_info
     - get_all_recipe_names
     - get_recipe_info
+    - get_recipes_info
+    - get_meal_plan / set_meal_plan
+    - get_shopping_list
+    - get_pantry_recipes
+    - get_recipes_by_ingredient
+    - search
+    - autocomplete
+    - resolve_recipe
     - add_cookbook
     - delete_cookbook
     - add_recipe
+    - add_recipe_with_ingredients
     - delete_recipe
     - add_ingredient
+    - add_ingredients
     - delete_ingredient
     - add_ingredient_recipe_pairing
+    - run_batch / bind_batch_operation
     - add_user
     - login_user
+    - get_pool_stats
+    - get_cache_stats
+    - get_search_stats
+    - check_library_version / tag_library_version
+    - page_response (limit and cursor on the listing routes)
+    - stream_response (stream on the listing routes)
+    - get_metrics
+    - assign_request_id / return_request_id / clear_request_id
     
     Untested Methods
     ----------------
@@ -31,14 +51,16 @@
     
 """
 
-import pytest, sys, os
-from unittest.mock import MagicMock
+import pytest, sys, os, contextlib, datetime
+import mysql.connector
+from unittest.mock import MagicMock, patch
 from werkzeug.security import generate_password_hash
 
 # Add the backend directory to the system path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
 
 from meal_planning_backend import DAL, BusinessLogic
+from batch import BatchConnection
 
 @pytest.fixture
 def dal_mock():
@@ -47,9 +69,26 @@ def dal_mock():
     mock.get_recipe_names.return_value = ['recipe1', 'recipe2']
     mock.get_cookbook_names.return_value = ['cookbook1', 'cookbook2']
     mock.get_cookbook_info.return_value = ('Cookbook1', 1, 'http://example.com')
+    mock.get_cookbook_detail.side_effect = lambda name, user_id: (('Cookbook1', 1, 'http://example.com'), ['recipe1', 'recipe2']) if name in ['cookbook1', 'cookbook2'] else (None, [])
+    mock.recipe_exists.side_effect = lambda name, user_id: name in ['recipe1', 'recipe2']
+    mock.cookbook_exists.side_effect = lambda name, user_id: name in ['cookbook1', 'cookbook2']
     mock.get_recipe_info.return_value = ('Recipe1', 'Cookbook1', 2, 1, 'http://example.com', 1)
     mock.get_recipe_ingredients.return_value = ['ingredient1', 'ingredient2']
+    mock.get_recipes_info.return_value = [(('Recipe1', 'Cookbook1', 2, 1, 'http://example.com', 1), ['ingredient1', 'ingredient2'])]
     mock.get_user_info.return_value = (1, 'test@example.com', generate_password_hash('test'), 'test', 'test')
+    recipe_pages = {None: (['recipe1'], 'recipe1'), 'recipe1': (['recipe2'], None)}
+    mock.get_recipe_names_page.side_effect = lambda user_id, after, limit, cookbook_name="": recipe_pages[after]
+    mock.get_cookbook_names_page.return_value = (['cookbook1', 'cookbook2'], None)
+    mock.iter_recipe_names.side_effect = lambda user_id, cookbook_name="": iter([['recipe1', 'recipe2'], ['recipe3']])
+    mock.iter_cookbook_names.side_effect = lambda user_id: iter([])
+    mock.get_pool_stats.return_value = {'pool_size': 5, 'idle': 2, 'checked_out': 1}
+    mock.get_cache_stats.return_value = {'entries': 3, 'hits': 10, 'misses': 3, 'evictions': 0}
+    mock.get_trace_stats.return_value = {'threshold_ms': 200.0, 'calls': 12, 'slow_calls': 1, 'explain': False}
+    for write in ('add_cookbook', 'delete_recipe', 'add_ingredient'):
+        getattr(mock, write).return_value = None
+    mock.batches = []
+    mock.batch.side_effect = lambda user_id, transactional: contextlib.nullcontext(
+        mock.batches.append(BatchConnection(MagicMock(), transactional)) or mock.batches[-1])
     return mock
 
 @pytest.fixture
@@ -84,6 +123,20 @@ class TestBL:
         assert response.status_code == 200
         assert response.json == {'validity': False}
 
+    def test_check_cookbook_valid(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        response = self.app.get('/check_cookbook/cookbook1')
+        assert response.status_code == 200
+        assert response.json == {'validity': True}
+
+    def test_check_cookbook_invalid(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        response = self.app.get('/check_cookbook/invalid_cookbook')
+        assert response.status_code == 200
+        assert response.json == {'validity': False}
+
     def test_get_cookbook_names(self):
         with self.app.session_transaction() as sess:
             sess['user_id'] = 1
@@ -149,6 +202,194 @@ class TestBL:
         assert response.status_code == 200
         assert response.json == {'message': f'Cookbook NewCookbook deleted successfully'}
 
+    def test_get_recipes_info(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        response = self.app.get('/recipes_info?names=recipe1&names=recipe3&names=recipe1')
+        assert response.status_code == 200
+        assert response.json == {'recipes': [{'recipe_name': 'Recipe1', 'cookbook_name': 'Cookbook1', 'servings': 2, 'is_online': True, 'url': 'http://example.com', 'ingredients': ['ingredient1', 'ingredient2']}], 'missing': ['recipe3']}
+        self.dal_mock.get_recipes_info.assert_called_once_with(('recipe1', 'recipe3'), 1)
+
+    def test_get_recipes_info_case_variants_are_one_recipe(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        response = self.app.get('/recipes_info?names=Recipe1&names=recipe3&names=RECIPE1&names=recipe1')
+        assert response.status_code == 200
+        assert [recipe['recipe_name'] for recipe in response.json['recipes']] == ['Recipe1']
+        assert response.json['recipes'][0]['ingredients'] == ['ingredient1', 'ingredient2']
+        self.dal_mock.get_recipes_info.assert_called_once_with(('Recipe1', 'recipe3'), 1)
+
+    def test_get_recipes_info_needs_names(self):
+        assert self.app.get('/recipes_info').status_code == 400
+        self.dal_mock.get_recipes_info.return_value = 'Database does not exist'
+        assert self.app.get('/recipes_info?names=recipe1').status_code == 500
+
+    def test_search(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        self.dal_mock.search.return_value = [('recipe', 'Chicken Tacos'), ('ingredient', 'Chicken')]
+        response = self.app.get('/search?q=chick&type=recipe&type=ingredient&limit=5')
+        assert response.status_code == 200
+        assert response.json == {'query': 'chick', 'results': [{'type': 'recipe', 'name': 'Chicken Tacos'}, {'type': 'ingredient', 'name': 'Chicken'}]}
+        self.dal_mock.search.assert_called_once_with('chick', 1, 5, ('recipe', 'ingredient'))
+
+    def test_search_rejects_bad_queries(self):
+        for query in ['', 'q=%20%26%20', 'q=rice&type=meal', 'q=rice&limit=0', 'q=rice&limit=ten']:
+            assert self.app.get(f'/search?{query}').status_code == 400
+        self.dal_mock.search.assert_not_called()
+        self.dal_mock.search.return_value = 'Database does not exist'
+        assert self.app.get('/search?q=rice').status_code == 500
+
+    def test_autocomplete(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        self.dal_mock.autocomplete.return_value = [('recipe', 'Chicken Soup'), ('recipe', 'Chicken Tacos')]
+        response = self.app.get('/autocomplete?prefix=Chicken%20&type=recipe')
+        assert response.status_code == 200
+        assert response.json == {'prefix': 'Chicken ', 'completions': [{'type': 'recipe', 'name': 'Chicken Soup'}, {'type': 'recipe', 'name': 'Chicken Tacos'}]}
+        self.dal_mock.autocomplete.assert_called_once_with('Chicken ', 1, 10, ('recipe',))
+
+    def test_autocomplete_rejects_bad_prefixes(self):
+        for query in ['', 'prefix=%20', 'prefix=c&type=meal', 'prefix=c&limit=51']:
+            assert self.app.get(f'/autocomplete?{query}').status_code == 400
+        self.dal_mock.autocomplete.assert_not_called()
+
+    def test_resolve_recipe(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        self.dal_mock.resolve_recipe.return_value = [('Chicken Soup', 1), ('Chicken Stew', 2)]
+        response = self.app.get('/resolve_recipe/Chiken%20Soup?limit=3')
+        assert response.status_code == 200
+        assert response.json == {'recipe_name': 'Chiken Soup', 'matches': [{'recipe_name': 'Chicken Soup', 'distance': 1}, {'recipe_name': 'Chicken Stew', 'distance': 2}]}
+        self.dal_mock.resolve_recipe.assert_called_once_with('Chiken Soup', 1, 2, 3)
+
+    def test_resolve_recipe_rejects_bad_parameters(self):
+        for query in ['max_distance=4', 'max_distance=-1', 'limit=0', 'limit=51', 'limit=five']:
+            assert self.app.get(f'/resolve_recipe/Soup?{query}').status_code == 400
+        self.dal_mock.resolve_recipe.assert_not_called()
+        self.dal_mock.resolve_recipe.return_value = 'Database does not exist'
+        assert self.app.get('/resolve_recipe/Soup').status_code == 500
+
+    def test_get_search_stats(self):
+        self.dal_mock.get_search_stats.return_value = {'users': 1, 'searches': 4, 'builds': 1}
+        response = self.app.get('/search_stats')
+        assert response.status_code == 200
+        assert response.json == {'users': 1, 'searches': 4, 'builds': 1}
+
+    def test_get_meal_plan(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        self.dal_mock.get_meal_plan.return_value = [(datetime.date(2026, 10, 13), 'dinner', 'Recipe1', 'Cookbook1', 2, 1, 'http://example.com')]
+        response = self.app.get('/meal_plan?start=2026-10-12')
+        assert response.status_code == 200
+        assert response.json == {'start': '2026-10-12', 'end': '2026-10-18', 'meals': [{'date': '2026-10-13', 'slot': 'dinner', 'recipe_name': 'Recipe1', 'cookbook_name': 'Cookbook1', 'servings': 2, 'is_online': True, 'url': 'http://example.com'}]}
+        self.dal_mock.get_meal_plan.assert_called_once_with(1, '2026-10-12', '2026-10-18')
+
+    def test_get_meal_plan_defaults_to_this_week(self):
+        self.dal_mock.get_meal_plan.return_value = []
+        response = self.app.get('/meal_plan')
+        assert response.status_code == 200
+        assert datetime.date.fromisoformat(response.json['start']).weekday() == 0
+        assert self.app.get('/meal_plan?start=next-monday').status_code == 400
+
+    def test_default_week_is_part_of_the_etag(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        self.dal_mock.get_meal_plan.return_value = []
+        week_start = 'meal_planning_backend.BusinessLogic.week_start'
+        with patch(week_start, side_effect=lambda value: datetime.date(2026, 10, 12)):
+            etag = self.app.get('/meal_plan').headers['ETag']
+            assert self.app.get('/meal_plan', headers={'If-None-Match': etag}).status_code == 304
+            assert self.app.get('/meal_plan?start=2026-10-12', headers={'If-None-Match': etag}).status_code == 200
+        with patch(week_start, side_effect=lambda value: datetime.date(2026, 10, 19)):
+            response = self.app.get('/meal_plan', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.json['start'] == '2026-10-19'
+
+    def test_get_shopping_list(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        self.dal_mock.get_shopping_list.return_value = [('ingredient1', 2), ('ingredient2', 1)]
+        response = self.app.get('/shopping_list?start=2026-10-12')
+        assert response.status_code == 200
+        assert response.json == {'start': '2026-10-12', 'end': '2026-10-18', 'ingredients': [{'ingredient_name': 'ingredient1', 'meal_count': 2}, {'ingredient_name': 'ingredient2', 'meal_count': 1}]}
+        self.dal_mock.get_shopping_list.assert_called_once_with(1, '2026-10-12', '2026-10-18')
+
+    def test_default_shopping_week_is_part_of_the_etag(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        self.dal_mock.get_shopping_list.return_value = []
+        week_start = 'meal_planning_backend.BusinessLogic.week_start'
+        with patch(week_start, side_effect=lambda value: datetime.date(2026, 10, 12)):
+            etag = self.app.get('/shopping_list').headers['ETag']
+            assert self.app.get('/shopping_list', headers={'If-None-Match': etag}).status_code == 304
+        with patch(week_start, side_effect=lambda value: datetime.date(2026, 10, 19)):
+            response = self.app.get('/shopping_list', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert (response.json['start'], response.json['end']) == ('2026-10-19', '2026-10-25')
+
+    def test_get_shopping_list_rejects_bad_ranges(self):
+        for query in ['start=2026-10-12&end=2026-10-11', 'start=2026-10-12&end=2026-11-12', 'end=tomorrow']:
+            assert self.app.get(f'/shopping_list?{query}').status_code == 400
+        self.dal_mock.get_shopping_list.assert_not_called()
+        self.dal_mock.get_shopping_list.return_value = 'Database does not exist'
+        assert self.app.get('/shopping_list?start=2026-10-12&end=2026-11-11').status_code == 500
+
+    def test_get_pantry_recipes(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        self.dal_mock.match_pantry.return_value = ([('Beans & Rice', 2, []), ('Burritos', 2, ['Cheese', 'Tortillas'])], ['Saffron'])
+        response = self.app.get('/pantry_recipes?ingredients=Black%20Beans&ingredients=White%20Rice&ingredients=Saffron&max_missing=2')
+        assert response.status_code == 200
+        assert response.json == {'recipes': [{'recipe_name': 'Beans & Rice', 'on_hand': 2, 'missing': []}, {'recipe_name': 'Burritos', 'on_hand': 2, 'missing': ['Cheese', 'Tortillas']}], 'unknown': ['Saffron']}
+        self.dal_mock.match_pantry.assert_called_once_with(('Black Beans', 'White Rice', 'Saffron'), 1, 20, 2)
+
+    def test_get_pantry_recipes_rejects_bad_parameters(self):
+        for query in ['', 'limit=5', 'ingredients=Rice&limit=0', 'ingredients=Rice&limit=501', 'ingredients=Rice&max_missing=-1', 'ingredients=Rice&max_missing=two']:
+            assert self.app.get(f'/pantry_recipes?{query}').status_code == 400
+        self.dal_mock.match_pantry.assert_not_called()
+        self.dal_mock.match_pantry.return_value = 'Database does not exist'
+        assert self.app.get('/pantry_recipes?ingredients=Rice').status_code == 500
+
+    def test_get_recipes_by_ingredient(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        self.dal_mock.get_recipes_by_ingredient.return_value = (['Burritos', 'Tacos'], [])
+        response = self.app.get('/recipes_by_ingredient?ingredients=Cheese&ingredients=Tortillas&ingredients=Cheese')
+        assert response.status_code == 200
+        assert response.json == {'recipes': ['Burritos', 'Tacos'], 'unknown': []}
+        self.dal_mock.get_recipes_by_ingredient.assert_called_once_with(('Cheese', 'Tortillas'), 1, True)
+        self.app.get('/recipes_by_ingredient?ingredients=Cheese&match=any')
+        self.dal_mock.get_recipes_by_ingredient.assert_called_with(('Cheese',), 1, False)
+
+    def test_get_recipes_by_ingredient_rejects_bad_parameters(self):
+        for query in ['', 'match=any', 'ingredients=Rice&match=some']:
+            assert self.app.get(f'/recipes_by_ingredient?{query}').status_code == 400
+        self.dal_mock.get_recipes_by_ingredient.assert_not_called()
+        self.dal_mock.get_recipes_by_ingredient.return_value = 'Database does not exist'
+        assert self.app.get('/recipes_by_ingredient?ingredients=Rice').status_code == 500
+
+    def test_set_meal_plan(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        self.dal_mock.set_meal_plan.return_value = None
+        meals = [{'date': '2026-10-12', 'slot': 'dinner', 'recipe_name': 'recipe1'}, {'date': '2026-10-18', 'slot': 'lunch', 'recipe_name': 'recipe2'}]
+        response = self.app.put('/meal_plan', json={'start': '2026-10-12', 'meals': meals})
+        assert response.status_code == 200
+        assert response.json == {'message': 'Meal plan for the week of 2026-10-12 saved successfully', 'success': True}
+        self.dal_mock.set_meal_plan.assert_called_once_with(1, '2026-10-12', '2026-10-18', meals)
+
+    def test_set_meal_plan_rejects_bad_meals(self):
+        meal = {'date': '2026-10-12', 'slot': 'dinner', 'recipe_name': 'recipe1'}
+        for meals in ['recipe1', [dict(meal, date='2026-10-19')], [dict(meal, slot='brunch')],
+                      [dict(meal, recipe_name=None)], [meal, dict(meal, recipe_name='recipe2')]]:
+            assert self.app.put('/meal_plan', json={'start': '2026-10-12', 'meals': meals}).status_code == 400
+        self.dal_mock.set_meal_plan.assert_not_called()
+        self.dal_mock.set_meal_plan.return_value = 'Error: Recipe does not exist'
+        response = self.app.put('/meal_plan', json={'start': '2026-10-12', 'meals': [meal]})
+        assert response.status_code == 400
+        assert response.json == {'message': 'Error: Recipe does not exist', 'success': False}
+
     def test_add_recipe(self):
         with self.app.session_transaction() as sess:
             sess['user_id'] = 1
@@ -156,6 +397,28 @@ class TestBL:
         assert response.status_code == 200
         assert response.json == {'message': f'Recipe NewRecipe added successfully'}
 
+    def test_add_recipe_with_ingredients(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        self.dal_mock.add_recipe_with_ingredients.return_value = None
+        response = self.app.put('/add_recipe_with_ingredients', json={'new_recipe_name': 'NewRecipe', 'new_cookbook_name': 'cookbook1', 'new_servings': 2, 'new_is_online': False, 'new_webpage': '', 'new_ingredients': ['Salt', 'Pepper']})
+        assert response.status_code == 200
+        assert response.json == {'message': 'Recipe NewRecipe added successfully', 'success': True}
+        self.dal_mock.add_recipe_with_ingredients.assert_called_once_with('NewRecipe', 'cookbook1', 2, False, ['Salt', 'Pepper'], 1, '')
+
+    def test_add_recipe_with_ingredients_refused(self):
+        self.dal_mock.add_recipe_with_ingredients.return_value = 'Error: Recipe already exists'
+        response = self.app.put('/add_recipe_with_ingredients', json={'new_recipe_name': 'recipe1', 'new_cookbook_name': 'cookbook1', 'new_servings': 2, 'new_is_online': False, 'new_webpage': '', 'new_ingredients': []})
+        assert response.status_code == 400
+        assert response.json == {'message': 'Error: Recipe already exists', 'success': False}
+
+    def test_add_recipe_with_ingredients_rejects_bad_names(self):
+        recipe = {'new_recipe_name': 'NewRecipe', 'new_cookbook_name': 'cookbook1', 'new_servings': 2, 'new_is_online': False, 'new_webpage': ''}
+        assert self.app.put('/add_recipe_with_ingredients', json=recipe).status_code == 400
+        assert self.app.put('/add_recipe_with_ingredients', json=dict(recipe, new_ingredients=[' '])).status_code == 400
+        assert self.app.put('/add_recipe_with_ingredients', json=dict(recipe, new_ingredients=['x' * 101])).status_code == 400
+        self.dal_mock.add_recipe_with_ingredients.assert_not_called()
+
     def test_delete_recipe(self):
         with self.app.session_transaction() as sess:
             sess['user_id'] = 1
@@ -170,6 +433,28 @@ class TestBL:
         assert response.status_code == 200
         assert response.json == {'message': f'Ingredient NewIngredient added successfully'}
 
+    def test_add_ingredients(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        self.dal_mock.add_ingredients_bulk.return_value = [
+            {'name': 'Salt', 'status': 'added'}, {'name': 'salt', 'status': 'duplicate'}]
+        response = self.app.put('/add_ingredients', json={'new_ingredients': ['Salt', 'salt']})
+        assert response.status_code == 200
+        assert response.json['message'] == '1 of 2 ingredients added'
+        assert response.json['results'][1] == {'name': 'salt', 'status': 'duplicate'}
+        self.dal_mock.add_ingredients_bulk.assert_called_once_with(['Salt', 'salt'], 1)
+
+    def test_add_ingredients_rejects_bad_lists(self):
+        assert self.app.put('/add_ingredients', json={'new_ingredients': 'Salt'}).status_code == 400
+        assert self.app.put('/add_ingredients', json={'new_ingredients': ['Salt'] * 1001}).status_code == 400
+        self.dal_mock.add_ingredients_bulk.assert_not_called()
+
+    def test_add_ingredients_database_error(self):
+        self.dal_mock.add_ingredients_bulk.return_value = 'Database does not exist'
+        response = self.app.put('/add_ingredients', json={'new_ingredients': ['Salt']})
+        assert response.status_code == 500
+        assert response.json == {'message': 'Error: Database does not exist', 'success': False}
+
     def test_delete_ingredient(self):
         with self.app.session_transaction() as sess:
             sess['user_id'] = 1
@@ -194,4 +479,201 @@ class TestBL:
         assert response.json == {'message': f'User test@example.com logged in successfully', 'email': 'test@example.com', 'first_name': 'test', 'last_name': 'test', 'success': True}
         assert response.status_code == 200
 
-    
\ No newline at end of file
+    def test_get_pool_stats(self):
+        response = self.app.get('/pool_stats')
+        assert response.status_code == 200
+        assert response.json == {'pool_size': 5, 'idle': 2, 'checked_out': 1}
+
+    def test_get_cache_stats(self):
+        response = self.app.get('/cache_stats')
+        assert response.status_code == 200
+        assert response.json == {'entries': 3, 'hits': 10, 'misses': 3, 'evictions': 0}
+
+    def test_read_route_sets_etag(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        response = self.app.get('/cookbook_names')
+        assert response.status_code == 200
+        assert response.headers['ETag']
+        assert response.headers['Cache-Control'] == 'private, no-cache'
+
+    def test_conditional_get_not_modified(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        etag = self.app.get('/all_recipe_names').headers['ETag']
+        self.dal_mock.get_recipe_names.reset_mock()
+        response = self.app.get('/all_recipe_names', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.data == b''
+        assert response.headers['ETag'] == etag
+        self.dal_mock.get_recipe_names.assert_not_called()
+
+    def test_conditional_get_after_write(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        etag = self.app.get('/cookbook_names').headers['ETag']
+        self.app.delete('/delete_cookbook/cookbook2')
+        response = self.app.get('/cookbook_names', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+
+    def test_database_errors_are_not_tagged(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        self.dal_mock.get_cookbook_names.return_value = 'Cannot connect to the database'
+        self.dal_mock.recipe_exists.side_effect = lambda name, user_id: 'Database does not exist'
+        self.dal_mock.get_recipe_info.return_value = 'Database does not exist'
+        for url in ('/cookbook_names', '/check_recipe/recipe1', '/recipe_info/recipe1'):
+            response = self.app.get(url)
+            assert response.status_code == 500
+            assert response.json['success'] is False
+            assert 'ETag' not in response.headers
+
+    def test_get_recipe_info_not_found(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        self.dal_mock.get_recipe_info.return_value = None
+        response = self.app.get('/recipe_info/missing')
+        assert response.status_code == 404
+        assert 'ETag' not in response.headers
+
+    def test_etag_differs_per_user(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        etag = self.app.get('/cookbook_names').headers['ETag']
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 2
+        response = self.app.get('/cookbook_names', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+
+    def test_get_all_recipe_names_paginated(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        first_page = self.app.get('/all_recipe_names?limit=1')
+        assert first_page.status_code == 200
+        assert first_page.json['items'] == ['recipe1']
+        assert first_page.json['next_cursor']
+        second_page = self.app.get(f"/all_recipe_names?limit=1&cursor={first_page.json['next_cursor']}")
+        assert second_page.json == {'items': ['recipe2'], 'next_cursor': None}
+        self.dal_mock.get_recipe_names_page.assert_called_with(user_id=1, after='recipe1', limit=1)
+
+    def test_get_recipe_names_paginated(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        response = self.app.get('/recipe_names/cookbook1?limit=1')
+        assert response.status_code == 200
+        assert response.json['items'] == ['recipe1']
+        self.dal_mock.get_recipe_names_page.assert_called_with(user_id=1, cookbook_name='cookbook1', after=None, limit=1)
+
+    def test_get_cookbook_names_paginated(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        response = self.app.get('/cookbook_names?limit=10')
+        assert response.status_code == 200
+        assert response.json == {'items': ['cookbook1', 'cookbook2'], 'next_cursor': None}
+
+    def test_pagination_rejects_bad_arguments(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        assert self.app.get('/all_recipe_names?limit=0').status_code == 400
+        assert self.app.get('/all_recipe_names?limit=abc').status_code == 400
+        assert self.app.get('/all_recipe_names?limit=5&cursor=not-a-cursor').status_code == 400
+
+    def test_get_all_recipe_names_streamed(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        response = self.app.get('/all_recipe_names?stream=1')
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.json == ['recipe1', 'recipe2', 'recipe3']
+
+    def test_get_recipe_names_streamed(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        response = self.app.get('/recipe_names/cookbook1?stream=true')
+        assert response.json == ['recipe1', 'recipe2', 'recipe3']
+        self.dal_mock.iter_recipe_names.assert_called_with(1, cookbook_name='cookbook1')
+
+    def test_get_cookbook_names_streamed_empty(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        response = self.app.get('/cookbook_names?stream=1')
+        assert response.json == []
+
+    def test_get_metrics(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        self.app.get('/recipe_info/recipe1')
+        response = self.app.get('/metrics')
+        assert response.status_code == 200
+        assert response.content_type.startswith('text/plain; version=0.0.4')
+        body = response.get_data(as_text=True)
+        assert 'http_requests_total{method="GET",route="/recipe_info/<p_recipe>",status="200"}' in body
+        assert 'http_request_duration_seconds_count{method="GET",route="/recipe_info/<p_recipe>"}' in body
+        assert 'http_requests_in_flight{route="/metrics"} 1' in body
+        assert 'db_pool_pool_size 5' in body
+        assert '# TYPE db_pool_pool_size gauge' in body
+        assert 'db_trace_slow_calls_total 1' in body
+        assert '# TYPE db_trace_slow_calls_total counter' in body
+
+    def test_request_id_is_generated(self):
+        response = self.app.get('/cookbook_names')
+        assert len(response.headers['X-Request-ID']) == 32
+
+    def test_request_id_is_echoed(self):
+        response = self.app.get('/cookbook_names', headers={'X-Request-ID': 'abc-123'})
+        assert response.headers['X-Request-ID'] == 'abc-123'
+
+    def test_malformed_request_id_is_replaced(self):
+        response = self.app.get('/cookbook_names', headers={'X-Request-ID': 'bad id; drop'})
+        assert response.headers['X-Request-ID'] != 'bad id; drop'
+        assert len(response.headers['X-Request-ID']) == 32
+
+    def test_batch_runs_operations_in_order(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 1
+        response = self.app.post('/batch', json={'operations': [
+            {'op': 'add_cookbook', 'args': {'cookbook_name': 'cookbook3', 'is_book': True}},
+            {'op': 'get_cookbook_names'},
+            {'op': 'get_recipe_ingredients', 'args': {'recipe_name': 'recipe1'}}]})
+        assert response.status_code == 200
+        assert response.json == {'committed': True, 'success': True, 'results': [
+            {'op': 'add_cookbook', 'success': True, 'result': None},
+            {'op': 'get_cookbook_names', 'success': True, 'result': ['cookbook1', 'cookbook2']},
+            {'op': 'get_recipe_ingredients', 'success': True, 'result': ['ingredient1', 'ingredient2']}]}
+        self.dal_mock.add_cookbook.assert_called_once_with(user_id=1, cookbook_name='cookbook3', is_book=True)
+        self.dal_mock.batch.assert_called_once_with(1, False)
+
+    def test_batch_reports_failed_operations(self):
+        self.dal_mock.add_cookbook.side_effect = lambda **kwargs: self.dal_mock.batches[-1].record_error(
+            mysql.connector.Error(msg='Cookbook already exists', sqlstate='45000'))
+        response = self.app.post('/batch', json={'operations': [
+            {'op': 'add_cookbook', 'args': {'cookbook_name': 'cookbook1', 'is_book': True}},
+            {'op': 'delete_recipe', 'args': {'recipe_name': 'recipe1'}}]})
+        assert response.status_code == 200
+        assert response.json['committed'] is True
+        assert response.json['success'] is False
+        assert response.json['results'][0]['message'] == 'Error: Cookbook already exists'
+        assert response.json['results'][1]['success'] is True
+
+    def test_transactional_batch_stops_at_first_failure(self):
+        self.dal_mock.add_cookbook.side_effect = lambda **kwargs: self.dal_mock.batches[-1].record_error(
+            mysql.connector.Error(msg='Cookbook already exists', sqlstate='45000'))
+        response = self.app.post('/batch', json={'transactional': True, 'operations': [
+            {'op': 'add_ingredient', 'args': {'ingredient_name': 'salt'}},
+            {'op': 'add_cookbook', 'args': {'cookbook_name': 'cookbook1', 'is_book': True}},
+            {'op': 'delete_recipe', 'args': {'recipe_name': 'recipe1'}}]})
+        assert response.status_code == 400
+        assert response.json['committed'] is False
+        assert [result['success'] for result in response.json['results']] == [True, False, False]
+        assert response.json['results'][2]['message'] == 'Skipped after an earlier operation failed'
+        self.dal_mock.delete_recipe.assert_not_called()
+        self.dal_mock.batch.assert_called_once_with(None, True)
+
+    def test_batch_rejects_malformed_operations(self):
+        for operations in ['add_cookbook', [{'op': 'delete_user', 'args': {'email': 'a@b.com'}}],
+                           [{'op': 'add_cookbook', 'args': {'cookbook_name': 'c', 'is_book': True, 'user_id': 2}}],
+                           [{'op': 'get_recipe_info', 'args': {'recipe_name': ['recipe1']}}],
+                           [{'op': 'get_cookbook_names'}] * 101]:
+            assert self.app.post('/batch', json={'operations': operations}).status_code == 400
+        self.dal_mock.batch.assert_not_called()
@@ -0,0 +1,226 @@
+"""
+    A class to test the CallTracer class methods.
+
+    Fixtures
+    ----------
+    - slow_log - The path of a slow call file in a temporary directory
+
+    Tested Methods
+    --------------
+    - record
+    - explain_procedure
+    - flush
+    - open_log
+    - get_stats
+    - redact
+    - result_size
+    - explainable_statements
+    - DAL.call_procedure
+"""
+
+import pytest, sys, os, threading, json, contextlib
+from unittest.mock import MagicMock
+import mysql.connector
+
+# Add the backend directory to the system path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from call_tracer import CallTracer, redact, result_size, explainable_statements, slow_call_logger
+from meal_planning_backend import DAL
+
+PAGE_BODY = """BEGIN
+  IF myAfterName IS NULL THEN
+    SELECT CookbookName
+    FROM Cookbook
+    WHERE UserId = myUserId
+    ORDER BY CookbookName
+    LIMIT myLimit;
+  ELSE
+    SELECT CookbookName
+    FROM Cookbook
+    WHERE UserId = myUserId AND CookbookName > myAfterName
+    ORDER BY CookbookName
+    LIMIT myLimit;
+  END IF;
+END"""
+
+ADD_BODY = """BEGIN
+    DECLARE recipeCount INT;
+    -- Check if the recipe already exists; count it
+    SELECT COUNT(*) INTO recipeCount
+    FROM Recipe
+    WHERE RecipeName = myRecipe AND UserId = myUserId;
+    IF recipeCount = 0 THEN
+        INSERT INTO Recipe (RecipeName, UserId)
+        SELECT myRecipe, myUserId;
+    END IF;
+END"""
+
+class FakeCursor:
+    """A stand in for a dictionary cursor that answers the tracer's queries."""
+
+    def __init__(self, body, parameters):
+        self.body = body
+        self.parameters = parameters
+        self.executed = []
+        self.rows = []
+
+    def execute(self, statement, params):
+        self.executed.append((statement, list(params)))
+        if 'ROUTINES' in statement:
+            self.rows = [{'ROUTINE_DEFINITION': self.body}]
+        elif 'PARAMETERS' in statement:
+            self.rows = [{'PARAMETER_NAME': name} for name in self.parameters]
+        elif 'myMissing' in statement:
+            raise mysql.connector.Error("Unknown column")
+        else:
+            self.rows = [{'table': 'Cookbook', 'key': 'CookbookUserName'}]
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def slow_log(tmp_path):
+    """Fixture to give each test its own slow call file."""
+    yield str(tmp_path / 'slow_calls.log')
+    for handler in list(slow_call_logger.handlers):
+        slow_call_logger.removeHandler(handler)
+        handler.close()
+
+def read_entries(path):
+    with open(path) as log_file:
+        return [json.loads(line) for line in log_file]
+
+class TestCallTracer:
+
+    def test_redact_keeps_numbers_only(self):
+        assert redact(['a@b.com', 'hash', 7, None, True]) == ['<str:7>', '<str:4>', 7, None, True]
+
+    def test_result_size(self):
+        assert result_size([[('abc', 12)], [(b'\x00\x01', None)]]) == 7
+
+    def test_explainable_statements_substitutes_parameters(self):
+        statements = explainable_statements(PAGE_BODY, ['myUserId', 'myAfterName', 'myLimit'])
+        assert statements == [
+            ('SELECT CookbookName FROM Cookbook WHERE UserId = %s ORDER BY CookbookName LIMIT %s', [0, 2]),
+            ('SELECT CookbookName FROM Cookbook WHERE UserId = %s AND CookbookName > %s '
+             'ORDER BY CookbookName LIMIT %s', [0, 1, 2]),
+        ]
+
+    def test_explainable_statements_skips_writes_and_into(self):
+        statements = explainable_statements(ADD_BODY, ['myRecipe', 'myUserId'])
+        assert statements == [
+            ('SELECT COUNT(*) FROM Recipe WHERE RecipeName = %s AND UserId = %s', [0, 1]),
+        ]
+
+    def test_explainable_statements_of_other_kinds(self):
+        body = """BEGIN
+    UPDATE UserCounts SET RecipeCount = RecipeCount + 1 WHERE UserId = myUserId AND RecipeCount < 100;
+    INSERT INTO Meal (RecipeId, IngredientId) VALUES (1, 2) ON DUPLICATE KEY UPDATE RecipeId = RecipeId;
+    IF ROW_COUNT() = 0 THEN
+        DELETE FROM Recipe WHERE RecipeName = myRecipe AND UserId = myUserId;
+    END IF;
+END"""
+        statements = explainable_statements(body, ['myRecipe', 'myUserId'], kinds=('UPDATE', 'DELETE'))
+        assert statements == [
+            ('UPDATE UserCounts SET RecipeCount = RecipeCount + 1 WHERE UserId = %s AND RecipeCount < 100', [1]),
+            ('DELETE FROM Recipe WHERE RecipeName = %s AND UserId = %s', [0, 1]),
+        ]
+
+    def test_fast_call_is_not_logged(self, slow_log):
+        tracer = CallTracer(threshold=1, log_path=slow_log)
+        tracer.record('GetAllCookbookNames', [1], [[('cookbook1',)]], 0.01)
+        assert not os.path.exists(slow_log)
+        assert tracer.get_stats()['calls'] == 1
+        assert tracer.get_stats()['slow_calls'] == 0
+
+    def test_slow_call_is_logged(self, slow_log):
+        tracer = CallTracer(threshold=0.1, log_path=slow_log)
+        tracer.record('GetUserInfo', ['a@b.com'], [[(1, 'a@b.com', 'Jo')]], 0.25)
+        entries = read_entries(slow_log)
+        assert len(entries) == 1
+        assert entries[0]['message'] == 'Slow call to GetUserInfo'
+        assert entries[0]['procedure'] == 'GetUserInfo'
+        assert entries[0]['params'] == ['<str:7>']
+        assert entries[0]['rows'] == 1
+        assert entries[0]['bytes'] == 10
+        assert entries[0]['duration_ms'] == 250.0
+        assert 'plan' not in entries[0]
+        assert 'a@b.com' not in json.dumps(entries[0]['params'])
+
+    def test_failed_slow_call_records_error(self, slow_log):
+        tracer = CallTracer(threshold=0, log_path=slow_log)
+        tracer.record('AddCookbook', ['c', True, '', 1], None, 0.5, mysql.connector.Error("boom"))
+        entries = read_entries(slow_log)
+        assert entries[0]['rows'] == 0
+        assert 'boom' in entries[0]['error']
+
+    def test_slow_call_is_explained(self, slow_log):
+        cursor = FakeCursor(PAGE_BODY.replace("END IF;", "END IF;\n  SELECT myMissing;"), ['myUserId', 'myAfterName', 'myLimit'])
+        connector = MagicMock()
+        connector.cursor.return_value = cursor
+        tracer = CallTracer(threshold=0, log_path=slow_log, explain=True,
+                            connection=lambda: contextlib.nullcontext(connector))
+        tracer.record('GetCookbookNamesPage', [1, None, 51], [[('cookbook1',)]], 0.3)
+        tracer.record('GetCookbookNamesPage', [1, 'b', 51], [[('cookbook1',)]], 0.3)
+        tracer.flush()
+        plan = read_entries(slow_log)[1]['plan']
+        assert plan[0]['plan'] == [{'table': 'Cookbook', 'key': 'CookbookUserName'}]
+        assert 'error' in plan[2]
+        explains = [params for statement, params in cursor.executed if statement.startswith('EXPLAIN')]
+        assert explains[3:5] == [[1, 51], [1, 'b', 51]]
+        # The procedure body is only read once
+        assert sum('ROUTINES' in statement for statement, _ in cursor.executed) == 1
+
+    def test_slow_call_is_explained_off_the_calling_thread(self, slow_log):
+        started, unblock = threading.Event(), threading.Event()
+        threads = []
+        @contextlib.contextmanager
+        def connection():
+            # Stands in for a pool with no free connection
+            threads.append(threading.current_thread())
+            started.set()
+            unblock.wait(5)
+            raise mysql.connector.errors.PoolError("Timed out waiting for a database connection")
+            yield
+        tracer = CallTracer(threshold=0, log_path=slow_log, explain=True, connection=connection, max_pending=1)
+        tracer.record('GetAllCookbookNames', [1], [[]], 0.3)
+        assert started.wait(5)
+        tracer.record('GetAllCookbookNames', [2], [[]], 0.3)
+        tracer.record('GetAllCookbookNames', [3], [[]], 0.3)
+        # The worker is busy and one call is waiting, so the third is logged at once
+        assert [entry['params'] for entry in read_entries(slow_log)] == [[3]]
+        assert tracer.get_stats()['dropped_explains'] == 1
+        unblock.set()
+        tracer.flush()
+        entries = read_entries(slow_log)
+        assert [entry['params'] for entry in entries] == [[3], [1], [2]]
+        assert 'Timed out' in entries[1]['plan'][0]['error']
+        assert threads[0] is not threading.current_thread()
+
+    def test_open_log_replaces_file(self, slow_log):
+        tracer = CallTracer(threshold=0, log_path=slow_log)
+        tracer.open_log(slow_log + '.2')
+        tracer.record('GetAllCookbookNames', [1], [[]], 0.1)
+        assert not os.path.exists(slow_log)
+        assert len(read_entries(slow_log + '.2')) == 1
+
+    def test_dal_call_procedure_returns_result_sets(self):
+        dal = DAL()
+        dal.tracer = MagicMock()
+        first, second = MagicMock(), MagicMock()
+        first.fetchall.return_value = [('cookbook1', 1)]
+        second.fetchall.return_value = [('recipe1',), ('recipe2',)]
+        cursor = MagicMock()
+        cursor.stored_results.return_value = iter([first, second])
+        result_sets = dal.call_procedure(cursor, 'GetCookbookDetail', ['cookbook1', 1])
+        assert result_sets == [[('cookbook1', 1)], [('recipe1',), ('recipe2',)]]
+        procedure, args, traced_sets, seconds, error = dal.tracer.record.call_args[0]
+        assert (procedure, args, traced_sets, error) == ('GetCookbookDetail', ['cookbook1', 1], result_sets, None)
+        assert seconds >= 0
@@ -0,0 +1,181 @@
+"""
+    A class to test the ConnectionPool class methods.
+
+    Fixtures
+    ----------
+    - pool - Creates a small pool that hands out fake connections
+
+    Tested Methods
+    --------------
+    - acquire
+    - release
+    - connection
+    - dispose
+    - get_stats
+    - DAL.reset_after_fork
+"""
+
+import pytest, sys, os, threading
+from mysql.connector.errors import PoolError
+
+# Add the backend directory to the system path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from connection_pool import ConnectionPool
+from meal_planning_backend import DAL
+
+class FakeConnection:
+    """A stand in for a MySQL connection that records how it was used."""
+
+    def __init__(self):
+        self.alive = True
+        self.closed = False
+        self.in_transaction = False
+        self.rolled_back = False
+
+    def is_connected(self):
+        return self.alive
+
+    def rollback(self):
+        self.rolled_back = True
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+@pytest.fixture
+def pool():
+    """Fixture to create a pool of two connections with one overflow."""
+    return ConnectionPool(FakeConnection, pool_size=2, max_overflow=1, timeout=0.1)
+
+class TestConnectionPool:
+
+    def test_connection_is_reused(self, pool):
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            pass
+        assert first is second
+        assert pool.get_stats()['created'] == 1
+        assert pool.get_stats()['borrowed'] == 2
+
+    def test_overflow_connection_is_closed_on_release(self, pool):
+        connections = [pool.acquire() for _ in range(3)]
+        assert pool.get_stats()['checked_out'] == 3
+        for connector in connections:
+            pool.release(connector)
+        stats = pool.get_stats()
+        assert stats['idle'] == 2
+        assert stats['checked_out'] == 0
+        assert sum(connector.closed for connector in connections) == 1
+
+    def test_exhausted_pool_times_out(self, pool):
+        connections = [pool.acquire() for _ in range(3)]
+        with pytest.raises(PoolError):
+            pool.acquire()
+        assert pool.get_stats()['timeouts'] == 1
+        for connector in connections:
+            pool.release(connector)
+
+    def test_waiting_borrower_gets_released_connection(self, pool):
+        pool.timeout = 5
+        connections = [pool.acquire() for _ in range(3)]
+        borrowed = []
+        waiter = threading.Thread(target=lambda: borrowed.append(pool.acquire()))
+        waiter.start()
+        pool.release(connections[0])
+        waiter.join(timeout=5)
+        assert borrowed == [connections[0]]
+        assert pool.get_stats()['waits'] >= 1
+
+    def test_dead_connection_is_replaced(self, pool):
+        with pool.connection() as first:
+            pass
+        first.alive = False
+        with pool.connection() as second:
+            pass
+        assert second is not first
+        assert first.closed
+        assert pool.get_stats()['failed_pings'] == 1
+
+    def test_ping_does_not_hold_the_lock(self, pool):
+        pool.timeout = 5
+        pinging, unblock = threading.Event(), threading.Event()
+        with pool.connection() as slow:
+            pass
+        def is_connected():
+            pinging.set()
+            return unblock.wait(5)
+        slow.is_connected = is_connected
+        borrowed = []
+        pinger = threading.Thread(target=lambda: borrowed.append(pool.acquire()))
+        pinger.start()
+        assert pinging.wait(5)
+        # The lock is free, so other borrowers are served during the ping
+        with pool.connection() as other:
+            assert other is not slow
+        assert pool.get_stats()['checked_out'] == 1
+        unblock.set()
+        pinger.join(timeout=5)
+        assert borrowed == [slow]
+
+    def test_close_does_not_hold_the_lock(self, pool):
+        closing, unblock = threading.Event(), threading.Event()
+        def close():
+            closing.set()
+            unblock.wait(5)
+        def close_in_background(close_all):
+            closing.clear()
+            unblock.clear()
+            closer = threading.Thread(target=close_all)
+            closer.start()
+            assert closing.wait(5)
+            # The lock is free, so the pool answers while the close runs
+            assert pool.get_stats()['closed'] >= 1
+            unblock.set()
+            closer.join(timeout=5)
+        connections = [pool.acquire() for _ in range(3)]
+        for connector in connections:
+            connector.close = close
+        # The first connection back is overflow and closed on release
+        close_in_background(lambda: pool.release(connections[0]))
+        pool.release(connections[1])
+        pool.release(connections[2])
+        close_in_background(pool.dispose)
+        assert pool.get_stats()['closed'] == 3
+
+    def test_idle_connection_expires(self, pool):
+        pool.idle_timeout = 0
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            pass
+        assert second is not first
+        assert pool.get_stats()['expired'] == 1
+
+    def test_open_transaction_is_rolled_back(self, pool):
+        with pool.connection() as connector:
+            connector.in_transaction = True
+        assert connector.rolled_back
+
+    def test_connection_returned_when_block_raises(self, pool):
+        with pytest.raises(RuntimeError):
+            with pool.connection():
+                raise RuntimeError("boom")
+        assert pool.get_stats()['checked_out'] == 0
+        assert pool.get_stats()['idle'] == 1
+
+    def test_dispose_without_closing(self, pool):
+        with pool.connection() as connector:
+            pass
+        pool.dispose(close_connections=False)
+        assert pool.get_stats()['idle'] == 0
+        assert not connector.closed
+
+    def test_dal_reset_after_fork_replaces_pool(self):
+        dal = DAL()
+        parent_pool = dal.pool
+        parent_versions = dal.cache.versions
+        dal.reset_after_fork()
+        assert dal.pool is not parent_pool
+        assert dal.cache.versions is parent_versions
@@ -1,16 +1,22 @@
-import pytest, os, sys
+import pytest, os, sys, json
+import mysql.connector
+from unittest.mock import MagicMock
 
 # Add the backend directory to the system path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
 
 from meal_planning_backend import DAL, BusinessLogic
 
-db_user_name = os.getenv('DB_USER_NAME')
-db_password = os.getenv('DB_PASSWORD')
-
 @pytest.fixture
 def dal():
-    return DAL(db_user_name, db_password)
+    """Fixture to connect to the database configured by DB_USER and DB_PASSWORD, skipping when it is down."""
+    dal = DAL()
+    try:
+        with dal.pool.connection():
+            pass
+    except mysql.connector.Error as err:
+        pytest.skip(f"MealPlanning database is not reachable: {err}")
+    return dal
 
 class TestDAL:
     """
@@ -21,15 +27,32 @@ class TestDAL:
     
     Tested Methods:
     - get cookbook names - test
+    - get cookbook names page - test
     - get cookbook info - test
+    - get cookbook detail - test
+    - cookbook exists - test
     - add cookbook - test
     - delete cookbook - test
     - get recipe names - test
+    - get recipe names page - test
+    - iter recipe names - test
     - get recipe info - test
+    - get recipes info - test
+    - search - test
+    - autocomplete - test
+    - resolve recipe - test
+    - recipe exists - test
     - get recipe ingredients - test
     - add recipe - test
+    - add recipe with ingredients - test
     - delete recipe - test
     - add ingredient recipe pairing - test
+    - add ingredients bulk - test
+    - get meal plan - test
+    - get shopping list - test
+    - match pantry - test
+    - get recipes by ingredient - test
+    - set meal plan - test
     - add user - test
     - delete user - test
     - get user password - test
@@ -53,6 +76,18 @@ class TestDAL:
         # Check that the method returned the correct cookbook names
         assert cookbook_names == ['Dinner Staples', 'Easy Meals', 'Half Baked Harvest - Brunch', 'Half Baked Harvest - Mains']
     
+    # Test DAL get cookbook names page method
+    def test_get_cookbook_names_page(self, dal):
+    
+        # Walk the cookbooks two at a time
+        first_page, after = dal.get_cookbook_names_page(1, limit=2)
+        second_page, last = dal.get_cookbook_names_page(1, after=after, limit=2)
+    
+        # Check that the pages cover every cookbook in name order
+        assert first_page == ['Dinner Staples', 'Easy Meals']
+        assert second_page == ['Half Baked Harvest - Brunch', 'Half Baked Harvest - Mains']
+        assert last is None
+
     # Test DAL get cookbook info method
     def test_get_cookbook_info(self, dal):
     
@@ -62,6 +97,32 @@ class TestDAL:
         # Check that the method returned the correct cookbook information
         assert cookbook_info == ('Dinner Staples', 1, None, 1)
 
+    # Test DAL get cookbook detail method
+    def test_get_cookbook_detail(self, dal):
+    
+        # Call the method to test
+        cookbook_info, recipe_names = dal.get_cookbook_detail('Easy Meals', 1)
+    
+        # Check that the method returned the cookbook and its recipes
+        assert cookbook_info == ('Easy Meals', 1, None, 1)
+        assert sorted(recipe_names) == ['Beans & Rice', 'Macaroni & Cheese']
+
+    # Test DAL get cookbook detail method for a missing cookbook
+    def test_get_cookbook_detail_missing(self, dal):
+    
+        # Call the method to test
+        cookbook_detail = dal.get_cookbook_detail('Not A Cookbook', 1)
+    
+        # Check that the method returned no cookbook and no recipes
+        assert cookbook_detail == (None, [])
+
+    # Test DAL cookbook exists method
+    def test_cookbook_exists(self, dal):
+    
+        # Check an existing and a missing cookbook
+        assert dal.cookbook_exists('Easy Meals', 1) is True
+        assert dal.cookbook_exists('Not A Cookbook', 1) is False
+
     # Test DAL add cookbook method
     def test_add_cookbook(self, dal):
     
@@ -120,6 +181,27 @@ class TestDAL:
         # Check that the method returned the correct recipe names
         assert recipe_names == ['Beans & Rice', 'Blueberry Croissant French Toast Bake', 'Grilled Buffalo Ranch Chicken Tacos', 'Hamburgers', 'Macaroni & Cheese']
     
+    # Test DAL get recipe names page method
+    def test_get_recipe_names_page(self, dal):
+    
+        # Walk the recipes three at a time
+        first_page, after = dal.get_recipe_names_page(1, limit=3)
+        second_page, last = dal.get_recipe_names_page(1, after=after, limit=3)
+    
+        # Check that the pages cover every recipe in name order
+        assert first_page + second_page == ['Beans & Rice', 'Blueberry Croissant French Toast Bake', 'Grilled Buffalo Ranch Chicken Tacos', 'Hamburgers', 'Macaroni & Cheese']
+        assert last is None
+
+    # Test DAL iter recipe names method
+    def test_iter_recipe_names(self, dal):
+    
+        # Stream the recipes two at a time
+        chunks = list(dal.iter_recipe_names(1, chunk_size=2))
+    
+        # Check that the chunks are bounded and cover every recipe in name order
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        assert sum(chunks, []) == ['Beans & Rice', 'Blueberry Croissant French Toast Bake', 'Grilled Buffalo Ranch Chicken Tacos', 'Hamburgers', 'Macaroni & Cheese']
+
     # Test DAL get recipe info method
     def test_get_recipe_info(self, dal):
     
@@ -129,6 +211,118 @@ class TestDAL:
         # Check that the method returned the correct recipe information
         assert recipe_info == ('Beans & Rice', 'Easy Meals', 2, 0, None, 1)
 
+    # Test DAL get recipes info method
+    def test_get_recipes_info(self, dal):
+    
+        # Call the method to test
+        recipes = dal.get_recipes_info(('Hamburgers', 'Missing Recipe', 'Beans & Rice'), 1)
+    
+        # Check that the recipes found came back in the order asked for
+        assert [recipe_info[0] for recipe_info, _ in recipes] == ['Hamburgers', 'Beans & Rice']
+        assert recipes[0][1] == dal.get_recipe_ingredients('Hamburgers', 1)
+    
+        # Check that names the collation treats as equal find the recipe once
+        recipes = dal.get_recipes_info(('hamburgers', 'HAMBURGERS', 'Hamburgers'), 1)
+        assert len(recipes) == 1
+        assert recipes[0][1] == dal.get_recipe_ingredients('Hamburgers', 1)
+
+    # Test how DAL get recipes info groups the GetRecipesInfo result sets
+    def test_get_recipes_info_groups_ingredients(self):
+    
+        # Mock the database
+        dal = DAL()
+        dal.pool = MagicMock()
+        dal.call_procedure = MagicMock(return_value=[
+            [('Tacos', None, 4, 0, None, 1), ('Soup', 'Dinner', 2, 1, 'http://example.com', 1)],
+            [('Soup', 'Carrot'), ('Tacos', 'Salsa'), ('Soup', 'Leek')]])
+    
+        # Call the method to test
+        recipes = dal.get_recipes_info(('Tacos', 'Soup'), 1)
+    
+        # Check that each recipe got its own ingredients
+        assert json.loads(dal.call_procedure.call_args[0][2][0]) == ['Tacos', 'Soup']
+        assert [(recipe_info[0], ingredients) for recipe_info, ingredients in recipes] == [
+            ('Tacos', ['Salsa']), ('Soup', ['Carrot', 'Leek'])]
+
+    # Test how DAL get pantry index encodes the GetPantryDocuments result sets
+    def test_get_pantry_index_encodes_recipes(self):
+    
+        # Mock the database
+        dal = DAL()
+        dal.pool = MagicMock()
+        dal.call_procedure = MagicMock(return_value=[
+            [(7, 'Carrot'), (3, 'Leek'), (9, 'Salsa')],
+            [('Soup', 7), ('Tacos', 9), ('Soup', 3)]])
+    
+        # Call the method to test, twice
+        recipes, unknown = dal.match_pantry(['leek'], 1)
+        dal.match_pantry(['salsa'], 1)
+    
+        # Check that the index was read once and matched by name
+        dal.call_procedure.assert_called_once()
+        assert recipes == [('Soup', 1, ['Carrot'])]
+        assert unknown == []
+
+    # Test DAL match pantry method
+    def test_match_pantry(self, dal):
+    
+        # Call the method to test
+        recipes, unknown = dal.match_pantry(['black beans', 'White Rice', 'Saffron'], 1)
+    
+        # Check that the recipe made of the pantry comes first
+        assert recipes[0] == ('Beans & Rice', 2, [])
+        assert unknown == ['Saffron']
+
+    # Test DAL get recipes by ingredient method
+    def test_get_recipes_by_ingredient(self, dal):
+    
+        # Call the method to test
+        both, unknown = dal.get_recipes_by_ingredient(['Black Beans', 'white rice'], 1)
+        either, _ = dal.get_recipes_by_ingredient(['Black Beans', 'White Rice'], 1, match_all=False)
+    
+        # Check that the recipes using both are among those using either
+        assert 'Beans & Rice' in both
+        assert set(both) <= set(either)
+        assert unknown == []
+
+    # Test DAL search method
+    def test_search(self, dal):
+    
+        # Call the method to test, before and after adding a recipe
+        before = dal.search('hamburg', 1)
+        dal.add_recipe('Hamburger Helper', None, 2, False, 1)
+        after = dal.search('HAMBURG', 1, kinds=('recipe',))
+    
+        # Check that the index picked up the new recipe without a rebuild
+        assert ('recipe', 'Hamburgers') in before
+        assert after == [('recipe', 'Hamburgers'), ('recipe', 'Hamburger Helper')]
+        assert dal.get_search_stats()['builds'] == 1
+    
+        # Delete the recipe
+        dal.delete_recipe('Hamburger Helper', 1)
+        assert dal.search('helper', 1) == []
+
+    # Test DAL autocomplete method
+    def test_autocomplete(self, dal):
+    
+        # Check that the recipes starting with the prefix come back in order
+        assert dal.autocomplete('ham', 1, kinds=('recipe',)) == [('recipe', 'Hamburgers')]
+        assert dal.autocomplete('zzz', 1) == []
+
+    # Test DAL resolve recipe method
+    def test_resolve_recipe(self, dal):
+    
+        # Check that a mistyped recipe name resolves to the closest recipe
+        assert dal.resolve_recipe('hamburgr', 1) == [('Hamburgers', 1)]
+        assert dal.resolve_recipe('zzz', 1) == []
+
+    # Test DAL recipe exists method
+    def test_recipe_exists(self, dal):
+    
+        # Check an existing and a missing recipe
+        assert dal.recipe_exists('Beans & Rice', 1) is True
+        assert dal.recipe_exists('Not A Recipe', 1) is False
+
     # Test DAL get recipe ingredients method
     def test_get_recipe_ingredients(self, dal):
     
@@ -173,6 +367,36 @@ class TestDAL:
         # Delete the recipe
         dal.delete_recipe(recipe_name, user_id)
     
+    # Test DAL add recipe with ingredients method
+    def test_add_recipe_with_ingredients(self, dal):
+    
+        # Test data
+        recipe_name = 'Test Recipe'
+        cookbook_name = 'Test Cookbook'
+        ingredient_names = ['Test Ingredient 1', 'Test Ingredient 2', ' test ingredient 1']
+        user_id = 1
+    
+        # Add the cookbook and one of the ingredients to the database
+        dal.add_cookbook(cookbook_name, True, user_id, None)
+        dal.add_ingredient('Test Ingredient 1', user_id)
+    
+        # Call the method to test
+        result = dal.add_recipe_with_ingredients(recipe_name, cookbook_name, 2, False, ingredient_names, user_id, None)
+        repeated = dal.add_recipe_with_ingredients(recipe_name, cookbook_name, 2, False, ['Test Ingredient 3'], user_id, None)
+    
+        # Check that the recipe was paired with each ingredient once and the 
+        # refused repeat left nothing behind
+        assert result is None
+        assert repeated == 'Error: Recipe already exists'
+        assert sorted(dal.get_recipe_ingredients(recipe_name, user_id)) == ['Test Ingredient 1', 'Test Ingredient 2']
+        assert dal.add_ingredients_bulk(['Test Ingredient 3'], user_id)[0]['status'] == 'added'
+    
+        # Delete the cookbook, recipe, and ingredients
+        dal.delete_cookbook(cookbook_name, user_id)
+        dal.delete_recipe(recipe_name, user_id)
+        for ingredient_name in ['Test Ingredient 1', 'Test Ingredient 2', 'Test Ingredient 3']:
+            dal.delete_ingredient(ingredient_name, user_id)
+
     # Test DAL delete recipe method
     def test_delete_recipe(self, dal):
     
@@ -233,6 +457,76 @@ class TestDAL:
         dal.delete_recipe(recipe_name, user_id)
         dal.delete_ingredient(ingredient_name, user_id)
     
+    # Test DAL add ingredients bulk method
+    def test_add_ingredients_bulk(self, dal):
+    
+        # Test data
+        ingredient_names = ['Test Ingredient 1', ' test ingredient 1', 'Test Ingredient 2', '', 
+                            'Test Creme', 'Test Crème']
+        user_id = 1
+    
+        # Call the method to test
+        results = dal.add_ingredients_bulk(ingredient_names, user_id)
+        repeated = dal.add_ingredients_bulk(['Test Ingredient 2'], user_id)
+    
+        # Check that each name got its status, accents compared like the database
+        assert [result['status'] for result in results] == ['added', 'duplicate', 'added', 'invalid', 
+                                                            'added', 'duplicate']
+        assert repeated == [{'name': 'Test Ingredient 2', 'status': 'exists'}]
+    
+        # Delete the ingredients
+        dal.delete_ingredient('Test Ingredient 1', user_id)
+        dal.delete_ingredient('Test Ingredient 2', user_id)
+        dal.delete_ingredient('Test Creme', user_id)
+
+    # Test how DAL add ingredients bulk reads the AddIngredients result sets
+    def test_add_ingredients_bulk_statuses(self):
+    
+        # Mock the database, which already has Salt and has one slot left
+        dal = DAL()
+        dal.pool = MagicMock()
+        # Crème matches the Creme inserted before it without being inserted
+        dal.call_procedure = MagicMock(return_value=[[('salt',)], [('salt', 0), ('Creme', 1), ('Crème', 0)]])
+    
+        # Call the method to test
+        results = dal.add_ingredients_bulk(['Creme', 'salt', 'CREME', 'Crème', 'Cumin', 'x' * 101, 7], 1)
+    
+        # Check that the names were sent once each and got their statuses
+        args = dal.call_procedure.call_args[0][2]
+        assert json.loads(args[0]) == ['Creme', 'salt', 'Crème', 'Cumin']
+        assert [result['status'] for result in results] == [
+            'added', 'exists', 'duplicate', 'duplicate', 'quota_exceeded', 'invalid', 'invalid']
+    
+    #Meal plan tests
+
+    # Test DAL set and get meal plan methods
+    def test_set_meal_plan(self, dal):
+    
+        # Test data
+        user_id = 1
+        meals = [{'date': '2030-01-07', 'slot': 'dinner', 'recipe_name': 'Hamburgers'},
+                 {'date': '2030-01-08', 'slot': 'lunch', 'recipe_name': 'Beans & Rice'}]
+    
+        # Call the methods to test
+        result = dal.set_meal_plan(user_id, '2030-01-07', '2030-01-13', meals)
+        refused = dal.set_meal_plan(user_id, '2030-01-07', '2030-01-13', [{'date': '2030-01-07', 'slot': 'dinner', 'recipe_name': 'Not A Recipe'}])
+        plan = dal.get_meal_plan(user_id, '2030-01-07', '2030-01-13')
+    
+        # Check that the week came back in order and the refused plan left it alone
+        assert result is None
+        assert refused == 'Error: Recipe does not exist'
+        assert [(str(meal[0]), meal[1], meal[2]) for meal in plan] == [
+            ('2030-01-07', 'dinner', 'Hamburgers'), ('2030-01-08', 'lunch', 'Beans & Rice')]
+    
+        # Check that an ingredient of both recipes is listed once, counted twice
+        shopping_list = dict(dal.get_shopping_list(user_id, '2030-01-07', '2030-01-13'))
+        assert sorted(shopping_list) == sorted(set(dal.get_recipe_ingredients('Hamburgers', user_id)) | set(dal.get_recipe_ingredients('Beans & Rice', user_id)))
+        assert set(shopping_list.values()) <= {1, 2}
+    
+        # Clear the week
+        assert dal.set_meal_plan(user_id, '2030-01-07', '2030-01-13', []) is None
+        assert dal.get_meal_plan(user_id, '2030-01-07', '2030-01-13') == []
+    
     #User tests
     #Test DAL add user method
     def test_add_user(self, dal):
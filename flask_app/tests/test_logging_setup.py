@@ -0,0 +1,85 @@
+"""
+    A class to test the logging configuration of the back-end.
+
+    Fixtures
+    ----------
+    - log_stream - Routes the application's loggers to an in-memory stream
+
+    Tested Methods
+    --------------
+    - parse_levels
+    - configure_logging
+    - stop_logging
+    - JsonFormatter.format
+"""
+
+import pytest, sys, os, io, json, logging, logging.handlers
+
+# Add the backend directory to the system path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+import logging_setup
+from logging_setup import parse_levels, configure_logging, stop_logging, request_id_var
+
+@pytest.fixture
+def log_stream(monkeypatch):
+    """Fixture to configure logging at INFO with the DAL at WARNING."""
+    monkeypatch.setenv('LOG_LEVEL', 'INFO')
+    monkeypatch.setenv('LOG_LEVELS', 'meal_planning.dal=WARNING')
+    stream = io.StringIO()
+    configure_logging(stream)
+    yield stream
+    stop_logging()
+    root = logging.getLogger('meal_planning')
+    for handler in list(root.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            root.removeHandler(handler)
+    root.propagate = True
+
+def read_records(stream):
+    stop_logging()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+class TestLoggingSetup:
+
+    def test_parse_levels(self):
+        levels = parse_levels('warning', 'meal_planning.dal=DEBUG, meal_planning.http = ERROR')
+        assert levels == {'meal_planning': logging.WARNING,
+                          'meal_planning.dal': logging.DEBUG,
+                          'meal_planning.http': logging.ERROR}
+
+    def test_parse_levels_rejects_bad_input(self):
+        with pytest.raises(ValueError):
+            parse_levels('LOUD', '')
+        with pytest.raises(ValueError):
+            parse_levels('INFO', 'meal_planning.dal')
+
+    def test_records_are_json_with_request_id(self, log_stream):
+        token = request_id_var.set('abc-123')
+        try:
+            logging.getLogger('meal_planning.http').info("User %s logged in", 7, extra={'route': '/login'})
+        finally:
+            request_id_var.reset(token)
+        records = read_records(log_stream)
+        assert len(records) == 1
+        assert records[0]['message'] == 'User 7 logged in'
+        assert records[0]['level'] == 'INFO'
+        assert records[0]['logger'] == 'meal_planning.http'
+        assert records[0]['request_id'] == 'abc-123'
+        assert records[0]['route'] == '/login'
+
+    def test_records_below_level_are_dropped(self, log_stream):
+        logging.getLogger('meal_planning.dal').info("Cookbook '%s' added successfully.", 'cookbook1')
+        logging.getLogger('meal_planning.http').debug("Add user result: %s", None)
+        logging.getLogger('meal_planning.dal').warning("Error: %s", 'Duplicate cookbook')
+        records = read_records(log_stream)
+        assert [record['message'] for record in records] == ['Error: Duplicate cookbook']
+        assert 'request_id' not in records[0]
+
+    def test_reconfiguring_replaces_the_handler(self, log_stream):
+        configure_logging(log_stream)
+        logging.getLogger('meal_planning.http').warning("once")
+        records = read_records(log_stream)
+        assert len(records) == 1
+        handlers = logging.getLogger('meal_planning').handlers
+        assert sum(isinstance(handler, logging.handlers.QueueHandler) for handler in handlers) == 1
@@ -0,0 +1,81 @@
+"""
+    A class to test the metric classes and their text exposition.
+
+    Tested Methods
+    --------------
+    - Counter.labels / inc
+    - Gauge.labels / inc / dec
+    - Histogram.labels / observe
+    - MetricsRegistry.render
+    - render_samples
+    - DAL.call_procedure
+"""
+
+import pytest, sys, os
+from unittest.mock import MagicMock
+import mysql.connector
+
+# Add the backend directory to the system path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+import metrics
+from metrics import Counter, Gauge, Histogram, MetricsRegistry
+from meal_planning_backend import DAL
+
+class TestMetrics:
+
+    def test_counter_and_gauge_render(self):
+        registry = MetricsRegistry()
+        requests = registry.register(Counter('requests_total', 'Requests.', ('route',)))
+        in_flight = registry.register(Gauge('in_flight', 'In flight.'))
+        requests.labels('/a').inc()
+        requests.labels('/a').inc()
+        in_flight.labels().inc()
+        in_flight.labels().dec()
+        body = registry.render()
+        assert '# TYPE requests_total counter' in body
+        assert 'requests_total{route="/a"} 2' in body
+        assert 'in_flight 0' in body
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        latency = registry.register(Histogram('latency_seconds', 'Latency.', ('route',), buckets=(0.1, 1)))
+        for amount in (0.05, 0.5, 5):
+            latency.labels('/a').observe(amount)
+        body = registry.render()
+        assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in body
+        assert 'latency_seconds_bucket{route="/a",le="1"} 2' in body
+        assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in body
+        assert 'latency_seconds_sum{route="/a"} 5.55' in body
+        assert 'latency_seconds_count{route="/a"} 3' in body
+
+    def test_label_values_are_escaped(self):
+        registry = MetricsRegistry()
+        requests = registry.register(Counter('requests_total', 'Requests.', ('route',)))
+        requests.labels('a"b\\c').inc()
+        assert 'requests_total{route="a\\"b\\\\c"} 1' in registry.render()
+
+    def test_samples_split_counters_from_gauges(self):
+        lines = metrics.render_samples('db_pool', 'Pool statistic.', 
+                                       {'pool_size': 5, 'borrowed': 12, 'pre_ping': True, 'mode': 'lifo'}, 
+                                       metrics.POOL_COUNTERS)
+        assert lines == ['# HELP db_pool_borrowed_total Pool statistic.', 
+                         '# TYPE db_pool_borrowed_total counter', 
+                         'db_pool_borrowed_total 12', 
+                         '# HELP db_pool_pool_size Pool statistic.', 
+                         '# TYPE db_pool_pool_size gauge', 
+                         'db_pool_pool_size 5']
+
+    def test_wrong_label_count_is_rejected(self):
+        with pytest.raises(ValueError):
+            Counter('requests_total', 'Requests.', ('route',)).labels()
+
+    def test_call_procedure_records_latency_and_errors(self):
+        dal = DAL()
+        cursor = MagicMock()
+        dal.call_procedure(cursor, 'MetricsTestProcedure', [1])
+        cursor.callproc.side_effect = mysql.connector.Error("boom")
+        with pytest.raises(mysql.connector.Error):
+            dal.call_procedure(cursor, 'MetricsTestProcedure', [1])
+        assert metrics.DB_PROCEDURE_SECONDS.labels('MetricsTestProcedure').count == 2
+        assert metrics.DB_PROCEDURE_ERRORS.labels('MetricsTestProcedure').value == 1
@@ -0,0 +1,97 @@
+"""
+    A class to test the PantryIndex class.
+
+    Tested Methods
+    --------------
+    - PantryIndex.match
+    - PantryIndex.recipes_using
+"""
+
+import pytest, sys, os, random, time
+
+# Add the backend directory to the system path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from pantry_index import PantryIndex
+
+INGREDIENTS = [(11, 'Black Beans'), (12, 'Cheese'), (13, 'Ground Beef'), (14, 'Tortillas'), (15, 'White Rice')]
+PAIRINGS = [('Beans & Rice', 11), ('Beans & Rice', 15),
+            ('Tacos', 13), ('Tacos', 14), ('Tacos', 12),
+            ('Quesadillas', 14), ('Quesadillas', 12),
+            ('Burritos', 11), ('Burritos', 15), ('Burritos', 14), ('Burritos', 12)]
+
+def brute_force(pairings, pantry, limit):
+    recipes = {}
+    for recipe_name, ingredient_name in pairings:
+        recipes.setdefault(recipe_name, set()).add(ingredient_name)
+    ranked = sorted((len(needed - pantry), -len(needed & pantry), recipe_name)
+                    for recipe_name, needed in recipes.items() if needed & pantry)
+    return [(recipe_name, -on_hand, sorted(recipes[recipe_name] - pantry))
+            for missing, on_hand, recipe_name in ranked[:limit]]
+
+class TestPantryIndex:
+
+    def test_makeable_recipes_come_first(self):
+        pantry_index = PantryIndex(INGREDIENTS, PAIRINGS)
+        assert len(pantry_index) == 4
+        assert pantry_index.match(['black beans', ' WHITE RICE', 'Tortillas']) == ([
+            ('Beans & Rice', 2, []), ('Burritos', 3, ['Cheese']),
+            ('Quesadillas', 1, ['Cheese']), ('Tacos', 1, ['Cheese', 'Ground Beef'])], [])
+
+    def test_limits_and_unknown_ingredients(self):
+        pantry_index = PantryIndex(INGREDIENTS, PAIRINGS)
+        assert pantry_index.match(['Cheese', 'Saffron'], limit=2) == (
+            [('Quesadillas', 1, ['Tortillas']), ('Tacos', 1, ['Ground Beef', 'Tortillas'])], ['Saffron'])
+        assert pantry_index.match(['Cheese'], max_missing=1) == ([('Quesadillas', 1, ['Tortillas'])], [])
+        assert pantry_index.match(['Saffron']) == ([], ['Saffron'])
+        assert PantryIndex([], []).match(['Cheese']) == ([], ['Cheese'])
+
+    def test_match_equals_brute_force(self):
+        rng = random.Random(5)
+        ingredients = [(ingredient_id, f'Ingredient {ingredient_id:03}') for ingredient_id in rng.sample(range(1000), 500)]
+        pairings = [(f'Recipe {n}', ingredient_id) for n in range(300)
+                    for ingredient_id, _ in rng.sample(ingredients, rng.randint(1, 12))]
+        names = dict(ingredients)
+        pantry_index = PantryIndex(sorted(ingredients, key=lambda ingredient: ingredient[1]), pairings)
+        for _ in range(20):
+            pantry = {name for _, name in rng.sample(ingredients, 60)}
+            expected = brute_force([(recipe_name, names[ingredient_id]) for recipe_name, ingredient_id in pairings], pantry, 25)
+            assert pantry_index.match(list(pantry), limit=25) == (expected, [])
+
+    def test_recipes_using_all_or_any(self):
+        pantry_index = PantryIndex(INGREDIENTS, PAIRINGS)
+        assert pantry_index.recipes_using(['cheese', 'Tortillas']) == (['Burritos', 'Quesadillas', 'Tacos'], [])
+        assert pantry_index.recipes_using(['Cheese', 'Black Beans']) == (['Burritos'], [])
+        assert pantry_index.recipes_using(['Ground Beef', 'White Rice'], match_all=False) == (
+            ['Beans & Rice', 'Burritos', 'Tacos'], [])
+        assert pantry_index.recipes_using(['Cheese', 'Saffron']) == ([], ['Saffron'])
+        assert pantry_index.recipes_using(['Ground Beef', 'Saffron'], match_all=False) == (['Tacos'], ['Saffron'])
+
+    def test_recipes_using_equals_brute_force(self):
+        rng = random.Random(7)
+        ingredients = [(ingredient_id, f'Ingredient {ingredient_id:02}') for ingredient_id in range(40)]
+        pairings = [(f'Recipe {n:03}', ingredient_id) for n in range(500)
+                    for ingredient_id in rng.sample(range(40), rng.randint(1, 10))]
+        uses = {}
+        for recipe_name, ingredient_id in pairings:
+            uses.setdefault(recipe_name, set()).add(ingredient_id)
+        pantry_index = PantryIndex(ingredients, pairings)
+        for _ in range(50):
+            wanted = set(rng.sample(range(40), rng.randint(1, 4)))
+            names = [f'Ingredient {ingredient_id:02}' for ingredient_id in wanted]
+            assert pantry_index.recipes_using(names) == (
+                sorted(recipe_name for recipe_name, used in uses.items() if wanted <= used), [])
+            assert pantry_index.recipes_using(names, match_all=False) == (
+                sorted(recipe_name for recipe_name, used in uses.items() if wanted & used), [])
+
+    def test_match_of_a_large_library_is_fast(self):
+        rng = random.Random(6)
+        ingredients = [(ingredient_id, f'Ingredient {ingredient_id:03}') for ingredient_id in range(500)]
+        pairings = [(f'Recipe {n}', ingredient_id) for n in range(5000) for ingredient_id in rng.sample(range(500), 8)]
+        pantry_index = PantryIndex(ingredients, pairings)
+        pantry = [name for _, name in rng.sample(ingredients, 40)]
+        start = time.perf_counter()
+        for _ in range(20):
+            recipes, unknown = pantry_index.match(pantry)
+        assert len(recipes) == 20
+        assert (time.perf_counter() - start) / 20 < 0.02
@@ -0,0 +1,198 @@
+"""
+    A class to check the query plans of the stored procedures.
+
+    A synthetic library is loaded for PLAN_TEST_USERS throwaway users
+    (default 200, each with 10 cookbooks, 100 recipes, 100 ingredients and
+    5 ingredients per recipe), the tables are analyzed, and every SELECT,
+    UPDATE and DELETE in every stored procedure is explained with one user's
+    values.  Each table access must seek an index; a full table or index
+    scan fails the test.  EXPLAIN plans the writes without running them.
+
+    The users are deleted again at the end, which cascades to their library.
+    Like test_dal.py this needs the MealPlanning database, reached with
+    DB_USER and DB_PASSWORD.
+
+    Fixtures
+    ----------
+    - dal - Connects to the database, skipping the tests when it is down
+    - library - Loads and removes the synthetic library
+
+    Tested Procedures
+    -----------------
+    - Every procedure listed by procedure_args, which must list them all
+"""
+
+import pytest, sys, os, json
+import mysql.connector
+
+# Add the backend directory to the system path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from meal_planning_backend import DAL
+from call_tracer import PROCEDURE_BODY_QUERY, PROCEDURE_PARAMETERS_QUERY, explainable_statements
+
+EMAIL_PREFIX = 'plan-test-'
+USERS = int(os.environ.get('PLAN_TEST_USERS', 200))
+COOKBOOKS = 10
+RECIPES = 100
+INGREDIENTS = 100
+INGREDIENTS_PER_RECIPE = 5
+
+# Access types that seek an index instead of reading a whole table or index
+INDEXED_ACCESS = {'system', 'const', 'eq_ref', 'ref', 'range'}
+
+COOKBOOK = 'Plan Cookbook 03'
+RECIPE = 'Plan Recipe 042'
+INGREDIENT = 'Plan Ingredient 042'
+EMAIL = f'{EMAIL_PREFIX}00000@example.com'
+
+def procedure_args(user_id, cookbook_id, recipe_id, ingredient_id):
+    """
+    Returns the parameters each procedure is explained with, and the values
+    of the local variables its statements read.
+    """
+    return {
+        'GetMealIngredients': ([RECIPE, user_id], {}),
+        'GetAllCookbookNames': ([user_id], {}),
+        'GetCookbookInfo': ([COOKBOOK, user_id], {}),
+        'GetAllRecipeNames': ([user_id], {}),
+        'GetCookbookNamesPage': ([user_id, COOKBOOK, 50], {}),
+        'GetRecipeNamesPage': ([user_id, RECIPE, 50], {}),
+        'GetRecipesFromOneCookbookPage': ([COOKBOOK, user_id, RECIPE, 50], {}),
+        'GetRecipesFromOneCookbook': ([COOKBOOK, user_id], {}),
+        'GetCookbookDetail': ([COOKBOOK, user_id], {}),
+        'CookbookExists': ([COOKBOOK, user_id], {}),
+        'RecipeExists': ([RECIPE, user_id], {}),
+        'GetRecipeInfo': ([RECIPE, user_id], {}),
+        'GetRecipesInfo': ([json.dumps([RECIPE, 'Plan Recipe 007']), user_id], {}),
+        'AddCookbook': ([COOKBOOK, True, '', user_id], {}),
+        'DeleteCookbook': ([COOKBOOK, user_id], {}),
+        'UpdateCookbook': ([COOKBOOK, COOKBOOK, True, '', user_id], {}),
+        'AddRecipe': ([RECIPE, COOKBOOK, 2, False, '', user_id], {'myCookbookId': cookbook_id}),
+        'AddRecipeWithIngredients': ([RECIPE, COOKBOOK, 2, False, '', json.dumps([INGREDIENT]), user_id],
+                                     {'addedCount': 1}),
+        'DeleteRecipe': ([RECIPE, user_id], {}),
+        'UpdateRecipe': ([RECIPE, RECIPE, COOKBOOK, 2, user_id], {'newCookbookId': cookbook_id}),
+        'AddIngredient': ([INGREDIENT, user_id], {}),
+        'AddIngredients': ([json.dumps([INGREDIENT, 'Plan Ingredient New']), user_id],
+                           {'addedCount': 1, 'firstAddedId': ingredient_id}),
+        'DeleteIngredient': ([INGREDIENT, user_id], {}),
+        'UpdateIngredient': ([INGREDIENT, INGREDIENT, user_id], {}),
+        'AddIngredientRecipePairing': ([INGREDIENT, RECIPE, user_id],
+                                       {'myIngredientId': ingredient_id, 'myRecipeId': recipe_id}),
+        'GetSearchDocuments': ([user_id], {}),
+        'GetPantryDocuments': ([user_id], {}),
+        'GetMealPlan': ([user_id, '2026-10-12', '2026-10-18'], {}),
+        'GetShoppingList': ([user_id, '2026-10-12', '2026-10-18'], {}),
+        'SetMealPlan': ([user_id, '2026-10-12', '2026-10-18',
+                         json.dumps([{'date': '2026-10-12', 'slot': 'dinner', 'recipe_name': RECIPE}])], {}),
+        'AddUser': ([EMAIL, 'hash', 'Plan', 'Test'], {}),
+        'DeleteUser': ([EMAIL], {}),
+        'GetUserPassword': ([EMAIL], {}),
+        'GetUserInfo': ([EMAIL], {}),
+    }
+
+@pytest.fixture(scope='module')
+def dal():
+    """Fixture to connect to the database, skipping when it is down."""
+    dal = DAL()
+    try:
+        with dal.pool.connection():
+            pass
+    except mysql.connector.Error as err:
+        pytest.skip(f"MealPlanning database is not reachable: {err}")
+    return dal
+
+@pytest.fixture(scope='module')
+def library(dal):
+    """Fixture to load the synthetic library and remove it afterwards."""
+    with dal.pool.connection() as connector:
+        cursor = connector.cursor()
+        cursor.execute("DELETE FROM Users WHERE Email LIKE %s", [EMAIL_PREFIX + '%'])
+        cursor.executemany(
+            "INSERT INTO Users (Email, PasswordHash, FirstName, LastName) VALUES (%s, %s, %s, %s)",
+            [(f'{EMAIL_PREFIX}{n:05d}@example.com', 'hash', 'Plan', 'Test') for n in range(USERS)])
+        cursor.execute("SELECT UserId FROM Users WHERE Email LIKE %s ORDER BY Email", [EMAIL_PREFIX + '%'])
+        user_ids = [row[0] for row in cursor.fetchall()]
+        for user_id in user_ids:
+            cursor.executemany(
+                "INSERT INTO Cookbook (CookbookName, IsBook, UserId) VALUES (%s, %s, %s)",
+                [(f'Plan Cookbook {n:02d}', True, user_id) for n in range(COOKBOOKS)])
+            cursor.execute("SELECT CookbookId FROM Cookbook WHERE UserId = %s ORDER BY CookbookName", [user_id])
+            cookbook_ids = [row[0] for row in cursor.fetchall()]
+            cursor.executemany(
+                "INSERT INTO Recipe (RecipeName, CookbookId, TotalServings, IsOnline, UserId) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                [(f'Plan Recipe {n:03d}', cookbook_ids[n % COOKBOOKS], 2, False, user_id)
+                 for n in range(RECIPES)])
+            cursor.execute("SELECT RecipeId FROM Recipe WHERE UserId = %s ORDER BY RecipeName", [user_id])
+            recipe_ids = [row[0] for row in cursor.fetchall()]
+            cursor.executemany(
+                "INSERT INTO Ingredients (IngredientName, UserId) VALUES (%s, %s)",
+                [(f'Plan Ingredient {n:03d}', user_id) for n in range(INGREDIENTS)])
+            cursor.execute("SELECT Id FROM Ingredients WHERE UserId = %s ORDER BY IngredientName", [user_id])
+            ingredient_ids = [row[0] for row in cursor.fetchall()]
+            cursor.executemany(
+                "INSERT INTO Meal (RecipeId, IngredientId) VALUES (%s, %s)",
+                [(recipe_ids[n], ingredient_ids[(n + k) % INGREDIENTS])
+                 for n in range(RECIPES) for k in range(INGREDIENTS_PER_RECIPE)])
+            connector.commit()
+        ids = []
+        for query, name in (("SELECT CookbookId FROM Cookbook WHERE CookbookName = %s AND UserId = %s", COOKBOOK),
+                            ("SELECT RecipeId FROM Recipe WHERE RecipeName = %s AND UserId = %s", RECIPE),
+                            ("SELECT Id FROM Ingredients WHERE IngredientName = %s AND UserId = %s", INGREDIENT)):
+            cursor.execute(query, [name, user_ids[0]])
+            ids.append(cursor.fetchone()[0])
+        cursor.execute("ANALYZE TABLE Users, UserCounts, Cookbook, Recipe, Ingredients, Meal, MealPlan")
+        cursor.fetchall()
+        cursor.close()
+
+    yield procedure_args(user_ids[0], *ids)
+
+    with dal.pool.connection() as connector:
+        cursor = connector.cursor()
+        cursor.execute("DELETE FROM Users WHERE Email LIKE %s", [EMAIL_PREFIX + '%'])
+        connector.commit()
+        cursor.close()
+
+def explain(dal, procedure, args, local_values):
+    """Returns each statement of a procedure with its EXPLAIN rows."""
+    plans = []
+    with dal.pool.connection() as connector:
+        cursor = connector.cursor(dictionary=True)
+        cursor.execute(PROCEDURE_BODY_QUERY, [procedure])
+        body = cursor.fetchone()['ROUTINE_DEFINITION']
+        cursor.execute(PROCEDURE_PARAMETERS_QUERY, [procedure])
+        parameters = [row['PARAMETER_NAME'] for row in cursor.fetchall()]
+        values = list(args) + list(local_values.values())
+        for statement, positions in explainable_statements(body, parameters + list(local_values),
+                                                           kinds=('SELECT', 'UPDATE', 'DELETE')):
+            cursor.execute("EXPLAIN " + statement, [values[position] for position in positions])
+            plans.append((statement, cursor.fetchall()))
+        cursor.close()
+    return plans
+
+class TestQueryPlans:
+
+    def test_every_procedure_is_covered(self, dal, library):
+        with dal.pool.connection() as connector:
+            cursor = connector.cursor()
+            cursor.execute("SELECT ROUTINE_NAME FROM information_schema.ROUTINES "
+                           "WHERE ROUTINE_SCHEMA = DATABASE() AND ROUTINE_TYPE = 'PROCEDURE'")
+            procedures = {row[0] for row in cursor.fetchall()}
+            cursor.close()
+        assert procedures == set(library)
+
+    @pytest.mark.parametrize('procedure', sorted(procedure_args(0, 0, 0, 0)))
+    def test_procedure_seeks_indexes(self, dal, library, procedure):
+        args, local_values = library[procedure]
+        plans = explain(dal, procedure, args, local_values)
+        assert plans, f"{procedure} has no statement to explain"
+        for statement, rows in plans:
+            for row in rows:
+                # Rows without a table, such as the outer SELECT EXISTS, read 
+                # nothing, and a JSON_TABLE reads the procedure's own parameter
+                if row['table'] is None or 'Table function' in (row['Extra'] or ''):
+                    continue
+                assert row['type'] in INDEXED_ACCESS, (
+                    f"{procedure} scans {row['table']} ({row['type']}): {statement}")
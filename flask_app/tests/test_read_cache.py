@@ -0,0 +1,128 @@
+"""
+    A class to test the ReadCache class and its DAL decorators.
+
+    Fixtures
+    ----------
+    - library - A fake DAL whose reads count how often they reach the database
+
+    Tested Methods
+    --------------
+    - get_or_load
+    - invalidate_user
+    - get_stats
+    - cached_read
+    - invalidates
+"""
+
+import pytest, sys, os
+
+# Add the backend directory to the system path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from read_cache import ReadCache, cached_read, invalidates
+from library_versions import LibraryVersions
+
+class FakeLibrary:
+    """A stand in for the DAL with one read and one write per user."""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.recipes = {1: ['recipe1'], 2: ['recipe2']}
+        self.loads = 0
+
+    @cached_read
+    def get_recipe_names(self, user_id, cookbook_name=""):
+        self.loads += 1
+        if cookbook_name == 'broken':
+            return "Database does not exist"
+        return list(self.recipes[user_id])
+
+    @invalidates
+    def add_recipe(self, recipe_name, user_id):
+        self.recipes[user_id].append(recipe_name)
+
+@pytest.fixture
+def library():
+    """Fixture to create a fake DAL with a small cache."""
+    return FakeLibrary(ReadCache(max_entries=2, ttl=60))
+
+class TestReadCache:
+
+    def test_repeated_read_is_a_hit(self, library):
+        assert library.get_recipe_names(1) == ['recipe1']
+        assert library.get_recipe_names(user_id=1) == ['recipe1']
+        assert library.loads == 1
+        stats = library.cache.get_stats()
+        assert stats['hits'] == 1 and stats['misses'] == 1
+
+    def test_arguments_are_part_of_the_key(self, library):
+        library.get_recipe_names(1)
+        library.get_recipe_names(1, cookbook_name='cookbook1')
+        assert library.loads == 2
+
+    def test_write_invalidates_only_that_user(self, library):
+        library.get_recipe_names(1)
+        library.get_recipe_names(2)
+        library.add_recipe('recipe3', 1)
+        assert library.get_recipe_names(1) == ['recipe1', 'recipe3']
+        assert library.get_recipe_names(2) == ['recipe2']
+        assert library.loads == 3
+
+    def test_errors_are_not_cached(self, library):
+        library.get_recipe_names(1, 'broken')
+        library.get_recipe_names(1, 'broken')
+        assert library.loads == 2
+
+    def test_least_recently_used_is_evicted(self, library):
+        library.get_recipe_names(1)
+        library.get_recipe_names(2)
+        library.get_recipe_names(1)
+        library.get_recipe_names(1, 'cookbook1')
+        library.get_recipe_names(1)
+        library.get_recipe_names(2)
+        assert library.loads == 4
+        assert library.cache.get_stats()['evictions'] == 2
+
+    def test_expired_entry_is_reloaded(self, library):
+        library.cache.ttl = 0
+        library.get_recipe_names(1)
+        library.get_recipe_names(1)
+        assert library.loads == 2
+        assert library.cache.get_stats()['expirations'] == 1
+
+    def test_cached_list_cannot_be_mutated(self, library):
+        library.get_recipe_names(1).append('oops')
+        assert library.get_recipe_names(1) == ['recipe1']
+
+    def test_nested_containers_cannot_be_mutated(self):
+        cache = ReadCache()
+        page = (['cookbook1'], 'cursor', {'total': 1})
+        cache.get_or_load(1, 'get_cookbook_names_page', (), lambda: page)[0].append('oops')
+        cached = cache.get_or_load(1, 'get_cookbook_names_page', (), lambda: None)
+        cached[0].append('oops')
+        cached[2]['total'] = 2
+        assert cache.get_or_load(1, 'get_cookbook_names_page', (), lambda: None) == (['cookbook1'], 'cursor', {'total': 1})
+        row = ('Soup', 'Dinner', 2)
+        assert cache.get_or_load(1, 'get_recipe_info', (), lambda: [row])[0] is row
+
+    def test_load_overlapping_a_write_is_not_stored(self):
+        cache = ReadCache()
+        cache.get_or_load(1, 'get_recipe_names', (), lambda: cache.invalidate_user(1) or ['stale'])
+        assert cache.get_stats()['entries'] == 0
+
+    def test_disabled_cache_always_loads(self):
+        cache = ReadCache(max_entries=0)
+        calls = []
+        cache.get_or_load(1, 'get_recipe_names', (), lambda: calls.append(1) or [])
+        cache.get_or_load(1, 'get_recipe_names', (), lambda: calls.append(1) or [])
+        assert len(calls) == 2
+
+    def test_write_in_another_worker_retires_entries(self):
+        versions = LibraryVersions()
+        worker_a = FakeLibrary(ReadCache(versions=versions))
+        worker_b = FakeLibrary(ReadCache(versions=versions))
+        worker_b.recipes = worker_a.recipes
+        worker_b.get_recipe_names(1)
+        worker_a.add_recipe('recipe3', 1)
+        assert worker_b.get_recipe_names(1) == ['recipe1', 'recipe3']
+        assert worker_b.loads == 2
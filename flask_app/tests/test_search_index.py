@@ -0,0 +1,186 @@
+"""
+    A class to test the SearchIndex class and its DAL decorator.
+
+    Fixtures
+    ----------
+    - library - A fake DAL whose writes keep its search index up to date
+
+    Tested Methods
+    --------------
+    - tokenize
+    - search
+    - complete
+    - resolve
+    - update
+    - invalidate_user
+    - get_stats
+    - indexes
+"""
+
+import pytest, sys, os, threading, time
+
+# Add the backend directory to the system path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from read_cache import ReadCache, invalidates
+from search_index import SearchIndex, indexes, tokenize
+
+class FakeLibrary:
+    """A stand in for the DAL with a few names and writes for one user."""
+
+    def __init__(self):
+        self.cache = ReadCache(max_entries=10, ttl=60)
+        self.search_index = SearchIndex(max_users=2, versions=self.cache.versions)
+        self._local = threading.local()
+        self.names = {'recipe': ['Chicken Tacos', 'Chicken Soup', 'Beans & Rice'],
+                      'cookbook': ['Weeknight Chicken'], 'ingredient': ['Chicken', 'Rice']}
+        self.loads = 0
+
+    def load(self):
+        self.loads += 1
+        return {kind: list(names) for kind, names in self.names.items()}
+
+    def search(self, query, user_id=1, **kwargs):
+        return self.search_index.search(user_id, query, self.load, **kwargs)
+
+    @indexes(added={'recipe': 'recipe_name'})
+    @invalidates
+    def add_recipe(self, recipe_name, user_id, fail=False):
+        if fail:
+            return "Error: Recipe already exists"
+        self.names['recipe'].append(recipe_name)
+
+    @indexes(added={'recipe': 'new_recipe_name'}, removed={'recipe': 'current_recipe_name'})
+    @invalidates
+    def update_recipe(self, current_recipe_name, new_recipe_name, user_id):
+        self.names['recipe'].remove(current_recipe_name)
+        self.names['recipe'].append(new_recipe_name)
+
+    @indexes(removed={'ingredient': 'ingredient_name'})
+    @invalidates
+    def delete_ingredient(self, ingredient_name, user_id):
+        # Like the DAL, logs the error it noted and returns None
+        self._local.error = 'Ingredient does not exist'
+
+@pytest.fixture
+def library():
+    """Fixture to create a fake DAL with a small search index."""
+    return FakeLibrary()
+
+class TestSearchIndex:
+
+    def test_tokenize(self):
+        assert tokenize(' Macaroni & Cheese, Crème Brûlée ') == ['macaroni', 'cheese', 'crème', 'brûlée']
+
+    def test_every_word_has_to_match(self, library):
+        assert library.search('chicken') == [
+            ('ingredient', 'Chicken'), ('recipe', 'Chicken Soup'), ('recipe', 'Chicken Tacos'),
+            ('cookbook', 'Weeknight Chicken')]
+        assert library.search('CHICKEN tacos') == [('recipe', 'Chicken Tacos')]
+        assert library.search('chicken beans') == []
+
+    def test_whole_words_rank_above_prefixes(self, library):
+        library.names['recipe'] += ['Ricotta Pie', 'Rice Pudding']
+        assert library.search('rice') == [
+            ('ingredient', 'Rice'), ('recipe', 'Beans & Rice'), ('recipe', 'Rice Pudding')]
+        assert library.search('ric') == [
+            ('ingredient', 'Rice'), ('recipe', 'Ricotta Pie'), ('recipe', 'Beans & Rice'), ('recipe', 'Rice Pudding')]
+        assert library.search('chick', kinds=('recipe',), limit=1) == [('recipe', 'Chicken Soup')]
+
+    def test_completions_are_in_order(self, library):
+        complete = library.search_index.complete
+        assert complete(1, ' CHICKEN', library.load) == [
+            ('ingredient', 'Chicken'), ('recipe', 'Chicken Soup'), ('recipe', 'Chicken Tacos')]
+        assert complete(1, 'chicken s', library.load) == [('recipe', 'Chicken Soup')]
+        assert complete(1, 'beans &', library.load, kinds=('recipe',)) == [('recipe', 'Beans & Rice')]
+        assert complete(1, 'c', library.load, limit=2) == [('ingredient', 'Chicken'), ('recipe', 'Chicken Soup')]
+        assert complete(1, 'tacos', library.load) == []
+
+    def test_completions_follow_writes(self, library):
+        complete = library.search_index.complete
+        complete(1, 'chicken', library.load)
+        library.add_recipe('Chicken Curry', 1)
+        library.update_recipe('Chicken Soup', 'Leek Soup', 1)
+        assert complete(1, 'chicken', library.load, kinds=('recipe',)) == [
+            ('recipe', 'Chicken Curry'), ('recipe', 'Chicken Tacos')]
+        assert complete(1, 'l', library.load) == [('recipe', 'Leek Soup')]
+        assert library.loads == 1
+        assert library.search_index.get_stats()['completions'] == 3
+
+    def test_resolve_finds_the_closest_names(self, library):
+        resolve = library.search_index.resolve
+        assert resolve(1, ' chiken taco ', library.load) == [('Chicken Tacos', 2)]
+        assert resolve(1, 'Chicken Sopu', library.load, max_distance=5) == [('Chicken Soup', 2), ('Chicken Tacos', 5)]
+        assert resolve(1, 'chicken soup', library.load, limit=1) == [('Chicken Soup', 0)]
+        assert resolve(1, 'chiken', library.load, kind='ingredient') == [('Chicken', 1)]
+        assert resolve(1, 'lasagna', library.load) == []
+
+    def test_resolve_follows_writes(self, library):
+        resolve = library.search_index.resolve
+        resolve(1, 'chicken soup', library.load)
+        library.add_recipe('Chicken Curry', 1)
+        library.update_recipe('Chicken Soup', 'Leek Soup', 1)
+        assert resolve(1, 'chicken soup', library.load, max_distance=5) == [('Chicken Curry', 5), ('Chicken Tacos', 5)]
+        assert resolve(1, 'leak soup', library.load) == [('Leek Soup', 1)]
+        assert library.loads == 1
+        assert library.search_index.get_stats()['resolutions'] == 3
+
+    def test_index_is_built_once(self, library):
+        library.search('chicken')
+        library.search('rice')
+        assert library.loads == 1
+        stats = library.search_index.get_stats()
+        assert (stats['users'], stats['names'], stats['searches'], stats['builds']) == (1, 6, 2, 1)
+
+    def test_writes_update_the_index(self, library):
+        library.search('chicken')
+        library.add_recipe('Chicken Curry', 1)
+        library.update_recipe('Chicken Soup', 'Leek Soup', 1)
+        assert library.search('chicken', kinds=('recipe',)) == [('recipe', 'Chicken Curry'), ('recipe', 'Chicken Tacos')]
+        assert library.search('soup') == [('recipe', 'Leek Soup')]
+        assert library.loads == 1
+        assert library.search_index.get_stats()['updates'] == 2
+
+    def test_failed_writes_leave_the_index(self, library):
+        library.search('rice')
+        library.add_recipe('Chicken Tacos', 1, fail=True)
+        library.delete_ingredient('Rice', 1)
+        assert library.search('rice') == [('ingredient', 'Rice'), ('recipe', 'Beans & Rice')]
+        assert library.loads == 1
+
+    def test_missed_write_rebuilds_the_index(self, library):
+        library.search('rice')
+        # A write in another worker, or a rolled back batch, bumps the version
+        library.names['recipe'].append('Fried Rice')
+        library.cache.invalidate_user(1)
+        library.add_recipe('Rice Pudding', 1)
+        assert ('recipe', 'Fried Rice') in library.search('rice')
+        assert library.loads == 2
+
+    def test_least_recently_used_user_is_dropped(self, library):
+        for user_id in (1, 2, 3):
+            library.search('rice', user_id)
+        library.search('rice', 1)
+        assert library.loads == 4
+        assert library.search_index.get_stats()['evictions'] == 2
+
+    def test_errors_are_returned_and_not_kept(self):
+        search_index = SearchIndex()
+        assert search_index.search(1, 'rice', lambda: "Database does not exist") == "Database does not exist"
+        assert search_index.get_stats()['users'] == 0
+
+    def test_search_of_a_large_library_is_fast(self):
+        search_index = SearchIndex()
+        names = {'recipe': [f'Recipe {n} with Chicken {n % 97}' for n in range(30000)],
+                 'ingredient': [f'Ingredient {n}' for n in range(3000)]}
+        search_index.search(1, 'chicken', lambda: names)
+        start = time.perf_counter()
+        for _ in range(100):
+            results = search_index.search(1, 'chicken 42', lambda: names, limit=10)
+        assert len(results) == 10
+        assert (time.perf_counter() - start) / 100 < 0.01
+        start = time.perf_counter()
+        for _ in range(1000):
+            completions = search_index.complete(1, 'recipe 1', lambda: names)
+        assert completions[0] == ('recipe', 'Recipe 1 with Chicken 1')
+        assert (time.perf_counter() - start) / 1000 < 0.001
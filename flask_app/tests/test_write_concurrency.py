@@ -0,0 +1,180 @@
+"""
+    A class to stress the add and delete procedures with parallel writes.
+
+    STRESS_THREADS threads (default 16) call the procedures at the same time
+    for one throwaway user, each on its own pooled connection and committing
+    after every call like the DAL does.  The tests check that the unique
+    keys let exactly one of several identical adds through, that the quota
+    counters never let a user past a cap, that the counters match the rows
+    left behind, and that no call fails with a deadlock or lock wait
+    timeout.  Like test_dal.py this needs the MealPlanning database, reached
+    with DB_USER and DB_PASSWORD.
+
+    Fixtures
+    ----------
+    - dal - Connects to the database, skipping the tests when it is down
+    - user_id - Creates the throwaway user and deletes it afterwards
+
+    Tested Procedures
+    -----------------
+    - AddCookbook / DeleteCookbook
+    - AddRecipe / AddRecipeWithIngredients / DeleteRecipe
+    - AddIngredient / AddIngredients / DeleteIngredient
+    - AddIngredientRecipePairing
+"""
+
+import pytest, sys, os, random, json
+from concurrent.futures import ThreadPoolExecutor
+import mysql.connector
+from mysql.connector import errorcode
+
+# Add the backend directory to the system path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from meal_planning_backend import DAL
+
+STRESS_EMAIL = 'write-stress@example.com'
+THREADS = int(os.environ.get('STRESS_THREADS', 16))
+LOCK_ERRORS = {errorcode.ER_LOCK_DEADLOCK, errorcode.ER_LOCK_WAIT_TIMEOUT}
+
+@pytest.fixture(scope='module')
+def dal():
+    """Fixture to connect to the database, skipping when it is down."""
+    dal = DAL()
+    try:
+        with dal.pool.connection():
+            pass
+    except mysql.connector.Error as err:
+        pytest.skip(f"MealPlanning database is not reachable: {err}")
+    return dal
+
+@pytest.fixture
+def user_id(dal):
+    """Fixture to create the throwaway user through AddUser."""
+    execute(dal, "DELETE FROM Users WHERE Email = %s", [STRESS_EMAIL])
+    assert call(dal, 'AddUser', [STRESS_EMAIL, 'hash', 'Write', 'Stress']) is None
+    user_id = query(dal, "SELECT UserId FROM Users WHERE Email = %s", [STRESS_EMAIL])
+    yield user_id
+    execute(dal, "DELETE FROM Users WHERE Email = %s", [STRESS_EMAIL])
+
+def call(dal, procedure, args):
+    """Calls a procedure and commits, returning the error it raised if any."""
+    try:
+        with dal.pool.connection() as connector:
+            cursor = connector.cursor()
+            cursor.callproc(procedure, args)
+            cursor.close()
+            connector.commit()
+    except mysql.connector.Error as err:
+        return err
+    return None
+
+def execute(dal, statement, args):
+    with dal.pool.connection() as connector:
+        cursor = connector.cursor()
+        cursor.execute(statement, args)
+        cursor.close()
+        connector.commit()
+
+def query(dal, statement, args):
+    with dal.pool.connection() as connector:
+        cursor = connector.cursor()
+        cursor.execute(statement, args)
+        value = cursor.fetchone()[0]
+        cursor.close()
+    return value
+
+def counters(dal, user_id):
+    with dal.pool.connection() as connector:
+        cursor = connector.cursor()
+        cursor.execute("SELECT CookbookCount, RecipeCount, IngredientCount FROM UserCounts "
+                       "WHERE UserId = %s", [user_id])
+        row = cursor.fetchone()
+        cursor.close()
+    return row
+
+def run_parallel(dal, calls):
+    """Runs (procedure, args) calls on THREADS threads and returns the errors."""
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        results = list(executor.map(lambda item: call(dal, *item), calls))
+    return [error for error in results if error is not None]
+
+def assert_only(errors, *messages):
+    assert not [error for error in errors if error.errno in LOCK_ERRORS]
+    assert {error.msg for error in errors} <= set(messages)
+
+class TestWriteConcurrency:
+
+    def test_identical_adds_insert_once(self, dal, user_id):
+        names = [f'Stress Cookbook {n:02d}' for n in range(20)]
+        calls = [('AddCookbook', [name, True, '', user_id]) for name in names] * THREADS
+        random.shuffle(calls)
+        errors = run_parallel(dal, calls)
+        assert_only(errors, 'Cookbook already exists')
+        assert len(errors) == len(calls) - len(names)
+        assert query(dal, "SELECT COUNT(*) FROM Cookbook WHERE UserId = %s", [user_id]) == len(names)
+        assert counters(dal, user_id)[0] == len(names)
+
+    def test_quota_holds_under_contention(self, dal, user_id):
+        calls = [('AddCookbook', [f'Stress Cookbook {n:03d}', True, '', user_id]) for n in range(120)]
+        errors = run_parallel(dal, calls)
+        assert_only(errors, 'User has reached the maximum number of cookbooks (50)')
+        assert query(dal, "SELECT COUNT(*) FROM Cookbook WHERE UserId = %s", [user_id]) == 50
+        assert counters(dal, user_id)[0] == 50
+
+    def test_ingredient_quota_holds_under_contention(self, dal, user_id):
+        calls = [('AddIngredient', [f'Stress Ingredient {n:03d}', user_id]) for n in range(600)]
+        calls += [('AddIngredient', [f'Stress Ingredient {n:03d}', user_id]) for n in range(100)]
+        random.shuffle(calls)
+        errors = run_parallel(dal, calls)
+        assert_only(errors, 'Ingredient already exists',
+                    'User has reached the maximum number of ingredients (500)')
+        assert query(dal, "SELECT COUNT(*) FROM Ingredients WHERE UserId = %s", [user_id]) == 500
+        assert counters(dal, user_id)[2] == 500
+
+    def test_bulk_and_single_adds_share_the_quota(self, dal, user_id):
+        names = [f'Stress Ingredient {n:03d}' for n in range(600)]
+        calls = [('AddIngredients', [json.dumps(names[start:start + 200]), user_id])
+                 for start in range(0, 600, 100)]
+        calls += [('AddIngredient', [name, user_id]) for name in names[::7]]
+        random.shuffle(calls)
+        errors = run_parallel(dal, calls)
+        assert_only(errors, 'Ingredient already exists',
+                    'User has reached the maximum number of ingredients (500)')
+        assert query(dal, "SELECT COUNT(*) FROM Ingredients WHERE UserId = %s", [user_id]) == 500
+        assert counters(dal, user_id)[2] == 500
+
+    def test_mixed_adds_and_deletes_keep_counters(self, dal, user_id):
+        names = [f'Stress Recipe {n:02d}' for n in range(30)]
+        calls = ([('AddRecipe', [name, None, 2, False, '', user_id]) for name in names] * 4
+                 + [('DeleteRecipe', [name, user_id]) for name in names] * 3)
+        random.shuffle(calls)
+        errors = run_parallel(dal, calls)
+        assert_only(errors, 'Recipe already exists', 'Recipe does not exist')
+        recipes = query(dal, "SELECT COUNT(*) FROM Recipe WHERE UserId = %s", [user_id])
+        assert counters(dal, user_id)[1] == recipes
+
+    def test_composite_adds_are_all_or_nothing(self, dal, user_id):
+        ingredients = json.dumps([f'Stress Ingredient {n}' for n in range(8)])
+        calls = [('AddRecipeWithIngredients', [f'Stress Recipe {n % 10}', None, 2, False, '', ingredients, user_id])
+                 for n in range(THREADS * 4)]
+        random.shuffle(calls)
+        errors = run_parallel(dal, calls)
+        assert_only(errors, 'Recipe already exists')
+        assert query(dal, "SELECT COUNT(*) FROM Recipe WHERE UserId = %s", [user_id]) == 10
+        assert query(dal, "SELECT COUNT(*) FROM Meal JOIN Recipe ON Meal.RecipeId = Recipe.RecipeId "
+                          "WHERE Recipe.UserId = %s", [user_id]) == 80
+        assert counters(dal, user_id)[1:] == (10, 8)
+
+    def test_identical_pairings_insert_once(self, dal, user_id):
+        assert call(dal, 'AddRecipe', ['Stress Recipe', None, 2, False, '', user_id]) is None
+        ingredients = [f'Stress Ingredient {n}' for n in range(10)]
+        for ingredient in ingredients:
+            assert call(dal, 'AddIngredient', [ingredient, user_id]) is None
+        calls = [('AddIngredientRecipePairing', [ingredient, 'Stress Recipe', user_id])
+                 for ingredient in ingredients] * THREADS
+        random.shuffle(calls)
+        errors = run_parallel(dal, calls)
+        assert_only(errors, 'Pairing already exists')
+        assert query(dal, "SELECT COUNT(*) FROM Meal JOIN Recipe ON Meal.RecipeId = Recipe.RecipeId "
+                          "WHERE Recipe.UserId = %s", [user_id]) == len(ingredients)
@@ -45,6 +45,8 @@ class WeeklyMealPlan {
       this.friday = "";
       this.saturday = "";
       this.sunday = "";
+      this.start = null;
+      this.otherMeals = [];
     }
   
     setMonday(recipe) {
@@ -103,7 +105,29 @@ class WeeklyMealPlan {
       return this.sunday;
     }
 
+    getDays() {
+      return [this.monday, this.tuesday, this.wednesday, this.thursday, this.friday, this.saturday, this.sunday];
+    }
+
+    setDays(recipes) {
+      [this.monday, this.tuesday, this.wednesday, this.thursday, this.friday, this.saturday, this.sunday] = recipes;
+    }
+
+    //the week loaded from the server and its meals in the slots the page does not show,
+    //kept so saving the dinners does not erase them
+
+    getWeek() {
+      return [this.start, this.otherMeals];
+    }
+
+    setWeek(start, otherMeals) {
+      this.start = start;
+      this.otherMeals = otherMeals;
+    }
+
     clearPlan() {
+      this.start = null;
+      this.otherMeals = [];
       this.monday = "";
       this.tuesday = "";
       this.wednesday = "";
@@ -361,6 +385,8 @@ function displayAddRecipeForm() {
     formHTML += `<option value="${i}">${i}</option>`;
   }
   formHTML += '</select></div>';
+  formHTML += '<div class="mb-3"><label for="ingredients" class="form-label">Ingredients (one per line):</label>';
+  formHTML += '<textarea class="form-control" id="ingredients" name="ingredients" rows="5"></textarea></div>';
   formHTML += '<button type="submit" class="btn btn-primary">Add Recipe</button></form>';
   formHTML += '</div></div></div>';
 
@@ -376,7 +402,8 @@ function displayAddIngredientForm(recipe_name) {
   formHTML += `<h5 class="card-title">Add an Ingredient to <span id="recipe-name">${recipe_name}</span></h5>`;
   formHTML += '<form id="add-ingredient-form" class="mb-3">';
   formHTML += '<div class="mb-3"><label for="ingredient-name" class="form-label">Ingredient:</label>';
-  formHTML += '<input type="text" class="form-control" id="ingredient-name" name="ingredient-name"></div>';
+  formHTML += '<input type="text" class="form-control" id="ingredient-name" name="ingredient-name" list="ingredient-completions" autocomplete="off">';
+  formHTML += '<datalist id="ingredient-completions"></datalist></div>';
   formHTML += '<button type="submit" class="btn btn-primary">Add Ingredient</button></form>';
   formHTML += '</div></div></div>';
 
@@ -384,6 +411,9 @@ function displayAddIngredientForm(recipe_name) {
   displayArea.innerHTML = formHTML;
 
   document.getElementById('add-ingredient-form').addEventListener('submit', handleAddIngredientSubmit);
+  document.getElementById('ingredient-name').addEventListener('input', function() {
+    getCompletions(this.value, 'ingredient', 'ingredient-completions');
+  });
 }
 
 // display ingredient name and a button to delete ingredient
@@ -392,6 +422,8 @@ function displayIngredient(ingredient_name) {
   let ingredientHTML = '<div class="col-lg-6 mx-auto mb-4"><div class="card"><div class="card-body">';
   ingredientHTML += `<p class="card-text">${ingredient_name}</p>`;
   ingredientHTML += `<button class="btn btn-danger" id="delete-ingredient" data-ingredient-name="${ingredient_name}">Delete Ingredient</button>`;
+  ingredientHTML += ` <button class="btn btn-success" id="ingredient-recipes" data-ingredient-name="${ingredient_name}">Recipes Using It</button>`;
+  ingredientHTML += '<div id="recipes-by-ingredient"></div>';
   ingredientHTML += '</div></div></div>';
 
   const displayArea = document.getElementById('display-text');
@@ -401,6 +433,81 @@ function displayIngredient(ingredient_name) {
   document.getElementById('delete-ingredient').addEventListener('click', function() {
     deleteIngredient(this.dataset.ingredientName);
   });
+  document.getElementById('ingredient-recipes').addEventListener('click', function() {
+    getRecipesByIngredient([this.dataset.ingredientName]);
+  });
+}
+
+// function to display the recipes that use an ingredient
+
+function displayRecipesByIngredient(data) {
+  let recipesHTML = '<ul>';
+  data.recipes.forEach(recipe_name => {
+    recipesHTML += `<li>${recipe_name}</li>`;
+  });
+  recipesHTML += '</ul>';
+  if (!data.recipes.length) {
+    recipesHTML = '<p>No recipes use it yet.</p>';
+  }
+
+  document.getElementById('recipes-by-ingredient').innerHTML = recipesHTML;
+}
+
+// function to display the shopping list for this week's meal plan
+
+function displayShoppingList(data) {
+  let shoppingListHTML = '<div class="col-lg-6 mx-auto mb-4"><div class="card"><div class="card-body">';
+  shoppingListHTML += `<h5 class="card-title">Shopping List for ${data.start} to ${data.end}</h5>`;
+  shoppingListHTML += '<ul>';
+  data.ingredients.forEach(ingredient => {
+    let count = ingredient.meal_count > 1 ? ` (${ingredient.meal_count} meals)` : '';
+    shoppingListHTML += `<li>${ingredient.ingredient_name}${count}</li>`;
+  });
+  shoppingListHTML += '</ul>';
+  shoppingListHTML += '</div></div></div>';
+
+  const displayArea = document.getElementById('display-text');
+  displayArea.innerHTML = shoppingListHTML;
+}
+
+// display a page to enter the ingredients on hand
+
+function displayPantryForm() {
+  let formHTML = '<div class="col-lg-6 mx-auto mb-4"><div class="card"><div class="card-body">';
+  formHTML += '<h5 class="card-title">What Can I Cook?</h5>';
+  formHTML += '<form id="pantry-form" class="mb-3">';
+  formHTML += '<div class="mb-3"><label for="pantry" class="form-label">Ingredients on hand, separated by commas:</label>';
+  formHTML += '<input type="text" class="form-control" id="pantry" name="pantry"></div>';
+  formHTML += '<button type="submit" class="btn btn-primary">Find Recipes</button></form>';
+  formHTML += '<div id="pantry-recipes"></div>';
+  formHTML += '</div></div></div>';
+
+  const displayArea = document.getElementById('display-text');
+  displayArea.innerHTML = formHTML;
+
+  document.getElementById('pantry-form').addEventListener('submit', function(event) {
+    event.preventDefault();
+    let ingredients = document.getElementById('pantry').value.split(',')
+        .map(ingredient => ingredient.trim())
+        .filter(ingredient => ingredient !== "");
+    getPantryRecipes(ingredients);
+  });
+}
+
+// function to display the recipes that use the ingredients on hand
+
+function displayPantryRecipes(data) {
+  let recipesHTML = '<ul>';
+  data.recipes.forEach(recipe => {
+    let missing = recipe.missing.length ? ` (missing ${recipe.missing.join(', ')})` : ' (ready to make)';
+    recipesHTML += `<li>${recipe.recipe_name}${missing}</li>`;
+  });
+  recipesHTML += '</ul>';
+  if (data.unknown.length) {
+    recipesHTML += `<p>Not in your ingredients: ${data.unknown.join(', ')}</p>`;
+  }
+
+  document.getElementById('pantry-recipes').innerHTML = recipesHTML;
 }
 
 // display a page to register a new user
@@ -522,6 +629,144 @@ async function getAllRecipeNames() {
       .catch((error) => { console.log(error) })
 }
 
+//function to get the first day of the current week as YYYY-MM-DD
+
+function currentWeekStart() {
+  let monday = new Date();
+  monday.setDate(monday.getDate() - (monday.getDay() + 6) % 7);
+  let month = String(monday.getMonth() + 1).padStart(2, '0');
+  let day = String(monday.getDate()).padStart(2, '0');
+  return `${monday.getFullYear()}-${month}-${day}`;
+}
+
+//function to add days to a YYYY-MM-DD date
+
+function addDays(date, days) {
+  let [year, month, day] = date.split('-').map(Number);
+  let shifted = new Date(Date.UTC(year, month - 1, day + days));
+  return shifted.toISOString().slice(0, 10);
+}
+
+//function to load this week's meal plan saved on the backend server
+
+async function getMealPlan() {
+  console.log("Trying to get this week's meal plan from 'localhost:50051'");
+  let start = currentWeekStart();
+  fetch(`${serverDomain}/meal_plan?start=${start}`, {credentials: 'include'})
+      .then(response => {
+            if (!response.ok) {
+              throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            return response.json()
+          })
+      .then(data => {
+            let recipes = ["", "", "", "", "", "", ""];
+            // the web page plans one dinner per day
+            data.meals.filter(meal => meal.slot === 'dinner').forEach(meal => {
+              recipes[(Date.parse(meal.date) - Date.parse(data.start)) / 86400000] = meal.recipe_name;
+            });
+            myMealPlan.setDays(recipes);
+            myMealPlan.setWeek(data.start, data.meals.filter(meal => meal.slot !== 'dinner'));
+            refreshMealPlanTable();
+          })
+      .catch((error) => { console.log(error) })
+}
+
+//function to get the shopping list for this week's meal plan
+
+async function getShoppingList() {
+  console.log("Trying to get this week's shopping list from 'localhost:50051'");
+  fetch(`${serverDomain}/shopping_list?start=${currentWeekStart()}`, {credentials: 'include'})
+      .then(response => { return response.json() })
+      .then(data => { 
+            displayShoppingList(data);
+          })
+      .catch((error) => { console.log(error) })
+}
+
+//function to get the recipes that use the ingredients on hand
+
+async function getPantryRecipes(ingredients) {
+  console.log("Trying to get the recipes for the ingredients on hand from 'localhost:50051'");
+  let params = new URLSearchParams(ingredients.map(ingredient => ['ingredients', ingredient]));
+  fetch(`${serverDomain}/pantry_recipes?${params}`, {credentials: 'include'})
+      .then(response => { return response.json() })
+      .then(data => { 
+            displayPantryRecipes(data);
+          })
+      .catch((error) => { console.log(error) })
+}
+
+//function to get the recipes that use all of some ingredients
+
+async function getRecipesByIngredient(ingredients) {
+  console.log("Trying to get the recipes using the ingredients from 'localhost:50051'");
+  let params = new URLSearchParams(ingredients.map(ingredient => ['ingredients', ingredient]));
+  fetch(`${serverDomain}/recipes_by_ingredient?${params}`, {credentials: 'include'})
+      .then(response => { return response.json() })
+      .then(data => { 
+            displayRecipesByIngredient(data);
+          })
+      .catch((error) => { console.log(error) })
+}
+
+//function to save this week's meal plan on the backend server
+
+async function saveMealPlan() {
+  console.log("Trying to save this week's meal plan through 'localhost:50051'");
+  let [start, otherMeals] = myMealPlan.getWeek();
+  if (!start) {
+    // the PUT replaces the whole week, so it waits until the week is loaded
+    console.error('Error saving meal plan: the week has not been loaded');
+    return;
+  }
+  let meals = myMealPlan.getDays()
+      .map((recipe_name, day) => ({date: addDays(start, day), slot: 'dinner', recipe_name: recipe_name}))
+      .filter(meal => meal.recipe_name !== "")
+      .concat(otherMeals.map(meal => ({date: meal.date, slot: meal.slot, recipe_name: meal.recipe_name})));
+
+  try {
+    const response = await fetch(`${serverDomain}/meal_plan`, {
+      method: 'PUT', 
+      headers: { 'Content-Type': 'application/json' }, 
+      body: JSON.stringify({start: start, meals: meals}),
+      credentials: 'include'
+    });
+
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`);
+    }
+
+    const data = await response.json()
+    console.log(data);
+  } catch (error) {
+    console.error('Error saving meal plan:', error);
+  }
+}
+
+//function to fill a datalist with the names that start with what was typed
+
+async function getCompletions(prefix, kind, datalist_id) {
+  if (prefix.trim() === '') {
+    return;
+  }
+  let query = new URLSearchParams({prefix: prefix, type: kind});
+  fetch(`${serverDomain}/autocomplete?${query}`, {credentials: 'include'})
+      .then(response => { return response.json() })
+      .then(data => {
+            let datalist = document.getElementById(datalist_id);
+            if (datalist) {
+              datalist.innerHTML = '';
+              data.completions.forEach(completion => {
+                let option = document.createElement('option');
+                option.value = completion.name;
+                datalist.appendChild(option);
+              });
+            }
+          })
+      .catch((error) => { console.log(error) })
+}
+
 //function to get recipe info for selected recipe
 
 async function getRecipeInfo(recipe_name) {
@@ -615,12 +860,13 @@ async function deleteCookbook(cookbook_name) {
 
 //add a recipe to the database on cookbook info view
 
-async function addRecipe(recipe_name, cookbook_name, servings, isOnline, webpage) {
+async function addRecipe(recipe_name, cookbook_name, servings, isOnline, webpage, ingredients) {
   console.log(`Trying to add recipe ${recipe_name} to database through 'localhost:50051'`);
-  let new_recipe_info = {new_recipe_name: recipe_name, new_cookbook_name: cookbook_name, new_servings: servings, new_is_online: isOnline, new_webpage: webpage}
+  let new_recipe_info = {new_recipe_name: recipe_name, new_cookbook_name: cookbook_name, new_servings: servings, new_is_online: isOnline, new_webpage: webpage, new_ingredients: ingredients}
 
   try {
-    const response = await fetch(`${serverDomain}/add_recipe`, {
+    // one request adds the recipe, its missing ingredients and their pairings
+    const response = await fetch(`${serverDomain}/add_recipe_with_ingredients`, {
       method: 'PUT', 
       headers: { 'Content-Type': 'application/json' }, 
       body: JSON.stringify(new_recipe_info),
@@ -836,6 +1082,7 @@ async function login(email, password) {
       setUser(data.first_name, data.last_name, email);
       getCookbookNames();
       getAllRecipeNames();
+      getMealPlan();
       displayBlank();
     } else {
       console.log(data.success);
@@ -904,7 +1151,8 @@ function handleAddRecipeSubmit(event) {
   let servings = parseInt(document.getElementById('servings').value, 10)
   let isOnline = document.querySelector('input[name="is_online"]:checked').value === 'yes';
   let webpage = document.getElementById('webpage').value;
-  addRecipe(recipe_name, cookbook_name, servings, isOnline, webpage);
+  let ingredients = document.getElementById('ingredients').value.split('\n').map(name => name.trim()).filter(name => name !== '');
+  addRecipe(recipe_name, cookbook_name, servings, isOnline, webpage, ingredients);
 }
 
 //handle submit on add ingredient form
@@ -941,4 +1189,5 @@ function assignRecipeToDay(event) {
   }
 
   refreshMealPlanTable();
+  saveMealPlan();
 }
\ No newline at end of file
@@ -0,0 +1,15 @@
+-- Adds the IngredientUserName index to an existing MealPlanning database.
+--
+-- GetSearchDocuments and GetPantryDocuments read all of a user's
+-- ingredients, the latter in name order, which the (IngredientName, UserId)
+-- unique key cannot seek.
+-- Recipe and Meal already gained their RecipeCookbookName and
+-- MealIngredient indexes in SurrogateKeysMigration.sql; recipes of one
+-- cookbook are read through RecipeCookbookName (CookbookId, RecipeName).
+--
+-- Run after MealPlanMigration.sql:
+-- mysql -u root -p < sql/IngredientIndexMigration.sql
+
+USE MealPlanning;
+
+ALTER TABLE Ingredients ADD INDEX IngredientUserName (UserId, IngredientName);
@@ -0,0 +1,114 @@
+-- Adds server-side weekly meal plans to an existing MealPlanning database.
+--
+-- MealPlan keeps the recipe planned for each day and slot of a user, so a
+-- plan follows the user across browsers instead of living in one browser's
+-- session.  GetMealPlan reads a week in one range scan of the primary key,
+-- SetMealPlan replaces a week in one transaction and GetShoppingList
+-- counts the ingredients the planned meals need.
+--
+-- Run after UserCountsMigration.sql:
+-- mysql -u root -p < sql/MealPlanMigration.sql
+
+USE MealPlanning;
+
+CREATE TABLE IF NOT EXISTS MealPlan (
+    UserId int NOT NULL,
+    PlanDate date NOT NULL,
+    Slot enum('breakfast', 'lunch', 'dinner') NOT NULL,
+    RecipeId int NOT NULL,
+    PRIMARY KEY (UserId, PlanDate, Slot),
+    FOREIGN KEY (UserId) REFERENCES Users (UserId) ON UPDATE CASCADE ON DELETE CASCADE,
+    FOREIGN KEY (RecipeId) REFERENCES Recipe (RecipeId) ON DELETE CASCADE,
+    INDEX MealPlanRecipe (RecipeId)
+);
+
+-- Get the meals planned over a range of days
+
+DROP PROCEDURE IF EXISTS GetMealPlan;
+
+DELIMITER $$
+
+CREATE PROCEDURE GetMealPlan(myUserId int, myStartDate date, myEndDate date)
+
+BEGIN
+  -- One range scan of the primary key
+  SELECT MealPlan.PlanDate, MealPlan.Slot, Recipe.RecipeName, Cookbook.CookbookName, 
+         Recipe.TotalServings, Recipe.IsOnline, Recipe.WebpageLink
+  FROM MealPlan
+  JOIN Recipe ON Recipe.RecipeId = MealPlan.RecipeId
+  LEFT JOIN Cookbook ON Recipe.CookbookId = Cookbook.CookbookId
+  WHERE MealPlan.UserId = myUserId AND MealPlan.PlanDate BETWEEN myStartDate AND myEndDate
+  ORDER BY MealPlan.PlanDate, MealPlan.Slot;
+END $$
+DELIMITER ;
+
+-- Replace the meals planned over a range of days
+
+DROP PROCEDURE IF EXISTS SetMealPlan;
+
+DELIMITER $$
+
+CREATE PROCEDURE SetMealPlan (
+    myUserId INT,
+    myStartDate DATE,
+    myEndDate DATE,
+    myMeals JSON
+)
+BEGIN
+    DECLARE lockedUserId INT;
+    DECLARE missingCount INT;
+
+    -- Lock the user's counter row first, like every other write of the 
+    -- user, so a concurrent recipe delete cannot deadlock with the plan
+    SELECT UserId INTO lockedUserId
+    FROM UserCounts
+    WHERE UserId = myUserId
+    FOR UPDATE;
+
+    -- Check every recipe before writing anything
+    SELECT COUNT(*) INTO missingCount
+    FROM JSON_TABLE(myMeals, '$[*]' COLUMNS (
+           RecipeName VARCHAR(100) CHARACTER SET utf8mb4 PATH '$.recipe_name')) AS Meals
+    LEFT JOIN Recipe ON Recipe.UserId = myUserId AND Recipe.RecipeName = Meals.RecipeName
+    WHERE Recipe.RecipeId IS NULL;
+
+    IF missingCount > 0 THEN
+        -- Handle the case where a planned recipe does not exist
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Recipe does not exist';
+    END IF;
+
+    DELETE FROM MealPlan
+    WHERE UserId = myUserId AND PlanDate BETWEEN myStartDate AND myEndDate;
+
+    INSERT INTO MealPlan (UserId, PlanDate, Slot, RecipeId)
+    SELECT myUserId, Meals.PlanDate, Meals.Slot, Recipe.RecipeId
+    FROM JSON_TABLE(myMeals, '$[*]' COLUMNS (
+           PlanDate DATE PATH '$.date',
+           Slot VARCHAR(20) CHARACTER SET utf8mb4 PATH '$.slot',
+           RecipeName VARCHAR(100) CHARACTER SET utf8mb4 PATH '$.recipe_name')) AS Meals
+    JOIN Recipe ON Recipe.UserId = myUserId AND Recipe.RecipeName = Meals.RecipeName;
+END $$
+
+DELIMITER ;
+
+-- Get the ingredients of the meals planned over a range of days
+
+DROP PROCEDURE IF EXISTS GetShoppingList;
+
+DELIMITER $$
+
+CREATE PROCEDURE GetShoppingList(myUserId int, myStartDate date, myEndDate date)
+
+BEGIN
+  -- One aggregation over the planned meals' pairings, counting how many 
+  -- planned meals need each ingredient
+  SELECT Ingredients.IngredientName, COUNT(*) AS MealCount
+  FROM MealPlan
+  JOIN Meal ON Meal.RecipeId = MealPlan.RecipeId
+  JOIN Ingredients ON Ingredients.Id = Meal.IngredientId
+  WHERE MealPlan.UserId = myUserId AND MealPlan.PlanDate BETWEEN myStartDate AND myEndDate
+  GROUP BY Ingredients.Id, Ingredients.IngredientName
+  ORDER BY Ingredients.IngredientName;
+END $$
+DELIMITER ;
@@ -17,27 +17,39 @@ FacebookId VARCHAR(100) UNIQUE,
 PRIMARY KEY (UserId)
 );
 
+CREATE TABLE IF NOT EXISTS UserCounts (
+UserId int NOT NULL,
+CookbookCount int NOT NULL DEFAULT 0,
+RecipeCount int NOT NULL DEFAULT 0,
+IngredientCount int NOT NULL DEFAULT 0,
+PRIMARY KEY (UserId),
+FOREIGN KEY (UserId) REFERENCES Users (UserId) ON UPDATE CASCADE ON DELETE CASCADE
+);
+
 CREATE TABLE IF NOT EXISTS Cookbook (
+CookbookId int auto_increment NOT NULL,
 CookbookName varchar(200) not null,
 IsBook bool not null,
 Website varchar(200),
 UserId int NOT NULL,
-PRIMARY KEY (CookbookName, UserId),
+PRIMARY KEY (CookbookId),
 FOREIGN KEY (UserId) REFERENCES Users (UserId) ON UPDATE CASCADE ON DELETE CASCADE,
-UNIQUE (CookbookName, UserId)
+UNIQUE CookbookUserName (UserId, CookbookName)
 );
 
 CREATE TABLE IF NOT EXISTS Recipe (
+    RecipeId int auto_increment NOT NULL,
     RecipeName varchar(100) NOT NULL,
-    CookbookName varchar(200),
+    CookbookId int,
     TotalServings int,
     IsOnline bool not null,
     WebpageLink varchar(255),
     UserId int NOT NULL,
-    PRIMARY KEY (RecipeName, UserId),
-    FOREIGN KEY (CookbookName) REFERENCES Cookbook (CookbookName) ON UPDATE CASCADE ON DELETE SET NULL,
+    PRIMARY KEY (RecipeId),
+    FOREIGN KEY (CookbookId) REFERENCES Cookbook (CookbookId) ON DELETE SET NULL,
     FOREIGN KEY (UserId) REFERENCES Users (UserId) ON UPDATE CASCADE ON DELETE CASCADE,
-    UNIQUE (RecipeName, UserId)
+    UNIQUE RecipeUserName (UserId, RecipeName),
+    INDEX RecipeCookbookName (CookbookId, RecipeName)
 );
 
 CREATE TABLE IF NOT EXISTS Ingredients (
@@ -46,16 +58,28 @@ IngredientName varchar(100) not null,
 UserId int NOT NULL,
 PRIMARY KEY (Id),
 FOREIGN KEY (UserId) REFERENCES Users (UserId) ON UPDATE CASCADE ON DELETE CASCADE,
-UNIQUE (IngredientName, UserId)
+UNIQUE (IngredientName, UserId),
+INDEX IngredientUserName (UserId, IngredientName)
 );
 
 CREATE TABLE IF NOT EXISTS Meal (
-    RecipeName varchar(100) NOT NULL,
-    UserID int NOT NULL,
+    RecipeId int NOT NULL,
     IngredientId int NOT NULL,
-    PRIMARY KEY (RecipeName, UserID, IngredientId),
-    FOREIGN KEY (RecipeName, UserID) REFERENCES Recipe (RecipeName, UserID) ON UPDATE CASCADE ON DELETE CASCADE,
-    FOREIGN KEY (IngredientId) REFERENCES Ingredients (Id) ON UPDATE CASCADE ON DELETE CASCADE
+    PRIMARY KEY (RecipeId, IngredientId),
+    FOREIGN KEY (RecipeId) REFERENCES Recipe (RecipeId) ON DELETE CASCADE,
+    FOREIGN KEY (IngredientId) REFERENCES Ingredients (Id) ON DELETE CASCADE,
+    INDEX MealIngredient (IngredientId, RecipeId)
+);
+
+CREATE TABLE IF NOT EXISTS MealPlan (
+    UserId int NOT NULL,
+    PlanDate date NOT NULL,
+    Slot enum('breakfast', 'lunch', 'dinner') NOT NULL,
+    RecipeId int NOT NULL,
+    PRIMARY KEY (UserId, PlanDate, Slot),
+    FOREIGN KEY (UserId) REFERENCES Users (UserId) ON UPDATE CASCADE ON DELETE CASCADE,
+    FOREIGN KEY (RecipeId) REFERENCES Recipe (RecipeId) ON DELETE CASCADE,
+    INDEX MealPlanRecipe (RecipeId)
 );
 
 
@@ -73,8 +97,10 @@ CREATE PROCEDURE GetMealIngredients (myRecipeName varchar(100), myUserId int)
 
 BEGIN
   SELECT Ingredients.IngredientName
-  FROM Meal JOIN Ingredients ON Meal.IngredientId = Ingredients.Id
-  WHERE Meal.RecipeName = myRecipeName AND Meal.UserId = myUserId
+  FROM Recipe
+  JOIN Meal ON Meal.RecipeId = Recipe.RecipeId
+  JOIN Ingredients ON Meal.IngredientId = Ingredients.Id
+  WHERE Recipe.RecipeName = myRecipeName AND Recipe.UserId = myUserId
   ORDER BY Ingredients.IngredientName;
 END $$
 DELIMITER ;
@@ -103,7 +129,7 @@ DELIMITER $$
 CREATE PROCEDURE GetCookbookInfo(myCookbookName varchar(200), myUserId INT)
 
 BEGIN
-  SELECT *
+  SELECT CookbookName, IsBook, Website, UserId
   FROM Cookbook
   WHERE CookbookName = myCookbookName AND UserId = myUserId;
 END $$
@@ -124,6 +150,82 @@ BEGIN
 END $$
 DELIMITER ;
 
+-- Get one page of cookbook names, seeking past the last name of the previous page
+
+DROP PROCEDURE IF EXISTS GetCookbookNamesPage;
+
+DELIMITER $$
+
+CREATE PROCEDURE GetCookbookNamesPage(myUserId int, myAfterName varchar(200), myLimit int)
+
+BEGIN
+  IF myAfterName IS NULL THEN
+    SELECT CookbookName
+    FROM Cookbook
+    WHERE UserId = myUserId
+    ORDER BY CookbookName
+    LIMIT myLimit;
+  ELSE
+    SELECT CookbookName
+    FROM Cookbook
+    WHERE UserId = myUserId AND CookbookName > myAfterName
+    ORDER BY CookbookName
+    LIMIT myLimit;
+  END IF;
+END $$
+DELIMITER ;
+
+-- Get one page of recipe names, seeking past the last name of the previous page
+
+DROP PROCEDURE IF EXISTS GetRecipeNamesPage;
+
+DELIMITER $$
+
+CREATE PROCEDURE GetRecipeNamesPage(myUserId int, myAfterName varchar(100), myLimit int)
+
+BEGIN
+  IF myAfterName IS NULL THEN
+    SELECT RecipeName
+    FROM Recipe
+    WHERE UserId = myUserId
+    ORDER BY RecipeName
+    LIMIT myLimit;
+  ELSE
+    SELECT RecipeName
+    FROM Recipe
+    WHERE UserId = myUserId AND RecipeName > myAfterName
+    ORDER BY RecipeName
+    LIMIT myLimit;
+  END IF;
+END $$
+DELIMITER ;
+
+-- Get one page of recipe names from one cookbook
+
+DROP PROCEDURE IF EXISTS GetRecipesFromOneCookbookPage;
+
+DELIMITER $$
+
+CREATE PROCEDURE GetRecipesFromOneCookbookPage(myCookbookName varchar(200), myUserId int, myAfterName varchar(100), myLimit int)
+
+BEGIN
+  IF myAfterName IS NULL THEN
+    SELECT Recipe.RecipeName
+    FROM Cookbook JOIN Recipe ON Recipe.CookbookId = Cookbook.CookbookId
+    WHERE Cookbook.CookbookName = myCookbookName AND Cookbook.UserId = myUserId
+    ORDER BY Recipe.RecipeName
+    LIMIT myLimit;
+  ELSE
+    SELECT Recipe.RecipeName
+    FROM Cookbook JOIN Recipe ON Recipe.CookbookId = Cookbook.CookbookId
+    WHERE Cookbook.CookbookName = myCookbookName AND Cookbook.UserId = myUserId
+      AND Recipe.RecipeName > myAfterName
+    ORDER BY Recipe.RecipeName
+    LIMIT myLimit;
+  END IF;
+END $$
+DELIMITER ;
+
 -- Get recipes names from one cookbook
 
 DROP PROCEDURE IF EXISTS GetRecipesFromOneCookbook;
@@ -133,9 +235,62 @@ DELIMITER $$
 CREATE PROCEDURE GetRecipesFromOneCookbook(myCookbookName varchar(200), myUserId int)
 
 BEGIN
-  SELECT RecipeName
-  FROM Recipe
-  WHERE CookbookName = myCookbookName AND Recipe.UserId = myUserId;
+  SELECT Recipe.RecipeName
+  FROM Cookbook JOIN Recipe ON Recipe.CookbookId = Cookbook.CookbookId
+  WHERE Cookbook.CookbookName = myCookbookName AND Cookbook.UserId = myUserId;
+END $$
+DELIMITER ;
+
+-- Get a cookbook and the names of its recipes in one call
+
+DROP PROCEDURE IF EXISTS GetCookbookDetail;
+
+DELIMITER $$
+
+CREATE PROCEDURE GetCookbookDetail(myCookbookName varchar(200), myUserId int)
+
+BEGIN
+  SELECT CookbookName, IsBook, Website, UserId
+  FROM Cookbook
+  WHERE CookbookName = myCookbookName AND UserId = myUserId;
+
+  SELECT Recipe.RecipeName
+  FROM Cookbook JOIN Recipe ON Recipe.CookbookId = Cookbook.CookbookId
+  WHERE Cookbook.CookbookName = myCookbookName AND Cookbook.UserId = myUserId;
+END $$
+DELIMITER ;
+
+-- Check whether a cookbook exists with one seek of the CookbookUserName unique key
+
+DROP PROCEDURE IF EXISTS CookbookExists;
+
+DELIMITER $$
+
+CREATE PROCEDURE CookbookExists(myCookbookName varchar(200), myUserId int)
+
+BEGIN
+  SELECT EXISTS (
+    SELECT 1
+    FROM Cookbook
+    WHERE CookbookName = myCookbookName AND UserId = myUserId
+  );
+END $$
+DELIMITER ;
+
+-- Check whether a recipe exists with one seek of the RecipeUserName unique key
+
+DROP PROCEDURE IF EXISTS RecipeExists;
+
+DELIMITER $$
+
+CREATE PROCEDURE RecipeExists(myRecipeName varchar(100), myUserId int)
+
+BEGIN
+  SELECT EXISTS (
+    SELECT 1
+    FROM Recipe
+    WHERE RecipeName = myRecipeName AND UserId = myUserId
+  );
 END $$
 DELIMITER ;
 
@@ -148,9 +303,45 @@ DELIMITER $$
 CREATE PROCEDURE GetRecipeInfo(myRecipeName varchar(100), myUserId int)
 
 BEGIN
-  SELECT *
+  SELECT Recipe.RecipeName, Cookbook.CookbookName, Recipe.TotalServings, 
+         Recipe.IsOnline, Recipe.WebpageLink, Recipe.UserId
+  FROM Recipe LEFT JOIN Cookbook ON Recipe.CookbookId = Cookbook.CookbookId
+  WHERE Recipe.RecipeName = myRecipeName AND Recipe.UserId = myUserId;
+END $$
+DELIMITER ;
+
+-- Get several recipes and their ingredients in one call
+
+DROP PROCEDURE IF EXISTS GetRecipesInfo;
+
+DELIMITER $$
+
+CREATE PROCEDURE GetRecipesInfo(myRecipeNames JSON, myUserId int)
+
+BEGIN
+  -- Names the collation treats as equal, such as 'Pasta' and 'pasta', 
+  -- find the same recipe, which is returned once at its first position
+  SELECT Recipe.RecipeName, Cookbook.CookbookName, Recipe.TotalServings, 
+         Recipe.IsOnline, Recipe.WebpageLink, Recipe.UserId
+  FROM (SELECT Recipe.RecipeId, MIN(Names.Position) AS Position
+        FROM JSON_TABLE(myRecipeNames, '$[*]' COLUMNS (
+               Position FOR ORDINALITY,
+               RecipeName VARCHAR(100) CHARACTER SET utf8mb4 PATH '$')) AS Names
+        JOIN Recipe ON Recipe.UserId = myUserId AND Recipe.RecipeName = Names.RecipeName
+        GROUP BY Recipe.RecipeId) AS Found
+  JOIN Recipe ON Recipe.RecipeId = Found.RecipeId
+  LEFT JOIN Cookbook ON Recipe.CookbookId = Cookbook.CookbookId
+  ORDER BY Found.Position;
+
+  SELECT Recipe.RecipeName, Ingredients.IngredientName
   FROM Recipe
-  WHERE RecipeName = myRecipeName AND UserId = myUserId;
+  JOIN Meal ON Meal.RecipeId = Recipe.RecipeId
+  JOIN Ingredients ON Meal.IngredientId = Ingredients.Id
+  WHERE Recipe.UserId = myUserId AND Recipe.RecipeName IN (
+    SELECT Names.RecipeName
+    FROM JSON_TABLE(myRecipeNames, '$[*]' COLUMNS (
+           RecipeName VARCHAR(100) CHARACTER SET utf8mb4 PATH '$')) AS Names)
+  ORDER BY Ingredients.IngredientName;
 END $$
 DELIMITER ;
 
@@ -167,34 +358,32 @@ CREATE PROCEDURE AddCookbook (
     myUserId INT
 )
 BEGIN
-    DECLARE cookbookCount INT;
-    DECLARE userCookbookCount INT;
+    -- Undo the slot taken below when the unique key rejects a duplicate
+    DECLARE EXIT HANDLER FOR 1062
+    BEGIN
+        UPDATE UserCounts
+        SET CookbookCount = CookbookCount - 1
+        WHERE UserId = myUserId;
 
-    -- Check if the cookbook already exists
-    SELECT COUNT(*) INTO cookbookCount
-    FROM Cookbook
-    WHERE CookbookName = myCookbook AND UserId = myUserId;
-    
-    -- Count the total number of cookbooks for the user
-    SELECT COUNT(*) INTO userCookbookCount
-    FROM Cookbook
-    WHERE UserId = myUserId;
-
-    -- If the cookbook does not exist, add it
-    IF cookbookCount = 0 THEN
-        IF userCookbookCount < 50 THEN
-            INSERT INTO Cookbook (CookbookName, IsBook, Website, UserId)
-            VALUES (myCookbook, myIsBook, myWebsite, myUserId);
-		ELSE
-            -- Handle the case where the user already has 50 cookbooks
-        	SIGNAL SQLSTATE '45000'
-        	SET MESSAGE_TEXT = 'User has reached the maximum number of cookbooks (50)';
-    	END IF;
-    ELSE
-        -- Optionally handle the case where the cookbook already exists
         SIGNAL SQLSTATE '45000'
         SET MESSAGE_TEXT = 'Cookbook already exists';
+    END;
+
+    -- Take one of the user's 50 cookbook slots.  The counter row stays locked 
+    -- until commit, so concurrent writes by the same user queue here
+    UPDATE UserCounts
+    SET CookbookCount = CookbookCount + 1
+    WHERE UserId = myUserId AND CookbookCount < 50;
+
+    IF ROW_COUNT() = 0 THEN
+        -- Handle the case where the user already has 50 cookbooks
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'User has reached the maximum number of cookbooks (50)';
     END IF;
+
+    -- The unique key on (UserId, CookbookName) rejects an existing cookbook
+    INSERT INTO Cookbook (CookbookName, IsBook, Website, UserId)
+    VALUES (myCookbook, myIsBook, myWebsite, myUserId);
 END $$
 
 DELIMITER ;
@@ -210,19 +399,21 @@ CREATE PROCEDURE DeleteCookbook (
     myUserId INT
 )
 BEGIN
-    DECLARE cookbookCount INT;
+    -- Give back one of the user's cookbook slots, locking the counter row 
+    -- first like every other write of the user
+    UPDATE UserCounts
+    SET CookbookCount = CookbookCount - 1
+    WHERE UserId = myUserId;
 
-    -- Check if the cookbook exists
-    SELECT COUNT(*) INTO cookbookCount
-    FROM Cookbook
+    DELETE FROM Cookbook
     WHERE CookbookName = myCookbook AND UserId = myUserId;
 
-    -- If the cookbook exists, delete it
-    IF cookbookCount > 0 THEN
-        DELETE FROM Cookbook
-        WHERE CookbookName = myCookbook AND UserId = myUserId;
-    ELSE
-        -- Optionally handle the case where the cookbook does not exist
+    IF ROW_COUNT() = 0 THEN
+        -- Handle the case where the cookbook does not exist
+        UPDATE UserCounts
+        SET CookbookCount = CookbookCount + 1
+        WHERE UserId = myUserId;
+
         SIGNAL SQLSTATE '45000'
         SET MESSAGE_TEXT = 'Cookbook does not exist';
     END IF;
@@ -232,7 +423,7 @@ DELIMITER ;
 
 -- Update Cookbook
 
-DROP PROCEDURE IF EXISTS UpdateCookbook
+DROP PROCEDURE IF EXISTS UpdateCookbook;
 
 DELIMITER $$
 
@@ -249,12 +440,12 @@ BEGIN
 
     -- Check if the cookbook exists
     SELECT COUNT(*) INTO bookCount
-    FROM cookbook
+    FROM Cookbook
     WHERE CookbookName = myCookbook AND UserId = myUserId;
 
     -- If the cookbook exists, update its information
     IF bookCount > 0 THEN
-        UPDATE cookbook
+        UPDATE Cookbook
         SET CookbookName = newCookbookName,
             IsBook = newIsBook,
             Website = newWebsite
@@ -283,34 +474,143 @@ CREATE PROCEDURE AddRecipe (
     myUserId INT
 )
 BEGIN
-    DECLARE recipeCount INT;
-    DECLARE userRecipeCount INT;
+    DECLARE myCookbookId INT;
 
-    -- Check if the recipe already exists
-    SELECT COUNT(*) INTO recipeCount
-    FROM Recipe
-    WHERE RecipeName = myRecipe AND UserId = myUserId AND CookbookName = myCookbook;
-    
-    -- Count the total number of recipes for the user
-    SELECT COUNT(*) INTO userRecipeCount
-    FROM Recipe
-    WHERE UserId = myUserId;
+    -- Undo the slot taken below when the unique key rejects a duplicate
+    DECLARE EXIT HANDLER FOR 1062
+    BEGIN
+        UPDATE UserCounts
+        SET RecipeCount = RecipeCount - 1
+        WHERE UserId = myUserId;
+
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Recipe already exists';
+    END;
+
+    -- Take one of the user's 100 recipe slots.  The counter row stays locked 
+    -- until commit, so concurrent writes by the same user queue here
+    UPDATE UserCounts
+    SET RecipeCount = RecipeCount + 1
+    WHERE UserId = myUserId AND RecipeCount < 100;
+
+    IF ROW_COUNT() = 0 THEN
+        -- Handle the case where the user already has 100 recipes
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'User has reached the maximum number of recipes (100)';
+    END IF;
+
+    -- Get the ID associated to the cookbook name
+    SELECT CookbookId INTO myCookbookId
+    FROM Cookbook
+    WHERE CookbookName = myCookbook AND UserId = myUserId;
+
+    IF myCookbook IS NOT NULL AND myCookbookId IS NULL THEN
+        UPDATE UserCounts
+        SET RecipeCount = RecipeCount - 1
+        WHERE UserId = myUserId;
+
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Cookbook does not exist';
+    END IF;
+
+    -- The unique key on (UserId, RecipeName) rejects an existing recipe
+    INSERT INTO Recipe (RecipeName, CookbookId, TotalServings, IsOnline, WebpageLink, UserId)
+    VALUES (myRecipe, myCookbookId, myServings, myIsOnline, myWebpageLink, myUserId);
+END $$
+
+DELIMITER ;
+
+-- Create a Recipe with its Ingredients
+
+DROP PROCEDURE IF EXISTS AddRecipeWithIngredients;
+
+DELIMITER $$
+
+CREATE PROCEDURE AddRecipeWithIngredients (
+    myRecipe VARCHAR(100),
+    myCookbook VARCHAR(200),
+    myServings INT,
+    myIsOnline BOOL,
+    myWebpageLink VARCHAR (255),
+    myIngredients JSON,
+    myUserId INT
+)
+BEGIN
+    DECLARE myCookbookId INT;
+    DECLARE myRecipeId INT;
+    DECLARE addedCount INT;
+
+    -- The unique key on (UserId, RecipeName) rejects an existing recipe
+    DECLARE EXIT HANDLER FOR 1062
+    BEGIN
+        ROLLBACK TO SAVEPOINT AddRecipeWithIngredients;
 
-    -- If the recipe does not exist, add it
-    IF recipeCount = 0 THEN
-        IF userRecipeCount < 100 THEN
-            INSERT INTO Recipe (RecipeName, CookbookName, TotalServings, IsOnline, WebpageLink, UserId)
-            VALUES (myRecipe, myCookbook, myServings, myIsOnline, myWebpageLink, myUserId);
-		ELSE
-            -- Handle the case where the user already has 100 recipes
-            SIGNAL SQLSTATE '45000'
-            SET MESSAGE_TEXT = 'User has reached the maximum number of recipes (100)';
-		END IF;
-    ELSE
-        -- Optionally handle the case where the recipe already exists
         SIGNAL SQLSTATE '45000'
         SET MESSAGE_TEXT = 'Recipe already exists';
+    END;
+
+    -- Undo every write of this call when a step fails, leaving the rest of 
+    -- the caller's transaction alone
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK TO SAVEPOINT AddRecipeWithIngredients;
+        RESIGNAL;
+    END;
+
+    SAVEPOINT AddRecipeWithIngredients;
+
+    -- Take one of the user's 100 recipe slots.  The counter row stays locked 
+    -- until commit, so concurrent writes by the same user queue here
+    UPDATE UserCounts
+    SET RecipeCount = RecipeCount + 1
+    WHERE UserId = myUserId AND RecipeCount < 100;
+
+    IF ROW_COUNT() = 0 THEN
+        -- Handle the case where the user already has 100 recipes
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'User has reached the maximum number of recipes (100)';
+    END IF;
+
+    -- Get the ID associated to the cookbook name
+    SELECT CookbookId INTO myCookbookId
+    FROM Cookbook
+    WHERE CookbookName = myCookbook AND UserId = myUserId;
+
+    IF myCookbook IS NOT NULL AND myCookbookId IS NULL THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Cookbook does not exist';
     END IF;
+
+    INSERT INTO Recipe (RecipeName, CookbookId, TotalServings, IsOnline, WebpageLink, UserId)
+    VALUES (myRecipe, myCookbookId, myServings, myIsOnline, myWebpageLink, myUserId);
+
+    SET myRecipeId = LAST_INSERT_ID();
+
+    -- Create the ingredients the user does not have yet in one statement.  
+    -- IGNORE skips names the collation treats as equal to an earlier one
+    INSERT IGNORE INTO Ingredients (IngredientName, UserId)
+    SELECT New.IngredientName, myUserId
+    FROM JSON_TABLE(myIngredients, '$[*]' COLUMNS (IngredientName VARCHAR(100) CHARACTER SET utf8mb4 PATH '$')) AS New
+    LEFT JOIN Ingredients ON Ingredients.UserId = myUserId AND Ingredients.IngredientName = New.IngredientName
+    WHERE Ingredients.Id IS NULL;
+
+    SET addedCount = ROW_COUNT();
+
+    UPDATE UserCounts
+    SET IngredientCount = IngredientCount + addedCount
+    WHERE UserId = myUserId AND IngredientCount + addedCount <= 500;
+
+    IF addedCount > 0 AND ROW_COUNT() = 0 THEN
+        -- Handle the case where the new ingredients do not fit in the user's 500
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'User has reached the maximum number of ingredients (500)';
+    END IF;
+
+    -- Pair the recipe with every listed ingredient in one statement
+    INSERT IGNORE INTO Meal (RecipeId, IngredientId)
+    SELECT myRecipeId, Ingredients.Id
+    FROM JSON_TABLE(myIngredients, '$[*]' COLUMNS (IngredientName VARCHAR(100) CHARACTER SET utf8mb4 PATH '$')) AS New
+    JOIN Ingredients ON Ingredients.UserId = myUserId AND Ingredients.IngredientName = New.IngredientName;
 END $$
 
 DELIMITER ;
@@ -326,19 +626,21 @@ CREATE PROCEDURE DeleteRecipe (
     myUserId INT
 )
 BEGIN
-    DECLARE recipeCount INT;
+    -- Give back one of the user's recipe slots, locking the counter row 
+    -- first like every other write of the user
+    UPDATE UserCounts
+    SET RecipeCount = RecipeCount - 1
+    WHERE UserId = myUserId;
 
-    -- Check if the recipe exists
-    SELECT COUNT(*) INTO recipeCount
-    FROM Recipe
+    DELETE FROM Recipe
     WHERE RecipeName = myRecipe AND UserId = myUserId;
 
-    -- If the recipe exists, delete it
-    IF recipeCount > 0 THEN
-        DELETE FROM Recipe
-        WHERE RecipeName = myRecipe AND UserId = myUserId;
-    ELSE
-        -- Optionally handle the case where the recipe does not exist
+    IF ROW_COUNT() = 0 THEN
+        -- Handle the case where the recipe does not exist
+        UPDATE UserCounts
+        SET RecipeCount = RecipeCount + 1
+        WHERE UserId = myUserId;
+
         SIGNAL SQLSTATE '45000'
         SET MESSAGE_TEXT = 'Recipe does not exist';
     END IF;
@@ -348,7 +650,7 @@ DELIMITER ;
 
 -- Update Recipe
 
-DROP PROCEDURE IF EXISTS UpdateRecipe
+DROP PROCEDURE IF EXISTS UpdateRecipe;
 
 DELIMITER $$
 
@@ -361,17 +663,28 @@ CREATE PROCEDURE UpdateRecipe(
 )
 BEGIN
     DECLARE recipeCount INT;
+    DECLARE newCookbookId INT;
+
+    -- Get the ID associated to the new cookbook name
+    SELECT CookbookId INTO newCookbookId
+    FROM Cookbook
+    WHERE CookbookName = newCookbookName AND UserId = myUserId;
+
+    IF newCookbookName IS NOT NULL AND newCookbookId IS NULL THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Cookbook does not exist';
+    END IF;
 
     -- Check if the recipe exists
     SELECT COUNT(*) INTO recipeCount
-    FROM recipe
+    FROM Recipe
     WHERE RecipeName = myRecipe AND UserId = myUserId;
 
     -- If the recipe exists, update its information
     IF recipeCount > 0 THEN
-        UPDATE recipe
+        UPDATE Recipe
         SET RecipeName = newRecipeName,
-            CookbookName = newCookbookName,
+            CookbookId = newCookbookId,
             TotalServings = newServings
         WHERE RecipeName = myRecipe AND UserId = myUserId;
     ELSE
@@ -394,34 +707,104 @@ CREATE PROCEDURE AddIngredient (
     myUserId INT
 )
 BEGIN
-    DECLARE ingredientCount INT;
-    DECLARE userIngredientCount INT;
+    -- Undo the slot taken below when the unique key rejects a duplicate
+    DECLARE EXIT HANDLER FOR 1062
+    BEGIN
+        UPDATE UserCounts
+        SET IngredientCount = IngredientCount - 1
+        WHERE UserId = myUserId;
 
-    -- Check if the ingredient already exists
-    SELECT COUNT(*) INTO ingredientCount
-    FROM Ingredients
-    WHERE IngredientName = myIngredient AND UserId = myUserId;
-    
-    -- Count the total number of recipes for the user
-    SELECT COUNT(*) INTO userIngredientCount
-    FROM Ingredients
-    WHERE UserId = myUserId;
-
-    -- If the ingredient does not exist, add it
-    IF ingredientCount = 0 THEN
-        IF userIngredientCount < 500 THEN
-            INSERT INTO Ingredients (IngredientName, UserId)
-            VALUES (myIngredient, myUserId);
-		ELSE
-            -- Handle the case where the user already has 500 recipes
-        	SIGNAL SQLSTATE '45000'
-        	SET MESSAGE_TEXT = 'User has reached the maximum number of ingredients (500)';
-    	END IF;
-    ELSE
-        -- Optionally handle the case where the ingredient already exists
         SIGNAL SQLSTATE '45000'
         SET MESSAGE_TEXT = 'Ingredient already exists';
+    END;
+
+    -- Take one of the user's 500 ingredient slots.  The counter row stays 
+    -- locked until commit, so concurrent writes by the same user queue here
+    UPDATE UserCounts
+    SET IngredientCount = IngredientCount + 1
+    WHERE UserId = myUserId AND IngredientCount < 500;
+
+    IF ROW_COUNT() = 0 THEN
+        -- Handle the case where the user already has 500 ingredients
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'User has reached the maximum number of ingredients (500)';
+    END IF;
+
+    -- The unique key on (IngredientName, UserId) rejects an existing ingredient
+    INSERT INTO Ingredients (IngredientName, UserId)
+    VALUES (myIngredient, myUserId);
+END $$
+
+DELIMITER ;
+
+-- Create many Ingredients at once
+
+DROP PROCEDURE IF EXISTS AddIngredients;
+
+DELIMITER $$
+
+CREATE PROCEDURE AddIngredients (
+    myIngredients JSON,
+    myUserId INT
+)
+BEGIN
+    DECLARE currentCount INT;
+    DECLARE slotsLeft INT;
+    DECLARE addedCount INT;
+    DECLARE firstAddedId INT;
+
+    -- Lock the user's counter row first, like every other write of the 
+    -- user, so the names found below cannot change before the insert
+    SELECT IngredientCount INTO currentCount
+    FROM UserCounts
+    WHERE UserId = myUserId
+    FOR UPDATE;
+
+    IF currentCount IS NULL THEN
+        -- Handle the case where the user does not exist
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'User does not exist';
     END IF;
+
+    SET slotsLeft = GREATEST(500 - currentCount, 0);
+
+    -- Return the names the user already has.  The names are read in the 
+    -- default collation of utf8mb4 so they compare like the table's names
+    SELECT New.IngredientName
+    FROM JSON_TABLE(myIngredients, '$[*]' COLUMNS (IngredientName VARCHAR(100) CHARACTER SET utf8mb4 PATH '$')) AS New
+    JOIN Ingredients ON Ingredients.UserId = myUserId AND Ingredients.IngredientName = New.IngredientName;
+
+    -- Insert the other names in one statement, in the order given, while 
+    -- the user has slots left.  IGNORE skips names the collation treats as 
+    -- equal to an earlier one of the list
+    INSERT IGNORE INTO Ingredients (IngredientName, UserId)
+    SELECT New.IngredientName, myUserId
+    FROM JSON_TABLE(myIngredients, '$[*]' COLUMNS (
+        Position FOR ORDINALITY,
+        IngredientName VARCHAR(100) CHARACTER SET utf8mb4 PATH '$')) AS New
+    LEFT JOIN Ingredients ON Ingredients.UserId = myUserId AND Ingredients.IngredientName = New.IngredientName
+    WHERE Ingredients.Id IS NULL
+    ORDER BY New.Position
+    LIMIT slotsLeft;
+
+    SET addedCount = ROW_COUNT();
+    -- The id of the first row inserted.  No other write of the user can 
+    -- run while the counter row is locked, so every row of the user from 
+    -- this id on was inserted above
+    SET firstAddedId = IF(addedCount > 0, LAST_INSERT_ID(), NULL);
+
+    UPDATE UserCounts
+    SET IngredientCount = IngredientCount + addedCount
+    WHERE UserId = myUserId;
+
+    -- Return the names the user has now, and whether each is the exact 
+    -- name inserted above rather than a name the collation treats as equal 
+    -- to it, such as 'creme' after 'crème'
+    SELECT New.IngredientName, 
+           COALESCE(Ingredients.Id >= firstAddedId 
+                    AND Ingredients.IngredientName = New.IngredientName COLLATE utf8mb4_bin, FALSE) AS Added
+    FROM JSON_TABLE(myIngredients, '$[*]' COLUMNS (IngredientName VARCHAR(100) CHARACTER SET utf8mb4 PATH '$')) AS New
+    JOIN Ingredients ON Ingredients.UserId = myUserId AND Ingredients.IngredientName = New.IngredientName;
 END $$
 
 DELIMITER ;
@@ -437,19 +820,21 @@ CREATE PROCEDURE DeleteIngredient (
     myUserId INT
 )
 BEGIN
-    DECLARE ingredientCount INT;
+    -- Give back one of the user's ingredient slots, locking the counter row 
+    -- first like every other write of the user
+    UPDATE UserCounts
+    SET IngredientCount = IngredientCount - 1
+    WHERE UserId = myUserId;
 
-    -- Check if the ingredient exists
-    SELECT COUNT(*) INTO ingredientCount
-    FROM Ingredients
+    DELETE FROM Ingredients
     WHERE IngredientName = myIngredient AND UserId = myUserId;
 
-    -- If the ingredient exists, delete it
-    IF ingredientCount > 0 THEN
-        DELETE FROM Ingredients
-        WHERE IngredientName = myIngredient AND UserId = myUserId;
-    ELSE
-        -- Optionally handle the case where the ingredient does not exist
+    IF ROW_COUNT() = 0 THEN
+        -- Handle the case where the ingredient does not exist
+        UPDATE UserCounts
+        SET IngredientCount = IngredientCount + 1
+        WHERE UserId = myUserId;
+
         SIGNAL SQLSTATE '45000'
         SET MESSAGE_TEXT = 'Ingredient does not exist';
     END IF;
@@ -473,12 +858,12 @@ BEGIN
 
     -- Check if the ingredient exists
     SELECT COUNT(*) INTO ingredientCount
-    FROM ingredients
+    FROM Ingredients
     WHERE IngredientName = myIngredient AND UserId = myUserId;
 
     -- If the recipe exists, update its information
     IF ingredientCount > 0 THEN
-        UPDATE ingredients
+        UPDATE Ingredients
         SET IngredientName = newIngredientName
         WHERE IngredientName = myIngredient AND UserId = myUserId;
     ELSE
@@ -502,38 +887,178 @@ CREATE PROCEDURE AddIngredientRecipePairing(
     myUserId INT
 )
 BEGIN
-    DECLARE pairingCount INT;
     DECLARE myIngredientId INT;
+    DECLARE myRecipeId INT;
+
+    -- The primary key of Meal rejects an existing pairing
+    DECLARE EXIT HANDLER FOR 1062
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Pairing already exists';
     
-    -- Get the ID associated to the ingredient name
+    -- Get the IDs associated to the ingredient and recipe names
     SELECT Id INTO myIngredientId
     FROM Ingredients
     WHERE IngredientName = myIngredient AND UserId = myUserId;
+
+    SELECT RecipeId INTO myRecipeId
+    FROM Recipe
+    WHERE RecipeName = myRecipe AND UserId = myUserId;
     
     IF myIngredientId IS NULL THEN
         -- Handle the case where the ingredient does not exist
         SIGNAL SQLSTATE '45000'
         SET MESSAGE_TEXT = 'Ingredient does not exist';
-    ELSE
-		-- Check if the pairing exists
-        SELECT COUNT(*) INTO pairingCount
-        FROM meal
-        WHERE IngredientId = myIngredientId AND RecipeName = myRecipe AND UserId = myUserId;
-
-        -- If the pairing doesn't exists, add it to the meal relation
-        IF pairingCount = 0 THEN
-            INSERT INTO Meal (RecipeName, UserId, IngredientId)
-            VALUES (myRecipe, myUserId, myIngredientId);
-        ELSE
-            -- Handle the case where the pairing already exists
-            SIGNAL SQLSTATE '45000'
-            SET MESSAGE_TEXT = 'Pairing already exists';
-		END IF;        
+    ELSEIF myRecipeId IS NULL THEN
+        -- Handle the case where the recipe does not exist
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Recipe does not exist';
+    END IF;
+
+    INSERT INTO Meal (RecipeId, IngredientId)
+    VALUES (myRecipeId, myIngredientId);
+END $$
+
+DELIMITER ;
+
+-- Get the names of all of a user's cookbooks, recipes and ingredients
+
+DROP PROCEDURE IF EXISTS GetSearchDocuments;
+
+DELIMITER $$
+
+CREATE PROCEDURE GetSearchDocuments(myUserId int)
+
+BEGIN
+  -- One range scan of each table's user index, for the search index
+  SELECT CookbookName
+  FROM Cookbook
+  WHERE Cookbook.UserId = myUserId;
+
+  SELECT RecipeName
+  FROM Recipe
+  WHERE Recipe.UserId = myUserId;
+
+  SELECT IngredientName
+  FROM Ingredients
+  WHERE Ingredients.UserId = myUserId;
+END $$
+DELIMITER ;
+
+-- Get all of a user's ingredients and the ingredients of each of their recipes
+
+DROP PROCEDURE IF EXISTS GetPantryDocuments;
+
+DELIMITER $$
+
+CREATE PROCEDURE GetPantryDocuments(myUserId int)
+
+BEGIN
+  -- One range scan of the user's ingredients, and one of their recipes
+  -- joined to their pairings through the Meal primary key, for the pantry
+  -- index
+  SELECT Id, IngredientName
+  FROM Ingredients
+  WHERE Ingredients.UserId = myUserId
+  ORDER BY IngredientName;
+
+  SELECT Recipe.RecipeName, Meal.IngredientId
+  FROM Recipe
+  JOIN Meal ON Meal.RecipeId = Recipe.RecipeId
+  WHERE Recipe.UserId = myUserId;
+END $$
+DELIMITER ;
+
+-- Get the meals planned over a range of days
+
+DROP PROCEDURE IF EXISTS GetMealPlan;
+
+DELIMITER $$
+
+CREATE PROCEDURE GetMealPlan(myUserId int, myStartDate date, myEndDate date)
+
+BEGIN
+  -- One range scan of the primary key
+  SELECT MealPlan.PlanDate, MealPlan.Slot, Recipe.RecipeName, Cookbook.CookbookName, 
+         Recipe.TotalServings, Recipe.IsOnline, Recipe.WebpageLink
+  FROM MealPlan
+  JOIN Recipe ON Recipe.RecipeId = MealPlan.RecipeId
+  LEFT JOIN Cookbook ON Recipe.CookbookId = Cookbook.CookbookId
+  WHERE MealPlan.UserId = myUserId AND MealPlan.PlanDate BETWEEN myStartDate AND myEndDate
+  ORDER BY MealPlan.PlanDate, MealPlan.Slot;
+END $$
+DELIMITER ;
+
+-- Replace the meals planned over a range of days
+
+DROP PROCEDURE IF EXISTS SetMealPlan;
+
+DELIMITER $$
+
+CREATE PROCEDURE SetMealPlan (
+    myUserId INT,
+    myStartDate DATE,
+    myEndDate DATE,
+    myMeals JSON
+)
+BEGIN
+    DECLARE lockedUserId INT;
+    DECLARE missingCount INT;
+
+    -- Lock the user's counter row first, like every other write of the 
+    -- user, so a concurrent recipe delete cannot deadlock with the plan
+    SELECT UserId INTO lockedUserId
+    FROM UserCounts
+    WHERE UserId = myUserId
+    FOR UPDATE;
+
+    -- Check every recipe before writing anything
+    SELECT COUNT(*) INTO missingCount
+    FROM JSON_TABLE(myMeals, '$[*]' COLUMNS (
+           RecipeName VARCHAR(100) CHARACTER SET utf8mb4 PATH '$.recipe_name')) AS Meals
+    LEFT JOIN Recipe ON Recipe.UserId = myUserId AND Recipe.RecipeName = Meals.RecipeName
+    WHERE Recipe.RecipeId IS NULL;
+
+    IF missingCount > 0 THEN
+        -- Handle the case where a planned recipe does not exist
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Recipe does not exist';
     END IF;
+
+    DELETE FROM MealPlan
+    WHERE UserId = myUserId AND PlanDate BETWEEN myStartDate AND myEndDate;
+
+    INSERT INTO MealPlan (UserId, PlanDate, Slot, RecipeId)
+    SELECT myUserId, Meals.PlanDate, Meals.Slot, Recipe.RecipeId
+    FROM JSON_TABLE(myMeals, '$[*]' COLUMNS (
+           PlanDate DATE PATH '$.date',
+           Slot VARCHAR(20) CHARACTER SET utf8mb4 PATH '$.slot',
+           RecipeName VARCHAR(100) CHARACTER SET utf8mb4 PATH '$.recipe_name')) AS Meals
+    JOIN Recipe ON Recipe.UserId = myUserId AND Recipe.RecipeName = Meals.RecipeName;
 END $$
 
 DELIMITER ;
 
+-- Get the ingredients of the meals planned over a range of days
+
+DROP PROCEDURE IF EXISTS GetShoppingList;
+
+DELIMITER $$
+
+CREATE PROCEDURE GetShoppingList(myUserId int, myStartDate date, myEndDate date)
+
+BEGIN
+  -- One aggregation over the planned meals' pairings, counting how many 
+  -- planned meals need each ingredient
+  SELECT Ingredients.IngredientName, COUNT(*) AS MealCount
+  FROM MealPlan
+  JOIN Meal ON Meal.RecipeId = MealPlan.RecipeId
+  JOIN Ingredients ON Ingredients.Id = Meal.IngredientId
+  WHERE MealPlan.UserId = myUserId AND MealPlan.PlanDate BETWEEN myStartDate AND myEndDate
+  GROUP BY Ingredients.Id, Ingredients.IngredientName
+  ORDER BY Ingredients.IngredientName;
+END $$
+DELIMITER ;
+
 -- Add User
 
 DROP PROCEDURE IF EXISTS AddUser;
@@ -558,6 +1083,10 @@ BEGIN
     IF userCount = 0 THEN
         INSERT INTO Users (Email, PasswordHash, FirstName, LastName)
         VALUES (myEmail, myPasswordHash, myFirstName, myLastName);
+
+        -- Start the user's quota counters
+        INSERT INTO UserCounts (UserId)
+        VALUES (LAST_INSERT_ID());
     ELSE
         -- Optionally handle the case where the username already exists
         SIGNAL SQLSTATE '45000'
@@ -670,11 +1199,11 @@ INSERT INTO Cookbook (CookbookName, IsBook, UserId) VALUES ("Dinner Staples", tr
 INSERT INTO Cookbook (CookbookName, IsBook, Website, UserId) VALUES ("Half Baked Harvest - Mains", false, "https://www.halfbakedharvest.com/category/recipes/type-of-meal/main-course/", 1);
 INSERT INTO Cookbook (CookbookName, IsBook, Website, UserId) VALUES ("Half Baked Harvest - Brunch", false, "https://www.halfbakedharvest.com/category/recipes/type-of-meal/brunch/", 1);
 
-INSERT INTO Recipe (RecipeName, CookbookName, TotalServings, IsOnline, UserId) VALUES ("Macaroni & Cheese", "Easy Meals", 2, false, 1);
-INSERT INTO Recipe (RecipeName, CookbookName, TotalServings, IsOnline, UserId) VALUES ("Beans & Rice", "Easy Meals", 2, false, 1);
-INSERT INTO Recipe (RecipeName, CookbookName, TotalServings, IsOnline, UserId) VALUES ("Hamburgers", "Dinner Staples", 4, false, 1);
-INSERT INTO Recipe (RecipeName, CookbookName, TotalServings, IsOnline, WebpageLink, UserId) VALUES ("Grilled Buffalo Ranch Chicken Tacos", "Half Baked Harvest - Mains", 6, true, "https://www.halfbakedharvest.com/grilled-buffalo-ranch-chicken-tacos/", 1);
-INSERT INTO Recipe (RecipeName, CookbookName, TotalServings, IsOnline, WebpageLink, UserId) VALUES ("Blueberry Croissant French Toast Bake", "Half Baked Harvest - Brunch", 6, true, "https://www.halfbakedharvest.com/blueberry-croissant-french-toast-bake/", 1);
+INSERT INTO Recipe (RecipeName, CookbookId, TotalServings, IsOnline, UserId) VALUES ("Macaroni & Cheese", 1, 2, false, 1);
+INSERT INTO Recipe (RecipeName, CookbookId, TotalServings, IsOnline, UserId) VALUES ("Beans & Rice", 1, 2, false, 1);
+INSERT INTO Recipe (RecipeName, CookbookId, TotalServings, IsOnline, UserId) VALUES ("Hamburgers", 2, 4, false, 1);
+INSERT INTO Recipe (RecipeName, CookbookId, TotalServings, IsOnline, WebpageLink, UserId) VALUES ("Grilled Buffalo Ranch Chicken Tacos", 3, 6, true, "https://www.halfbakedharvest.com/grilled-buffalo-ranch-chicken-tacos/", 1);
+INSERT INTO Recipe (RecipeName, CookbookId, TotalServings, IsOnline, WebpageLink, UserId) VALUES ("Blueberry Croissant French Toast Bake", 4, 6, true, "https://www.halfbakedharvest.com/blueberry-croissant-french-toast-bake/", 1);
 
 -- Macaroni and Cheese
 
@@ -737,64 +1266,73 @@ INSERT INTO Ingredients (IngredientName, UserId) VALUES ("Blueberries", 1);
 
 -- Macaroni & Cheese
 
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Macaroni & Cheese", 1, 1);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Macaroni & Cheese", 1, 2);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Macaroni & Cheese", 1, 3);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Macaroni & Cheese", 1, 4);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (1, 1);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (1, 2);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (1, 3);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (1, 4);
 
 -- Beans & Rice
 
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Beans & Rice", 1, 5);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Beans & Rice", 1, 6);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (2, 5);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (2, 6);
 
 -- Hamburgers
 
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Hamburgers", 1, 7);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Hamburgers", 1, 8);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Hamburgers", 1, 9);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Hamburgers", 1, 10);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Hamburgers", 1, 11);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Hamburgers", 1, 12);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Hamburgers", 1, 13);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Hamburgers", 1, 14);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (3, 7);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (3, 8);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (3, 9);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (3, 10);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (3, 11);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (3, 12);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (3, 13);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (3, 14);
 
 -- Grilled Buffalo Ranch Chicken Tacos
 
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Grilled Buffalo Ranch Chicken Tacos", 1, 15);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Grilled Buffalo Ranch Chicken Tacos", 1, 16);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Grilled Buffalo Ranch Chicken Tacos", 1, 17);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Grilled Buffalo Ranch Chicken Tacos", 1, 18);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Grilled Buffalo Ranch Chicken Tacos", 1, 19);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Grilled Buffalo Ranch Chicken Tacos", 1, 20);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Grilled Buffalo Ranch Chicken Tacos", 1, 21);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Grilled Buffalo Ranch Chicken Tacos", 1, 22);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Grilled Buffalo Ranch Chicken Tacos", 1, 23);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Grilled Buffalo Ranch Chicken Tacos", 1, 24);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Grilled Buffalo Ranch Chicken Tacos", 1, 25);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Grilled Buffalo Ranch Chicken Tacos", 1, 26);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Grilled Buffalo Ranch Chicken Tacos", 1, 27);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Grilled Buffalo Ranch Chicken Tacos", 1, 28);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Grilled Buffalo Ranch Chicken Tacos", 1, 29);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Grilled Buffalo Ranch Chicken Tacos", 1, 30);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Grilled Buffalo Ranch Chicken Tacos", 1, 31);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Grilled Buffalo Ranch Chicken Tacos", 1, 32);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Grilled Buffalo Ranch Chicken Tacos", 1, 33);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (4, 15);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (4, 16);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (4, 17);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (4, 18);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (4, 19);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (4, 20);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (4, 21);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (4, 22);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (4, 23);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (4, 24);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (4, 25);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (4, 26);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (4, 27);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (4, 28);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (4, 29);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (4, 30);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (4, 31);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (4, 32);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (4, 33);
 
 -- Blueberry Croissant
 
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Blueberry Croissant French Toast Bake", 1, 34);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Blueberry Croissant French Toast Bake", 1, 3);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Blueberry Croissant French Toast Bake", 1, 35);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Blueberry Croissant French Toast Bake", 1, 36);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Blueberry Croissant French Toast Bake", 1, 37);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Blueberry Croissant French Toast Bake", 1, 38);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Blueberry Croissant French Toast Bake", 1, 39);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Blueberry Croissant French Toast Bake", 1, 40);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Blueberry Croissant French Toast Bake", 1, 41);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Blueberry Croissant French Toast Bake", 1, 42);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Blueberry Croissant French Toast Bake", 1, 43);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Blueberry Croissant French Toast Bake", 1, 2);
-INSERT INTO Meal (RecipeName, UserId, IngredientId) VALUES ("Blueberry Croissant French Toast Bake", 1, 44);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (5, 34);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (5, 3);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (5, 35);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (5, 36);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (5, 37);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (5, 38);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (5, 39);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (5, 40);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (5, 41);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (5, 42);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (5, 43);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (5, 2);
+INSERT INTO Meal (RecipeId, IngredientId) VALUES (5, 44);
+
+-- Quota counters of the test users
+
+INSERT INTO UserCounts (UserId, CookbookCount, RecipeCount, IngredientCount)
+SELECT Users.UserId,
+       (SELECT COUNT(*) FROM Cookbook WHERE Cookbook.UserId = Users.UserId),
+       (SELECT COUNT(*) FROM Recipe WHERE Recipe.UserId = Users.UserId),
+       (SELECT COUNT(*) FROM Ingredients WHERE Ingredients.UserId = Users.UserId)
+FROM Users;
 
 -- Viewing test data
 
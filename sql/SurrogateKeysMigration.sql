@@ -0,0 +1,350 @@
+-- Migrates an existing MealPlanning database to integer surrogate keys.
+--
+-- Cookbook and Recipe gain auto increment ids used as their primary keys,
+-- Recipe refers to its cookbook by id, and Meal pairs recipe ids with
+-- ingredient ids instead of repeating recipe names.  Names stay unique per
+-- user and the stored procedures keep their name based parameters, so the
+-- application works unchanged; renaming a cookbook or recipe no longer
+-- cascades through the rows that refer to it.
+--
+-- The new tables are filled from the old ones, which are then dropped and
+-- replaced.  Recipes whose cookbook belonged to another user (which the old
+-- name only foreign key allowed) lose their cookbook.  Stop the application
+-- and back the database up before running:
+-- mysql -u root -p < sql/SurrogateKeysMigration.sql
+
+USE MealPlanning;
+
+SET FOREIGN_KEY_CHECKS = 0;
+
+CREATE TABLE CookbookMigrated (
+CookbookId int auto_increment NOT NULL,
+CookbookName varchar(200) not null,
+IsBook bool not null,
+Website varchar(200),
+UserId int NOT NULL,
+PRIMARY KEY (CookbookId),
+FOREIGN KEY (UserId) REFERENCES Users (UserId) ON UPDATE CASCADE ON DELETE CASCADE,
+UNIQUE CookbookUserName (UserId, CookbookName)
+);
+
+INSERT INTO CookbookMigrated (CookbookName, IsBook, Website, UserId)
+SELECT CookbookName, IsBook, Website, UserId
+FROM Cookbook
+ORDER BY UserId, CookbookName;
+
+CREATE TABLE RecipeMigrated (
+    RecipeId int auto_increment NOT NULL,
+    RecipeName varchar(100) NOT NULL,
+    CookbookId int,
+    TotalServings int,
+    IsOnline bool not null,
+    WebpageLink varchar(255),
+    UserId int NOT NULL,
+    PRIMARY KEY (RecipeId),
+    FOREIGN KEY (CookbookId) REFERENCES CookbookMigrated (CookbookId) ON DELETE SET NULL,
+    FOREIGN KEY (UserId) REFERENCES Users (UserId) ON UPDATE CASCADE ON DELETE CASCADE,
+    UNIQUE RecipeUserName (UserId, RecipeName),
+    INDEX RecipeCookbookName (CookbookId, RecipeName)
+);
+
+INSERT INTO RecipeMigrated (RecipeName, CookbookId, TotalServings, IsOnline, WebpageLink, UserId)
+SELECT Recipe.RecipeName, CookbookMigrated.CookbookId, Recipe.TotalServings, 
+       Recipe.IsOnline, Recipe.WebpageLink, Recipe.UserId
+FROM Recipe
+LEFT JOIN CookbookMigrated ON CookbookMigrated.CookbookName = Recipe.CookbookName 
+                          AND CookbookMigrated.UserId = Recipe.UserId
+ORDER BY Recipe.UserId, Recipe.RecipeName;
+
+CREATE TABLE MealMigrated (
+    RecipeId int NOT NULL,
+    IngredientId int NOT NULL,
+    PRIMARY KEY (RecipeId, IngredientId),
+    FOREIGN KEY (RecipeId) REFERENCES RecipeMigrated (RecipeId) ON DELETE CASCADE,
+    FOREIGN KEY (IngredientId) REFERENCES Ingredients (Id) ON DELETE CASCADE,
+    INDEX MealIngredient (IngredientId, RecipeId)
+);
+
+INSERT INTO MealMigrated (RecipeId, IngredientId)
+SELECT RecipeMigrated.RecipeId, Meal.IngredientId
+FROM Meal
+JOIN RecipeMigrated ON RecipeMigrated.RecipeName = Meal.RecipeName 
+                   AND RecipeMigrated.UserId = Meal.UserID;
+
+-- Foreign keys follow the renamed tables
+DROP TABLE Meal, Recipe, Cookbook;
+RENAME TABLE CookbookMigrated TO Cookbook, 
+             RecipeMigrated TO Recipe, 
+             MealMigrated TO Meal;
+
+SET FOREIGN_KEY_CHECKS = 1;
+
+-- Stored Procedures that read or write the new keys
+
+-- Get the ingredients in a meal
+
+DROP PROCEDURE IF EXISTS GetMealIngredients;
+
+DELIMITER $$
+
+CREATE PROCEDURE GetMealIngredients (myRecipeName varchar(100), myUserId int)
+
+BEGIN
+  SELECT Ingredients.IngredientName
+  FROM Recipe
+  JOIN Meal ON Meal.RecipeId = Recipe.RecipeId
+  JOIN Ingredients ON Meal.IngredientId = Ingredients.Id
+  WHERE Recipe.RecipeName = myRecipeName AND Recipe.UserId = myUserId
+  ORDER BY Ingredients.IngredientName;
+END $$
+DELIMITER ;
+
+-- Get the information known about a cookbook
+
+DROP PROCEDURE IF EXISTS GetCookbookInfo;
+
+DELIMITER $$
+
+CREATE PROCEDURE GetCookbookInfo(myCookbookName varchar(200), myUserId INT)
+
+BEGIN
+  SELECT CookbookName, IsBook, Website, UserId
+  FROM Cookbook
+  WHERE CookbookName = myCookbookName AND UserId = myUserId;
+END $$
+DELIMITER ;
+
+-- Get one page of recipe names from one cookbook
+
+DROP PROCEDURE IF EXISTS GetRecipesFromOneCookbookPage;
+
+DELIMITER $$
+
+CREATE PROCEDURE GetRecipesFromOneCookbookPage(myCookbookName varchar(200), myUserId int, myAfterName varchar(100), myLimit int)
+
+BEGIN
+  IF myAfterName IS NULL THEN
+    SELECT Recipe.RecipeName
+    FROM Cookbook JOIN Recipe ON Recipe.CookbookId = Cookbook.CookbookId
+    WHERE Cookbook.CookbookName = myCookbookName AND Cookbook.UserId = myUserId
+    ORDER BY Recipe.RecipeName
+    LIMIT myLimit;
+  ELSE
+    SELECT Recipe.RecipeName
+    FROM Cookbook JOIN Recipe ON Recipe.CookbookId = Cookbook.CookbookId
+    WHERE Cookbook.CookbookName = myCookbookName AND Cookbook.UserId = myUserId
+      AND Recipe.RecipeName > myAfterName
+    ORDER BY Recipe.RecipeName
+    LIMIT myLimit;
+  END IF;
+END $$
+DELIMITER ;
+
+-- Get recipes names from one cookbook
+
+DROP PROCEDURE IF EXISTS GetRecipesFromOneCookbook;
+
+DELIMITER $$
+
+CREATE PROCEDURE GetRecipesFromOneCookbook(myCookbookName varchar(200), myUserId int)
+
+BEGIN
+  SELECT Recipe.RecipeName
+  FROM Cookbook JOIN Recipe ON Recipe.CookbookId = Cookbook.CookbookId
+  WHERE Cookbook.CookbookName = myCookbookName AND Cookbook.UserId = myUserId;
+END $$
+DELIMITER ;
+
+-- Get a cookbook and the names of its recipes in one call
+
+DROP PROCEDURE IF EXISTS GetCookbookDetail;
+
+DELIMITER $$
+
+CREATE PROCEDURE GetCookbookDetail(myCookbookName varchar(200), myUserId int)
+
+BEGIN
+  SELECT CookbookName, IsBook, Website, UserId
+  FROM Cookbook
+  WHERE CookbookName = myCookbookName AND UserId = myUserId;
+
+  SELECT Recipe.RecipeName
+  FROM Cookbook JOIN Recipe ON Recipe.CookbookId = Cookbook.CookbookId
+  WHERE Cookbook.CookbookName = myCookbookName AND Cookbook.UserId = myUserId;
+END $$
+DELIMITER ;
+
+-- Get the information known about a recipe
+
+DROP PROCEDURE IF EXISTS GetRecipeInfo;
+
+DELIMITER $$
+
+CREATE PROCEDURE GetRecipeInfo(myRecipeName varchar(100), myUserId int)
+
+BEGIN
+  SELECT Recipe.RecipeName, Cookbook.CookbookName, Recipe.TotalServings, 
+         Recipe.IsOnline, Recipe.WebpageLink, Recipe.UserId
+  FROM Recipe LEFT JOIN Cookbook ON Recipe.CookbookId = Cookbook.CookbookId
+  WHERE Recipe.RecipeName = myRecipeName AND Recipe.UserId = myUserId;
+END $$
+DELIMITER ;
+
+-- Create Recipe
+
+DROP PROCEDURE IF EXISTS AddRecipe;
+
+DELIMITER $$
+
+CREATE PROCEDURE AddRecipe (
+    myRecipe VARCHAR(100),
+    myCookbook VARCHAR(200),
+    myServings INT,
+    myIsOnline BOOL,
+    myWebpageLink VARCHAR (255),
+    myUserId INT
+)
+BEGIN
+    DECLARE recipeCount INT;
+    DECLARE userRecipeCount INT;
+    DECLARE myCookbookId INT;
+
+    -- Get the ID associated to the cookbook name
+    SELECT CookbookId INTO myCookbookId
+    FROM Cookbook
+    WHERE CookbookName = myCookbook AND UserId = myUserId;
+
+    IF myCookbook IS NOT NULL AND myCookbookId IS NULL THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Cookbook does not exist';
+    END IF;
+
+    -- Check if the recipe already exists
+    SELECT COUNT(*) INTO recipeCount
+    FROM Recipe
+    WHERE RecipeName = myRecipe AND UserId = myUserId;
+    
+    -- Count the total number of recipes for the user
+    SELECT COUNT(*) INTO userRecipeCount
+    FROM Recipe
+    WHERE UserId = myUserId;
+
+    -- If the recipe does not exist, add it
+    IF recipeCount = 0 THEN
+        IF userRecipeCount < 100 THEN
+            INSERT INTO Recipe (RecipeName, CookbookId, TotalServings, IsOnline, WebpageLink, UserId)
+            VALUES (myRecipe, myCookbookId, myServings, myIsOnline, myWebpageLink, myUserId);
+		ELSE
+            -- Handle the case where the user already has 100 recipes
+            SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = 'User has reached the maximum number of recipes (100)';
+		END IF;
+    ELSE
+        -- Optionally handle the case where the recipe already exists
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Recipe already exists';
+    END IF;
+END $$
+
+DELIMITER ;
+
+-- Update Recipe
+
+DROP PROCEDURE IF EXISTS UpdateRecipe;
+
+DELIMITER $$
+
+CREATE PROCEDURE UpdateRecipe(
+    myRecipe VARCHAR(200),
+    newRecipeName VARCHAR(100),
+    newCookbookName VARCHAR(200),
+    newServings INT,
+    myUserId INT
+)
+BEGIN
+    DECLARE recipeCount INT;
+    DECLARE newCookbookId INT;
+
+    -- Get the ID associated to the new cookbook name
+    SELECT CookbookId INTO newCookbookId
+    FROM Cookbook
+    WHERE CookbookName = newCookbookName AND UserId = myUserId;
+
+    IF newCookbookName IS NOT NULL AND newCookbookId IS NULL THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Cookbook does not exist';
+    END IF;
+
+    -- Check if the recipe exists
+    SELECT COUNT(*) INTO recipeCount
+    FROM Recipe
+    WHERE RecipeName = myRecipe AND UserId = myUserId;
+
+    -- If the recipe exists, update its information
+    IF recipeCount > 0 THEN
+        UPDATE Recipe
+        SET RecipeName = newRecipeName,
+            CookbookId = newCookbookId,
+            TotalServings = newServings
+        WHERE RecipeName = myRecipe AND UserId = myUserId;
+    ELSE
+        -- Handle the case where the recipe does not exist
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Recipe not found';
+    END IF;
+END $$
+
+DELIMITER ;
+
+-- add ingredient and recipe to meal relation together
+
+DROP PROCEDURE IF EXISTS AddIngredientRecipePairing;
+
+DELIMITER $$
+
+CREATE PROCEDURE AddIngredientRecipePairing(
+    myIngredient VARCHAR(100),
+    myRecipe VARCHAR(100),
+    myUserId INT
+)
+BEGIN
+    DECLARE pairingCount INT;
+    DECLARE myIngredientId INT;
+    DECLARE myRecipeId INT;
+    
+    -- Get the IDs associated to the ingredient and recipe names
+    SELECT Id INTO myIngredientId
+    FROM Ingredients
+    WHERE IngredientName = myIngredient AND UserId = myUserId;
+
+    SELECT RecipeId INTO myRecipeId
+    FROM Recipe
+    WHERE RecipeName = myRecipe AND UserId = myUserId;
+    
+    IF myIngredientId IS NULL THEN
+        -- Handle the case where the ingredient does not exist
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Ingredient does not exist';
+    ELSEIF myRecipeId IS NULL THEN
+        -- Handle the case where the recipe does not exist
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Recipe does not exist';
+    ELSE
+		-- Check if the pairing exists
+        SELECT COUNT(*) INTO pairingCount
+        FROM Meal
+        WHERE RecipeId = myRecipeId AND IngredientId = myIngredientId;
+
+        -- If the pairing doesn't exists, add it to the meal relation
+        IF pairingCount = 0 THEN
+            INSERT INTO Meal (RecipeId, IngredientId)
+            VALUES (myRecipeId, myIngredientId);
+        ELSE
+            -- Handle the case where the pairing already exists
+            SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = 'Pairing already exists';
+		END IF;        
+    END IF;
+END $$
+
+DELIMITER ;
@@ -0,0 +1,360 @@
+-- Adds the per-user quota counters to an existing MealPlanning database.
+--
+-- UserCounts keeps how many cookbooks, recipes and ingredients each user
+-- has.  The add procedures take a slot by incrementing the counter under its
+-- row lock and let the unique keys reject duplicates, instead of counting the
+-- user's rows and checking for the new one before inserting, which let two
+-- concurrent calls both pass the checks.  The delete procedures give the
+-- slot back.
+--
+-- Run after SurrogateKeysMigration.sql, with the application stopped:
+-- mysql -u root -p < sql/UserCountsMigration.sql
+
+USE MealPlanning;
+
+CREATE TABLE IF NOT EXISTS UserCounts (
+UserId int NOT NULL,
+CookbookCount int NOT NULL DEFAULT 0,
+RecipeCount int NOT NULL DEFAULT 0,
+IngredientCount int NOT NULL DEFAULT 0,
+PRIMARY KEY (UserId),
+FOREIGN KEY (UserId) REFERENCES Users (UserId) ON UPDATE CASCADE ON DELETE CASCADE
+);
+
+INSERT INTO UserCounts (UserId, CookbookCount, RecipeCount, IngredientCount)
+SELECT Users.UserId,
+       (SELECT COUNT(*) FROM Cookbook WHERE Cookbook.UserId = Users.UserId),
+       (SELECT COUNT(*) FROM Recipe WHERE Recipe.UserId = Users.UserId),
+       (SELECT COUNT(*) FROM Ingredients WHERE Ingredients.UserId = Users.UserId)
+FROM Users
+ON DUPLICATE KEY UPDATE CookbookCount = VALUES(CookbookCount),
+                        RecipeCount = VALUES(RecipeCount),
+                        IngredientCount = VALUES(IngredientCount);
+
+-- Stored Procedures that keep the counters
+
+-- Add User
+
+DROP PROCEDURE IF EXISTS AddUser;
+
+DELIMITER $$
+
+CREATE PROCEDURE AddUser (
+    myEmail VARCHAR(100),
+    myPasswordHash VARCHAR(255),
+    myFirstName VARCHAR(50),
+    myLastName VARCHAR(50)
+)
+BEGIN
+    DECLARE userCount INT;
+
+    -- Check if the email already exists
+    SELECT COUNT(*) INTO userCount
+    FROM Users
+    WHERE Email = myEmail;
+
+    -- If the email does not exist, add it
+    IF userCount = 0 THEN
+        INSERT INTO Users (Email, PasswordHash, FirstName, LastName)
+        VALUES (myEmail, myPasswordHash, myFirstName, myLastName);
+
+        -- Start the user's quota counters
+        INSERT INTO UserCounts (UserId)
+        VALUES (LAST_INSERT_ID());
+    ELSE
+        -- Optionally handle the case where the username already exists
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'User already exists';
+    END IF;
+END $$
+
+DELIMITER ;
+
+-- Create Cookbook
+
+DROP PROCEDURE IF EXISTS AddCookbook;
+
+DELIMITER $$
+
+CREATE PROCEDURE AddCookbook (
+    myCookbook VARCHAR(200),
+    myIsBook BOOL,
+    myWebsite VARCHAR(200),
+    myUserId INT
+)
+BEGIN
+    -- Undo the slot taken below when the unique key rejects a duplicate
+    DECLARE EXIT HANDLER FOR 1062
+    BEGIN
+        UPDATE UserCounts
+        SET CookbookCount = CookbookCount - 1
+        WHERE UserId = myUserId;
+
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Cookbook already exists';
+    END;
+
+    -- Take one of the user's 50 cookbook slots.  The counter row stays locked 
+    -- until commit, so concurrent writes by the same user queue here
+    UPDATE UserCounts
+    SET CookbookCount = CookbookCount + 1
+    WHERE UserId = myUserId AND CookbookCount < 50;
+
+    IF ROW_COUNT() = 0 THEN
+        -- Handle the case where the user already has 50 cookbooks
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'User has reached the maximum number of cookbooks (50)';
+    END IF;
+
+    -- The unique key on (UserId, CookbookName) rejects an existing cookbook
+    INSERT INTO Cookbook (CookbookName, IsBook, Website, UserId)
+    VALUES (myCookbook, myIsBook, myWebsite, myUserId);
+END $$
+
+DELIMITER ;
+
+-- Delete Cookbook
+
+DROP PROCEDURE IF EXISTS DeleteCookbook;
+
+DELIMITER $$
+
+CREATE PROCEDURE DeleteCookbook (
+    myCookbook VARCHAR(200),
+    myUserId INT
+)
+BEGIN
+    -- Give back one of the user's cookbook slots, locking the counter row 
+    -- first like every other write of the user
+    UPDATE UserCounts
+    SET CookbookCount = CookbookCount - 1
+    WHERE UserId = myUserId;
+
+    DELETE FROM Cookbook
+    WHERE CookbookName = myCookbook AND UserId = myUserId;
+
+    IF ROW_COUNT() = 0 THEN
+        -- Handle the case where the cookbook does not exist
+        UPDATE UserCounts
+        SET CookbookCount = CookbookCount + 1
+        WHERE UserId = myUserId;
+
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Cookbook does not exist';
+    END IF;
+END $$
+
+DELIMITER ;
+
+-- Create Recipe
+
+DROP PROCEDURE IF EXISTS AddRecipe;
+
+DELIMITER $$
+
+CREATE PROCEDURE AddRecipe (
+    myRecipe VARCHAR(100),
+    myCookbook VARCHAR(200),
+    myServings INT,
+    myIsOnline BOOL,
+    myWebpageLink VARCHAR (255),
+    myUserId INT
+)
+BEGIN
+    DECLARE myCookbookId INT;
+
+    -- Undo the slot taken below when the unique key rejects a duplicate
+    DECLARE EXIT HANDLER FOR 1062
+    BEGIN
+        UPDATE UserCounts
+        SET RecipeCount = RecipeCount - 1
+        WHERE UserId = myUserId;
+
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Recipe already exists';
+    END;
+
+    -- Take one of the user's 100 recipe slots.  The counter row stays locked 
+    -- until commit, so concurrent writes by the same user queue here
+    UPDATE UserCounts
+    SET RecipeCount = RecipeCount + 1
+    WHERE UserId = myUserId AND RecipeCount < 100;
+
+    IF ROW_COUNT() = 0 THEN
+        -- Handle the case where the user already has 100 recipes
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'User has reached the maximum number of recipes (100)';
+    END IF;
+
+    -- Get the ID associated to the cookbook name
+    SELECT CookbookId INTO myCookbookId
+    FROM Cookbook
+    WHERE CookbookName = myCookbook AND UserId = myUserId;
+
+    IF myCookbook IS NOT NULL AND myCookbookId IS NULL THEN
+        UPDATE UserCounts
+        SET RecipeCount = RecipeCount - 1
+        WHERE UserId = myUserId;
+
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Cookbook does not exist';
+    END IF;
+
+    -- The unique key on (UserId, RecipeName) rejects an existing recipe
+    INSERT INTO Recipe (RecipeName, CookbookId, TotalServings, IsOnline, WebpageLink, UserId)
+    VALUES (myRecipe, myCookbookId, myServings, myIsOnline, myWebpageLink, myUserId);
+END $$
+
+DELIMITER ;
+
+-- Delete Recipe
+
+DROP PROCEDURE IF EXISTS DeleteRecipe;
+
+DELIMITER $$
+
+CREATE PROCEDURE DeleteRecipe (
+    myRecipe VARCHAR(100),
+    myUserId INT
+)
+BEGIN
+    -- Give back one of the user's recipe slots, locking the counter row 
+    -- first like every other write of the user
+    UPDATE UserCounts
+    SET RecipeCount = RecipeCount - 1
+    WHERE UserId = myUserId;
+
+    DELETE FROM Recipe
+    WHERE RecipeName = myRecipe AND UserId = myUserId;
+
+    IF ROW_COUNT() = 0 THEN
+        -- Handle the case where the recipe does not exist
+        UPDATE UserCounts
+        SET RecipeCount = RecipeCount + 1
+        WHERE UserId = myUserId;
+
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Recipe does not exist';
+    END IF;
+END $$
+
+DELIMITER ;
+
+-- Create Ingredient
+
+DROP PROCEDURE IF EXISTS AddIngredient;
+
+DELIMITER $$
+
+CREATE PROCEDURE AddIngredient (
+    myIngredient VARCHAR(100),
+    myUserId INT
+)
+BEGIN
+    -- Undo the slot taken below when the unique key rejects a duplicate
+    DECLARE EXIT HANDLER FOR 1062
+    BEGIN
+        UPDATE UserCounts
+        SET IngredientCount = IngredientCount - 1
+        WHERE UserId = myUserId;
+
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Ingredient already exists';
+    END;
+
+    -- Take one of the user's 500 ingredient slots.  The counter row stays 
+    -- locked until commit, so concurrent writes by the same user queue here
+    UPDATE UserCounts
+    SET IngredientCount = IngredientCount + 1
+    WHERE UserId = myUserId AND IngredientCount < 500;
+
+    IF ROW_COUNT() = 0 THEN
+        -- Handle the case where the user already has 500 ingredients
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'User has reached the maximum number of ingredients (500)';
+    END IF;
+
+    -- The unique key on (IngredientName, UserId) rejects an existing ingredient
+    INSERT INTO Ingredients (IngredientName, UserId)
+    VALUES (myIngredient, myUserId);
+END $$
+
+DELIMITER ;
+
+-- Delete Ingredient
+
+DROP PROCEDURE IF EXISTS DeleteIngredient;
+
+DELIMITER $$
+
+CREATE PROCEDURE DeleteIngredient (
+    myIngredient VARCHAR(100),
+    myUserId INT
+)
+BEGIN
+    -- Give back one of the user's ingredient slots, locking the counter row 
+    -- first like every other write of the user
+    UPDATE UserCounts
+    SET IngredientCount = IngredientCount - 1
+    WHERE UserId = myUserId;
+
+    DELETE FROM Ingredients
+    WHERE IngredientName = myIngredient AND UserId = myUserId;
+
+    IF ROW_COUNT() = 0 THEN
+        -- Handle the case where the ingredient does not exist
+        UPDATE UserCounts
+        SET IngredientCount = IngredientCount + 1
+        WHERE UserId = myUserId;
+
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Ingredient does not exist';
+    END IF;
+END $$
+
+DELIMITER ;
+
+-- add ingredient and recipe to meal relation together
+
+DROP PROCEDURE IF EXISTS AddIngredientRecipePairing;
+
+DELIMITER $$
+
+CREATE PROCEDURE AddIngredientRecipePairing(
+    myIngredient VARCHAR(100),
+    myRecipe VARCHAR(100),
+    myUserId INT
+)
+BEGIN
+    DECLARE myIngredientId INT;
+    DECLARE myRecipeId INT;
+
+    -- The primary key of Meal rejects an existing pairing
+    DECLARE EXIT HANDLER FOR 1062
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Pairing already exists';
+    
+    -- Get the IDs associated to the ingredient and recipe names
+    SELECT Id INTO myIngredientId
+    FROM Ingredients
+    WHERE IngredientName = myIngredient AND UserId = myUserId;
+
+    SELECT RecipeId INTO myRecipeId
+    FROM Recipe
+    WHERE RecipeName = myRecipe AND UserId = myUserId;
+    
+    IF myIngredientId IS NULL THEN
+        -- Handle the case where the ingredient does not exist
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Ingredient does not exist';
+    ELSEIF myRecipeId IS NULL THEN
+        -- Handle the case where the recipe does not exist
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Recipe does not exist';
+    END IF;
+
+    INSERT INTO Meal (RecipeId, IngredientId)
+    VALUES (myRecipeId, myIngredientId);
+END $$
+
+DELIMITER ;